@@ -1,62 +1,127 @@
+import os
+import time
 import streamlit as st
-import pandas as pd
-import joblib
-import matplotlib.pyplot as plt
+from instrumentation import RequestProfile, cached, configure, inc, observe, register_stats, span, start_exporters
+from modelo import DATA_PATH, decode_label, translate_class
+from model_bundle import BUNDLE_DIR
+from prediction_cache import PredictionCache
+from startup import StartupTimer, preloaded, run_in_background
 
-# --- Caching de recursos ---
-@st.cache_data
-def load_data(path="data/Obesity.csv") -> pd.DataFrame:
-    return pd.read_csv(path)
+# Partida rápida: pandas, matplotlib, scikit-learn e o modelo só são importados/carregados
+# onde são usados, e o modelo é carregado e aquecido numa thread enquanto a barra lateral
+# já está na tela.
+
+# Rótulos dos campos de entrada nos gráficos e insights
+FEATURE_LABELS = {
+    'Gender': 'Gênero', 'Age': 'Idade', 'Height': 'Altura', 'Weight': 'Peso',
+    'family_history': 'Histórico familiar', 'FAVC': 'Alimentos calóricos', 'FCVC': 'Vegetais',
+    'NCP': 'Refeições/dia', 'CAEC': 'Comer entre refeições', 'CH2O': 'Água', 'SMOKE': 'Fumante',
+    'SCC': 'Monitora calorias', 'FAF': 'Atividade física', 'TUE': 'Tempo em telas',
+    'CALC': 'Álcool', 'MTRANS': 'Transporte'
+}
+
+# Recomendações para hábitos que empurram o paciente para sobrepeso/obesidade: campo -> (condição, texto)
+ADVICE = {
+    'family_history': (lambda i: i['family_history'] == 'yes', "Histórico familiar de sobrepeso: maior predisposição genética."),
+    'FAVC': (lambda i: i['FAVC'] == 'yes', "Consumo frequente de alimentos calóricos: avalie reduzir calorias vazias."),
+    'SMOKE': (lambda i: i['SMOKE'] == 'yes', "Tabagismo pode influenciar metabolismo; considere parar."),
+    'CALC': (lambda i: i['CALC'] in ['Frequently', 'Always'], "Alto consumo de álcool: modere para apoiar controle de peso."),
+    'CH2O': (lambda i: i['CH2O'] < 2, "Consumo de água abaixo do ideal: objetive 2-3 litros/dia."),
+}
+
+# Registros mostrados em "Pacientes Semelhantes"
+SIMILAR_K = 10
+
+# Métricas por etapa (instrumentation.py): /metrics em METRICS_PORT e/ou resumo no log
+configure("app.py")
+start_exporters()
 
+# --- Caching de recursos ---
 @st.cache_resource
-def load_model_and_encoders(
-    path_model="models/gb_model.joblib",
-    path_encoder="models/label_encoder.joblib",
-    path_features="models/feature_names.joblib"
-):
+def get_startup_timer():
+    return StartupTimer("app.py")
+
+# Colunas mapeadas do cache colunar (dataset_cache.py), compartilhadas sem cópia.
+# Sob o supervisor (supervisor.py), dados, índices e modelo vêm montados do processo pai
+@cached(st.cache_resource, "load_data")
+def load_data(path=DATA_PATH):
+    with get_startup_timer().phase("dados (pandas + cache colunar)"):
+        from dataset_cache import load_dataset
+        return preloaded(("dataset", path), lambda: load_dataset(path))
+
+# Distribuição da população (IMC e features ordenados, histogramas prontos), montada uma vez
+def build_population_index(path=DATA_PATH):
+    data = load_data(path)
+    with get_startup_timer().phase("índice da população"):
+        from population_index import PopulationIndex
+        return preloaded(("population_index", path), lambda: PopulationIndex(data))
+
+@cached(st.cache_resource, "population_index")
+def start_population_index(path=DATA_PATH):
+    return run_in_background(build_population_index, path, name="populacao")
+
+# Índice de pacientes semelhantes (similarity_index.py): vizinhos exatos no espaço padronizado das features
+def build_similarity_index(path=DATA_PATH):
+    data = load_data(path)
+    with get_startup_timer().phase("índice de semelhança"):
+        from similarity_index import SimilarityIndex
+        return preloaded(("similarity_index", path), lambda: SimilarityIndex(data))
+
+@cached(st.cache_resource, "similarity_index")
+def start_similarity_index(path=DATA_PATH):
+    return run_in_background(build_similarity_index, path, name="semelhantes")
+
+# Monitor de drift (drift_monitor.py): contadores de tamanho fixo alimentados por cada análise
+@cached(st.cache_resource, "drift_monitor")
+def get_drift_monitor(path=DATA_PATH):
+    from drift_monitor import DriftMonitor, DriftReference
+    monitor = DriftMonitor(DriftReference.from_frame(load_data(path)))
+    register_stats("drift", monitor)
+    return monitor
+
+# Bundle ativo do modelo (model_bundle.py), já com FeatureEncoder e motor aquecidos.
+# Quando um bundle novo é ativado em disco, LiveBundle o carrega numa thread e troca a referência.
+# Com MODEL_LATENCY_BUDGET_MS, serve a variante compacta (model_variants.py) que cabe no orçamento.
+def warm_up_model(bundle_dir, latency_budget_ms):
+    timer = get_startup_timer()
+    with timer.phase("imports (numpy, pandas, scikit-learn)"):
+        import attribution, feature_encoder, gb_inference  # noqa: F401 (usados pelo bundle)
+        from model_bundle import LiveBundle
+    with timer.phase("bundle do modelo + aquecimento"):
+        return preloaded(
+            ("live_bundle", bundle_dir, latency_budget_ms),
+            lambda: LiveBundle(bundle_dir, latency_budget_ms=latency_budget_ms)
+        )
+
+@cached(st.cache_resource, "model")
+def start_model_warmup(bundle_dir=BUNDLE_DIR, latency_budget_ms=os.environ.get("MODEL_LATENCY_BUDGET_MS")):
+    return run_in_background(warm_up_model, bundle_dir, latency_budget_ms, name="modelo")
+
+# Espera o aquecimento (se ainda estiver rodando); falhas não ficam no cache.
+# Cada execução do script usa um único bundle do começo ao fim, mesmo que haja troca no meio.
+def get_model():
     try:
-        model = joblib.load(path_model)
-        label_encoder = joblib.load(path_encoder)
-        feature_names = joblib.load(path_features)
-        return model, label_encoder, feature_names
+        return start_model_warmup().result().get()
     except Exception as e:
+        start_model_warmup.clear()
         st.error(f"❌ Erro ao carregar recursos: {e}")
         st.stop()
 
-# Função para realizar o pre processamento 
-def preprocess_data(raw_df: pd.DataFrame, expected_cols: list) -> pd.DataFrame:
-    df = raw_df.copy()
-    df['Height'] = df['Height'] / 100
-    bin_map = {
-        'Gender': {'Female':0, 'Male':1},
-        'family_history': {'no':0, 'yes':1},
-        'FAVC': {'no':0, 'yes':1},
-        'SMOKE': {'no':0, 'yes':1},
-        'SCC': {'no':0, 'yes':1}
-    }
-    for col, m in bin_map.items():
-        df[col] = df[col].map(m)
-    df = pd.get_dummies(df, columns=['CAEC','CALC','MTRANS'])
-    for c in expected_cols:
-        if c not in df.columns:
-            df[c] = 0
-    return df[expected_cols]
-
-# Tradutores de colunas
-def decode_label(encoded, encoder):
-    return encoder.inverse_transform([encoded])[0]
-
-def translate_class(pt_label: str) -> str:
-    m = {
-        'Insufficient_Weight':'Peso Insuficiente',
-        'Normal_Weight':'Peso Normal',
-        'Overweight_Level_I':'Sobrepeso Nível I',
-        'Overweight_Level_II':'Sobrepeso Nível II',
-        'Obesity_Type_I':'Obesidade Tipo I',
-        'Obesity_Type_II':'Obesidade Tipo II',
-        'Obesity_Type_III':'Obesidade Tipo III'
-    }
-    return m.get(pt_label, pt_label)
+# Cache de predições compartilhado entre todas as sessões do processo, um por versão do bundle
+@cached(st.cache_resource, "prediction_cache", max_entries=2)
+def get_prediction_cache(version, maxsize=int(os.environ.get("PREDICTION_CACHE_SIZE", 4096))):
+    cache = PredictionCache(maxsize=maxsize, artifact_paths=())
+    register_stats("prediction_cache", cache, version=version)
+    return cache
+
+def predict_patient(inputs):
+    with span("encode"):
+        X = bundle.feature_encoder.encode_one(inputs)
+    with span("predict_proba"):
+        num_pred, proba = bundle.engine.predict_with_proba(X)
+    altura_m = inputs['Height'] / 100
+    bmi = inputs['Weight'] / altura_m ** 2
+    return num_pred[0], proba[0], bmi
 
 # LAyout dos filtros
 def sidebar_inputs():
@@ -108,112 +173,268 @@ def sidebar_inputs():
     }
 
 # Processamento
-df = load_data()
-model, encoder, feature_names = load_model_and_encoders()
-inputs = sidebar_inputs()
-
-if st.sidebar.button("🔍 Analisar"):
-    raw_df = pd.DataFrame([inputs])
-    X = preprocess_data(raw_df, feature_names)
-    if X.shape[1] != len(feature_names):
-        st.error(f"❌ Esperado {len(feature_names)} features, recebeu {X.shape[1]}")
-    else:
-        num_pred = model.predict(X)[0]
-        proba = model.predict_proba(X)[0]
-        class_raw = decode_label(num_pred, encoder)
-        class_pt = translate_class(class_raw)
-        conf = max(proba) * 100
-        st.subheader("🔎 Resultado da Análise")
-        c1, c2 = st.columns(2)
-        c1.success(class_pt)
-        c2.info(f"{conf:.1f}%")
-
-        # IMC
-        altura_m = inputs['Height'] / 100
-        bmi = inputs['Weight'] / altura_m ** 2
-        st.subheader("🎯 Indice de massa corporal (IMC)")
-        m1, m2 = st.columns(2)
-        m1.metric("", f"{bmi:.1f}")
-        status = (
-            'Abaixo do peso' if bmi < 18.5 else
-            'IMC Controlado' if bmi < 25 else
-            'Sobrepeso' if bmi < 30 else
-            'Obesidade'
-        )
-        m2.metric("", status)
-
-        # Probabilidades
-        st.subheader("📊 Probabilidades por Categoria")
-        classes_pt = [translate_class(c) for c in encoder.classes_]
-        dfp = pd.DataFrame({"Categoria": classes_pt, "Prob": proba * 100}).sort_values("Prob")
-        fig, ax = plt.subplots()
-        bars = ax.barh(dfp.Categoria, dfp.Prob)
-        for i, b in enumerate(bars):
-            if dfp.Categoria.iloc[i] == class_pt:
-                b.set_color('red')
-        ax.set_xlabel('Prob (%)')
-        ax.grid(axis='x', alpha=0.3)
-        st.pyplot(fig)
-
-        # Histograma
-        st.subheader("📈 Distribuição de IMC na População")
-        fig2, ax2 = plt.subplots()
-        data_bmi = df.Weight / ((df.Height / 100) ** 2)
-        ax2.hist(data_bmi, bins=30, edgecolor='black', alpha=0.7)
-        ax2.axvline(bmi, color='red', linestyle='--')
-        st.pyplot(fig2)
-
-        # Importância de features
-        if hasattr(model, 'feature_importances_'):
-            st.subheader("🎯 Importância das Features")
-            fi = pd.Series(model.feature_importances_, index=feature_names).sort_values()
+run_start = time.perf_counter()
+run_profile = RequestProfile("app", st.query_params.get("profile") == "1" or os.environ.get("APP_PROFILE") == "1")
+# finally: st.stop() e o rerun do Streamlit (exceções) também encerram o perfil e contam a execução
+try:
+    startup_timer = get_startup_timer()
+    model_warmup = start_model_warmup()
+    population_warmup = start_population_index()
+    similarity_warmup = start_similarity_index()
+    inputs = sidebar_inputs()
+    startup_timer.mark("primeira resposta")
+
+    if st.sidebar.button("🔍 Analisar"):
+        import pandas as pd
+        import matplotlib.pyplot as plt
+
+        inc("predictions_total")
+        bundle = get_model()
+        encoder = bundle.encoder
+        population = population_warmup.result()
+        try:
+            with span("predict"):
+                num_pred, proba, bmi = get_prediction_cache(bundle.version).get_or_compute(inputs, predict_patient)
+        except ValueError as e:
+            st.error(f"❌ {e}")
+        else:
+            class_raw = decode_label(num_pred, encoder)
+            class_pt = translate_class(class_raw)
+            with span("drift"):
+                get_drift_monitor().update(inputs, class_raw)
+                if os.environ.get("DRIFT_LOG"):
+                    from drift_monitor import append_event
+                    append_event(os.environ["DRIFT_LOG"], inputs, class_raw)
+            conf = max(proba) * 100
+            st.subheader("🔎 Resultado da Análise")
+            c1, c2 = st.columns(2)
+            c1.success(class_pt)
+            c2.info(f"{conf:.1f}%")
+
+            # IMC
+            st.subheader("🎯 Indice de massa corporal (IMC)")
+            m1, m2 = st.columns(2)
+            m1.metric("", f"{bmi:.1f}")
+            status = (
+                'Abaixo do peso' if bmi < 18.5 else
+                'IMC Controlado' if bmi < 25 else
+                'Sobrepeso' if bmi < 30 else
+                'Obesidade'
+            )
+            m2.metric("", status)
+
+            # Probabilidades
+            st.subheader("📊 Probabilidades por Categoria")
+            classes_pt = [translate_class(c) for c in encoder.classes_]
+            dfp = pd.DataFrame({"Categoria": classes_pt, "Prob": proba * 100}).sort_values("Prob")
+            fig, ax = plt.subplots()
+            bars = ax.barh(dfp.Categoria, dfp.Prob)
+            for i, b in enumerate(bars):
+                if dfp.Categoria.iloc[i] == class_pt:
+                    b.set_color('red')
+            ax.set_xlabel('Prob (%)')
+            ax.grid(axis='x', alpha=0.3)
+            with span("pyplot:probabilidades"):
+                st.pyplot(fig)
+
+            # Histograma
+            st.subheader("📈 Distribuição de IMC na População")
+            fig2, ax2 = plt.subplots()
+            population.plot_bmi(ax2, class_raw, class_pt, edgecolor='black', alpha=0.7)
+            ax2.axvline(bmi, color='red', linestyle='--')
+            with span("pyplot:imc"):
+                st.pyplot(fig2)
+
+            # Posição do paciente na população (percentil por busca binária)
+            with span("percentiles"):
+                percentis = population.patient_percentiles(inputs, bmi)
+            nomes = {
+                'BMI': 'IMC', 'Age': 'Idade', 'Height': 'Altura (cm)', 'Weight': 'Peso (kg)',
+                'FCVC': 'FCVC', 'NCP': 'NCP', 'CH2O': 'CH2O', 'FAF': 'FAF', 'TUE': 'TUE'
+            }
+            df_percentis = pd.DataFrame({
+                'Medida': [nomes.get(k, k) for k in percentis],
+                'Paciente': [round(bmi, 1) if k == 'BMI' else inputs[k] for k in percentis],
+                'Percentil (%)': [round(v, 1) for v in percentis.values()]
+            })
+            st.caption(f"IMC acima de {percentis['BMI']:.0f}% da população de referência.")
+            st.table(df_percentis)
+
+            # Pacientes semelhantes: registros reais mais próximos e a mistura de classes entre eles
+            similarity = similarity_warmup.result()
+            with span("similar"):
+                dist, vizinhos = similarity.query_one(inputs, SIMILAR_K)
+                mix = similarity.class_mix(vizinhos)[0]
+            st.subheader("👥 Pacientes Semelhantes")
+            mesma = mix[similarity.class_labels.index(class_raw)] if class_raw in similarity.class_labels else 0.0
+            st.caption(f"{mesma * len(vizinhos):.0f} dos {len(vizinhos)} registros mais parecidos da população "
+                       f"de referência são {class_pt}.")
+            registros = load_data().iloc[vizinhos]
+            st.table(pd.DataFrame({
+                'Distância': dist.round(2),
+                'Classe': [translate_class(c) for c in registros['Obesity']],
+                'Gênero': registros['Gender'].to_numpy(),
+                'Idade': registros['Age'].round(0).to_numpy(),
+                'Altura (cm)': (registros['Height'] * 100).round(0).to_numpy(),
+                'Peso (kg)': registros['Weight'].round(1).to_numpy(),
+                'Histórico Familiar': registros['family_history'].to_numpy(),
+                'FAF': registros['FAF'].round(1).to_numpy(),
+            }))
+            st.table(pd.DataFrame({
+                'Classe': [translate_class(c) for c, f in zip(similarity.class_labels, mix) if f > 0],
+                'Semelhantes (%)': [round(f * 100) for f in mix if f > 0],
+            }))
+
+            # Contribuição de cada campo para a classe prevista (caminho nas árvores, exato)
+            klass = list(bundle.engine.classes_).index(num_pred)
+            with span("attribution"):
+                contrib = bundle.attribution.explain_one(bundle.feature_encoder.encode_one(inputs), klass)
+            st.subheader("🎯 Contribuição das Features para este Paciente")
+            fc = pd.Series({FEATURE_LABELS[c]: v for c, v in contrib.items()}).iloc[::-1]
             fig3, ax3 = plt.subplots()
-            bars3 = ax3.barh(fi.index, fi.values)
-            for i, v in enumerate(fi.values):
-                ax3.text(v + 0.001, i, f"{v:.3f}")
+            ax3.barh(fc.index, fc.values, color=['tab:red' if v > 0 else 'tab:blue' for v in fc.values])
+            for i, v in enumerate(fc.values):
+                ax3.text(v, i, f" {v:+.2f}", va='center', ha='left' if v >= 0 else 'right')
+            ax3.axvline(0, color='black', linewidth=0.8)
+            ax3.set_xlabel(f'Contribuição para {class_pt} (log-odds)')
             ax3.grid(axis='x', alpha=0.3)
-            st.pyplot(fig3)
+            with span("pyplot:contribuicoes"):
+                st.pyplot(fig3)
 
-        # Insights Personalizados
+            # Insights Personalizados: os fatores que mais pesaram para este paciente
             st.subheader("📊 Insights Personalizados ")
+            a_favor = [c for c, v in contrib.items() if v > 0]
+            contra = [c for c, v in contrib.items() if v < 0]
             ins = []
-            if inputs['family_history'] == 'yes':
-                ins.append("Histórico familiar de sobrepeso: maior predisposição genética.")
-            if inputs['FAVC'] == 'yes':
-                ins.append("Consumo frequente de alimentos calóricos: avalie reduzir calorias vazias.")
-            if inputs['SMOKE'] == 'yes':
-                ins.append("Tabagismo pode influenciar metabolismo; considere parar.")
-            if inputs['CALC'] in ['Frequently', 'Always']:
-                ins.append("Alto consumo de álcool: modere para apoiar controle de peso.")
-            if inputs['CH2O'] < 2:
-                ins.append("Consumo de água abaixo do ideal: objetive 2-3 litros/dia.")
-            else:
-                ins.append("Hidratação adequada.")
+            if a_favor:
+                ins.append(f"Mais aproximaram o paciente de **{class_pt}**: " +
+                           ", ".join(f"{FEATURE_LABELS[c]} ({inputs[c]})" for c in a_favor[:3]) + ".")
+            if contra:
+                ins.append(f"Mais afastaram de **{class_pt}**: " +
+                           ", ".join(f"{FEATURE_LABELS[c]} ({inputs[c]})" for c in contra[:2]) + ".")
+            if class_raw.startswith(('Overweight', 'Obesity')):
+                ins += [ADVICE[c][1] for c in a_favor if c in ADVICE and ADVICE[c][0](inputs)]
             for item in ins:
                 st.markdown(f"- {item}")
 
-        # Resumo de Preenchimento
-        st.markdown("### 📋 Resumo de Preenchimento")
-        order = [
-            'Gender','Age','Height','Weight','family_history',
-            'FAVC','NCP','FCVC','CAEC','CH2O','SMOKE','SCC','FAF','TUE','CALC','MTRANS'
-        ]
-        display_names = [
-            'Gênero','Idade','Altura (cm)','Peso (kg)','Histórico Familiar',
-            'Consome alimentos calóricos frequentemente?','NCP','FCVC','Consome alimentos entre as refeicoes?','Qual consumo de agua diaria?','Fumante?','SCC','Realiza quantas vezes atividades fisica na semana?','TUE','Monitora calorias?','Utiliza qual tipo de transporte?'
-        ]
-        resumo_vals = [inputs[k] for k in order]
-        df_summary = pd.DataFrame({
-            'Item': display_names,
-            'Valor': resumo_vals
-        })
-        st.table(df_summary)
-
-# Sobre o Modelo
-st.sidebar.markdown("---")
-st.sidebar.markdown(
-    f"**Modelo**: Gradient Boosting  \n"
-    f"**Features**: {len(feature_names)}  \n"
-    f"**Classes**: {len(encoder.classes_)}  \n"
-    f"**Acurácia**: 94.8%"
-)
+            # Resumo de Preenchimento
+            st.markdown("### 📋 Resumo de Preenchimento")
+            order = [
+                'Gender','Age','Height','Weight','family_history',
+                'FAVC','NCP','FCVC','CAEC','CH2O','SMOKE','SCC','FAF','TUE','CALC','MTRANS'
+            ]
+            display_names = [
+                'Gênero','Idade','Altura (cm)','Peso (kg)','Histórico Familiar',
+                'Consome alimentos calóricos frequentemente?','NCP','FCVC','Consome alimentos entre as refeicoes?','Qual consumo de agua diaria?','Fumante?','SCC','Realiza quantas vezes atividades fisica na semana?','TUE','Monitora calorias?','Utiliza qual tipo de transporte?'
+            ]
+            resumo_vals = [inputs[k] for k in order]
+            df_summary = pd.DataFrame({
+                'Item': display_names,
+                'Valor': resumo_vals
+            })
+            st.table(df_summary)
+
+    # Simulação what-if: varia um ou dois campos do perfil atual; a grade inteira é escorada numa chamada
+    if st.sidebar.toggle("🧪 Simulação what-if", key="what_if"):
+        import numpy as np
+        import matplotlib.pyplot as plt
+        from matplotlib.colors import ListedColormap
+        from what_if import SWEEP_RANGES, sweep
+
+        bundle = get_model()
+        st.subheader("🧪 Simulação: e se...?")
+        campos = st.multiselect(
+            "Campos a variar (um ou dois)", list(FEATURE_LABELS), default=["Weight"],
+            max_selections=2, format_func=FEATURE_LABELS.get
+        )
+        if campos:
+            classes_pt = [translate_class(c) for c in bundle.encoder.classes_]
+            with span("what_if"):
+                sim = sweep(bundle.feature_encoder, bundle.engine, inputs, campos)
+
+            # Posição do perfil atual em cada eixo (valor mais próximo nos eixos amostrados)
+            def posicao(campo, eixo):
+                if campo in SWEEP_RANGES:
+                    return int(np.argmin(np.abs(np.asarray(eixo) - inputs[campo])))
+                return eixo.index(inputs[campo])
+
+            def marcar_eixo(set_ticks, eixo):
+                passo = max(1, len(eixo) // 8)
+                set_ticks(range(0, len(eixo), passo), [eixo[i] for i in range(0, len(eixo), passo)])
+
+            fig_wi, ax_wi = plt.subplots()
+            if len(campos) == 1:
+                campo, eixo = campos[0], sim["axes"][0]
+                for j, nome in enumerate(classes_pt):
+                    ax_wi.plot(range(len(eixo)), sim["proba"][:, j] * 100, label=nome,
+                               marker=None if campo in SWEEP_RANGES else 'o')
+                ax_wi.axvline(posicao(campo, eixo), color='black', linestyle='--', linewidth=1)
+                marcar_eixo(ax_wi.set_xticks, eixo)
+                ax_wi.set_xlabel(FEATURE_LABELS[campo])
+                ax_wi.set_ylabel('Prob (%)')
+                ax_wi.legend(fontsize='small')
+                ax_wi.grid(alpha=0.3)
+            else:
+                mostrar = st.selectbox("Mostrar", ["Classe prevista"] + classes_pt)
+                if mostrar == "Classe prevista":
+                    cores = ListedColormap(plt.get_cmap('tab10').colors[:len(classes_pt)])
+                    img = ax_wi.imshow(sim["proba"].argmax(axis=-1).T, origin='lower', aspect='auto',
+                                       cmap=cores, vmin=-0.5, vmax=len(classes_pt) - 0.5, interpolation='nearest')
+                    barra = fig_wi.colorbar(img, ticks=range(len(classes_pt)))
+                    barra.ax.set_yticklabels(classes_pt, fontsize='small')
+                else:
+                    j = classes_pt.index(mostrar)
+                    img = ax_wi.imshow(sim["proba"][..., j].T * 100, origin='lower', aspect='auto',
+                                       cmap='Reds', vmin=0, vmax=100, interpolation='nearest')
+                    fig_wi.colorbar(img, label=f'Prob. {mostrar} (%)')
+                (cx, ex), (cy, ey) = zip(campos, sim["axes"])
+                ax_wi.plot(posicao(cx, ex), posicao(cy, ey), marker='X', color='white', markeredgecolor='black', markersize=12)
+                marcar_eixo(ax_wi.set_xticks, ex)
+                marcar_eixo(ax_wi.set_yticks, ey)
+                ax_wi.set_xlabel(FEATURE_LABELS[cx])
+                ax_wi.set_ylabel(FEATURE_LABELS[cy])
+            with span("pyplot:what_if"):
+                st.pyplot(fig_wi)
+            st.caption(f"{sim['rows']} combinações escoradas numa única chamada ao modelo. "
+                       "A linha tracejada / o X marcam o perfil atual.")
+
+    # Drift: pacientes analisados neste processo x população de treino
+    if st.sidebar.toggle("📡 Monitor de drift", key="drift"):
+        import pandas as pd
+        st.subheader("📡 Monitor de drift")
+        relatorio = get_drift_monitor().report()
+        encoder_classes = set(get_model().encoder.classes_)
+        if not relatorio["events"]:
+            st.info("Nenhuma análise feita neste processo ainda.")
+        else:
+            st.dataframe(pd.DataFrame([
+                {"Campo": FEATURE_LABELS.get(f, "IMC"), "PSI": v["psi"], "KS": v.get("ks"), "Situação": v["status"]}
+                for f, v in relatorio["features"].items()
+            ]), hide_index=True)
+            classes = relatorio["classes"]
+            st.dataframe(pd.DataFrame([
+                {"Classe": translate_class(c), "Treino (%)": 100 * p, "Previstas (%)": 100 * classes["observed"][c]}
+                for c, p in classes["reference"].items() if c in encoder_classes
+            ]), hide_index=True)
+            st.caption(f"{relatorio['events']} análises; PSI da classe prevista {classes['psi']:.3f} ({classes['status']}). "
+                       "PSI > 0.25 indica mudança significativa.")
+
+    # Sobre o Modelo
+    bundle = get_model()
+    accuracy = bundle.metrics.get("accuracy", 0.948)
+    version_label = f"{bundle.version} ({bundle.variant})" if bundle.variant else bundle.version
+    st.sidebar.markdown("---")
+    st.sidebar.markdown(
+        f"**Modelo**: Gradient Boosting  \n"
+        f"**Versão**: {version_label}  \n"
+        f"**Features**: {len(bundle.feature_names)}  \n"
+        f"**Classes**: {len(bundle.encoder.classes_)}  \n"
+        f"**Acurácia**: {accuracy * 100:.1f}%"
+    )
+
+    # Resumo das fases de partida, uma vez por processo, quando o aquecimento terminar
+    if startup_timer.mark("execução completa"):
+        population_warmup.add_done_callback(lambda _: startup_timer.log())
+finally:
+    observe("script_run", time.perf_counter() - run_start)
+    run_profile.stop()
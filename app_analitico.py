@@ -1,407 +1,505 @@
 
 import streamlit as st
-import pandas as pd
-import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
 import json
+import os
+import sys
+import time
+from filtro_indexado import IndiceFiltros
+from cubo_dados import CuboDados
+from cache_graficos import CacheGraficos
+from dados_painel import montar_dados
+from graficos_agregados import LIMITE_LINHAS
+from render_paralelo import RenderizadorGraficos, modo_padrao
+from startup import StartupTimer, preloaded
+from instrumentation import RequestProfile, cached, configure, observe, register_stats, span, start_exporters
 
 
 with open("rotulos_traduzidos.json", encoding="utf-8") as f:
     rotulos = json.load(f)
 
-@st.cache_data
-def carregar_dados():
-    return pd.read_csv("data/Obesity.csv")
+# Métricas por etapa (instrumentation.py): /metrics em METRICS_PORT e/ou resumo no log
+configure("app_analitico.py")
+start_exporters()
 
 @st.cache_resource
-def carregar_modelo():
-    return joblib.load("models/gb_model (1).joblib")
-
-df = carregar_dados()
-modelo = carregar_modelo()
-
-def plot_crosstab(ax, df, row, col, ordem, title=""):
-    crosstab = pd.crosstab(df[row], df[col])
-    if crosstab.empty:
-        st.info(f"🔍 Não há dados suficientes para o gráfico: {title}")
-        return
-    crosstab = crosstab.reindex(ordem, fill_value=0)
-    crosstab.plot(kind="bar", ax=ax)
-    plt.xticks(rotation=45)
-
-
-st.sidebar.title("Navegação")
-pagina = st.sidebar.radio("Ir para:", ["Painel Analítico"])
-
-if pagina == "Painel Analítico":
-    st.title("Painel Analítico de Obesidade")
-    st.markdown("Análise de perfil de obesidade com base nos dados do estudo.")
-
-    st.sidebar.header("Filtros")
-
-    genero_opcoes = list(rotulos["genero_tradutor"].values())
-    genero_selecionado = st.sidebar.multiselect("Gênero", genero_opcoes, default=genero_opcoes)
-    genero_valores = [k for k, v in rotulos["genero_tradutor"].items() if v in genero_selecionado]
-
-    idade = st.sidebar.slider("Idade", int(df["Age"].min()), int(df["Age"].max()), (int(df["Age"].min()), int(df["Age"].max())))
-    altura = st.sidebar.slider("Altura (m)", float(df["Height"].min()), float(df["Height"].max()), (float(df["Height"].min()), float(df["Height"].max())))
-    peso = st.sidebar.slider("Peso (kg)", float(df["Weight"].min()), float(df["Weight"].max()), (float(df["Weight"].min()), float(df["Weight"].max())))
-
-    hist_opcoes = list(rotulos["historico_tradutor"].values())
-    hist_selecionado = st.sidebar.multiselect("Histórico Familiar", hist_opcoes, default=hist_opcoes)
-    hist_valores = [k for k, v in rotulos["historico_tradutor"].items() if v in hist_selecionado]
-
-    caec_opcoes = list(rotulos["caec_tradutor"].values())
-    caec_selecionado = st.sidebar.multiselect("Lanches Fora de Hora", caec_opcoes, default=caec_opcoes)
-    caec_valores = [k for k, v in rotulos["caec_tradutor"].items() if v in caec_selecionado]
-
-    favc_opcoes = list(rotulos["favc_tradutor"].values())
-    favc_selecionado = st.sidebar.multiselect("Consumo de Comida Calórica", favc_opcoes, default=favc_opcoes)
-    favc_valores = [k for k, v in rotulos["favc_tradutor"].items() if v in favc_selecionado]
-
-    df_filtrado = df[
-        (df["Gender"].isin(genero_valores)) &
-        (df["Age"].between(*idade)) &
-        (df["Height"].between(*altura)) &
-        (df["Weight"].between(*peso)) &
-        (df["family_history"].isin(hist_valores)) &
-        (df["CAEC"].isin(caec_valores)) &
-        (df["FAVC"].isin(favc_valores))
-    ]
-
-
-    st.subheader("Visão Geral")
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Total de Registros", len(df_filtrado))
-    col2.metric("Média de Peso (kg)", f"{df_filtrado['Weight'].mean():.1f}")
-    col3.metric("Média de Altura (m)", f"{df_filtrado['Height'].mean():.2f}")
-
-    ordem_obesidade = [
-        "Abaixo do Peso", "Peso Normal", "Sobrepeso I",
-        "Sobrepeso II", "Obesidade I", "Obesidade II", "Obesidade III"
-    ]
-
-    col_dist, col_insight1 = st.columns([3, 2])
-
-    with col_dist:
-        st.subheader("Distribuição dos Níveis de Obesidade")
-        dist = df_filtrado["Obesity"].map(rotulos["obesidade_tradutor"])
-        dist = pd.Categorical(dist, categories=ordem_obesidade, ordered=True)
-        dist = pd.Series(dist).value_counts(normalize=True).reindex(ordem_obesidade).fillna(0).mul(100)
-        st.bar_chart(dist)
-
-    with col_insight1:
-        with st.expander("📌 Ver Insight"):
-            if not dist.empty:
-                maior_categoria = dist.idxmax()
-                percentual = dist.max()
-                st.markdown(f"""
-                - A categoria mais comum é **{maior_categoria}** com **{percentual:.1f}%** dos registros filtrados.
-                """)
-
-    aba1, aba2, aba3, aba4, aba5 = st.tabs([
-            "📊 Demografia", 
-            "👨‍👩‍👧‍👦 Histórico Familiar", 
-            "⚖️ Altura x Peso", 
-            "🏃‍♂️ Atividade Física",
-            "🍔 Comportamento Alimentar"
-        ])
-
-    with aba1:
-        if df_filtrado.empty:
-            st.warning("❌ Não existem registros para os filtros selecionados.")
+def carregar_cronometro():
+    return StartupTimer("app_analitico.py")
+
+# Dados traduzidos e compactados uma única vez por processo. PAINEL_DADOS aponta para outro CSV
+# no esquema de data/Obesity.csv; PAINEL_LINHAS > 0 amplia a base com registros sintéticos
+# (synthetic_data.py) até N linhas, em memória, para testar o painel em escala.
+# Sob o supervisor (supervisor.py), este e os loaders abaixo devolvem a cópia montada antes do fork
+@cached(st.cache_resource, "carregar_dados")
+def carregar_dados(caminho=os.environ.get("PAINEL_DADOS", "data/Obesity.csv"), linhas=int(os.environ.get("PAINEL_LINHAS", 0))):
+    with carregar_cronometro().phase("dados"):
+        dados = preloaded(("painel", caminho, linhas), lambda: montar_dados(caminho, rotulos, linhas))
+    memoria = dados.memoria()
+    print(f"📦 Dados do painel: {memoria['linhas']} linhas, {memoria['bytes_compacto'] / 1024:.1f} KB em memória")
+    return dados
+
+# Índices de filtro montados uma única vez por processo
+@cached(st.cache_resource, "carregar_indice")
+def carregar_indice():
+    dados = carregar_dados()
+    with carregar_cronometro().phase("índice de filtros"):
+        return preloaded(("indice", dados), lambda: IndiceFiltros(dados.tabela))
+
+# Cubo pré-agregado para crosstabs e cards, compartilhando o índice de filtros
+@cached(st.cache_resource, "carregar_cubo")
+def carregar_cubo():
+    dados, indice = carregar_dados(), carregar_indice()
+    with carregar_cronometro().phase("cubo"):
+        return preloaded(("cubo", dados), lambda: CuboDados(dados.tabela, indice))
+
+# Bins e grupos pré-calculados para os gráficos linha a linha em bases grandes (graficos_agregados.py)
+@cached(st.cache_resource, "carregar_agregados")
+def carregar_agregados():
+    dados = carregar_dados()
+    with carregar_cronometro().phase("agregados dos gráficos"):
+        from graficos_agregados import AgregadosGraficos
+        return preloaded(("agregados", dados), lambda: AgregadosGraficos(dados))
+
+# Gráficos renderizados, compartilhados entre todas as sessões do processo
+@cached(st.cache_resource, "carregar_cache_graficos")
+def carregar_cache_graficos(max_bytes=int(os.environ.get("GRAFICOS_CACHE_MB", 64)) * 1024 * 1024):
+    cache = CacheGraficos(max_bytes)
+    register_stats("graficos_cache", cache, "estatisticas")
+    return cache
+
+# Pool que monta e renderiza as figuras fora da thread do script (render_paralelo.py);
+# GRAFICOS_EXECUTOR = thread | process | serial (padrão por número de CPUs), GRAFICOS_WORKERS = tamanho do pool
+@cached(st.cache_resource, "carregar_renderizador")
+def carregar_renderizador(modo=os.environ.get("GRAFICOS_EXECUTOR") or modo_padrao(), workers=int(os.environ.get("GRAFICOS_WORKERS", 0))):
+    return RenderizadorGraficos(carregar_cache_graficos(), workers or None, modo)
+
+# matplotlib/seaborn só são importados quando algum gráfico precisa ser renderizado
+def bibliotecas_graficas():
+    if "figuras_painel" not in sys.modules:
+        with cronometro.phase("imports (matplotlib, seaborn)"):
+            import figuras_painel
+    return sys.modules["figuras_painel"]
+
+inicio_execucao = time.perf_counter()
+perfil = RequestProfile("app_analitico", st.query_params.get("profile") == "1" or os.environ.get("APP_PROFILE") == "1")
+# finally: st.stop() e o rerun do Streamlit (exceções) também encerram o perfil e contam a execução
+try:
+    cronometro = carregar_cronometro()
+    dados = carregar_dados()
+    df = dados.tabela
+    indice = carregar_indice()
+    cubo = carregar_cubo()
+    renderizador = carregar_renderizador()
+    # Modo de bases grandes: histogramas, boxplots e dispersão saem de contagens pré-binadas e de
+    # uma amostra estratificada, em vez de passar as linhas ao seaborn
+    modo_grande = dados.n > int(os.environ.get("PAINEL_LIMITE_LINHAS", LIMITE_LINHAS))
+    agregados = carregar_agregados() if modo_grande else None
+
+    # Crosstab Obesity x coluna com rótulos traduzidos, na ordem de ordem_obesidade
+    def crosstab_obesidade(coluna, filtros):
+        tabela = cubo.crosstab("Obesity", coluna, **filtros)
+        tabela = tabela.rename(index=dados.rotulos["Obesity"], columns=dados.rotulos[coluna]).sort_index(axis=1)
+        return tabela.reindex(ordem_obesidade, fill_value=0)
+
+    # Colunas usadas pelos gráficos linha a linha e pelos insights
+    COLUNAS_GRAFICOS = ["Gender", "Age", "Height", "Weight", "family_history", "FAVC", "CAEC", "FAF", "Obesity"]
+
+    # Gráficos pedidos nesta execução: (lugar reservado no layout, pedido ao renderizador)
+    pedidos_graficos = []
+
+    # Reserva o lugar do gráfico e o pede ao renderizador. Acerto no cache sai pronto; num miss,
+    # preparar() monta aqui os dados e figuras_painel.<figura>(*dados, **opcoes) roda no pool
+    def pedir_grafico(id_grafico, filtros, figura, preparar, **opcoes):
+        def preparar_com_imports():
+            bibliotecas_graficas()
+            return preparar()
+        lugar = st.empty()
+        pedidos_graficos.append((lugar, renderizador.pedir(id_grafico, filtros, figura, preparar_com_imports, **opcoes)))
+
+    # Boxplot de `coluna` por classe, das linhas filtradas ou das contagens pré-binadas (bases grandes)
+    def caixas_por_classe(id_grafico, coluna):
+        if modo_grande:
+            pedir_grafico(
+                id_grafico, filtros, "caixas_agregadas",
+                lambda: (agregados.caixas(coluna, "Obesity", ids_graficos, ordem=ordem_obesidade), "Obesity", coluna),
+                rotacao=45, tight_layout={}
+            )
         else:
-            card1, card2, card3 = st.columns(3)
-            card1.metric("Média de Idade", f"{df_filtrado['Age'].mean():.1f} anos")
-            card2.metric("Total de Mulheres", len(df_filtrado[df_filtrado["Gender"] == "Female"]))
-            card3.metric("Total de Homens", len(df_filtrado[df_filtrado["Gender"] == "Male"]))
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                st.subheader("Distribuição de Obesidade por Gênero")
-                df_temp1 = df_filtrado.copy()
-                df_temp1["Obesity"] = df_temp1["Obesity"].map(rotulos["obesidade_tradutor"])
-                df_temp1["Obesity"] = pd.Categorical(df_temp1["Obesity"], categories=ordem_obesidade, ordered=True)
-                df_temp1["Gender"] = df_temp1["Gender"].map(rotulos["genero_tradutor"])
-                if df_temp1[["Obesity", "Gender"]].dropna().empty:
-                    st.info("🔍 Não existem registros suficientes para gerar este gráfico.")
+            pedir_grafico(
+                id_grafico, filtros, "caixas",
+                lambda: (df_filtrado[["Obesity", coluna]], "Obesity", coluna, ordem_obesidade),
+                rotacao=45, tight_layout={}
+            )
+
+    # Preenche cada lugar reservado assim que o seu gráfico fica pronto
+    def entregar_graficos():
+        lugares = {id(pedido): lugar for lugar, pedido in pedidos_graficos}
+        with span("graficos_pagina"):
+            for pedido in renderizador.concluidos([pedido for _, pedido in pedidos_graficos]):
+                if pedido.erro is not None:
+                    # Só o lugar deste gráfico mostra o erro; os demais continuam chegando
+                    lugares[id(pedido)].error(f"❌ Erro ao gerar o gráfico: {pedido.erro}")
+                    continue
+                if pedido.segundos:
+                    observe(f"grafico:{pedido.id_grafico}", pedido.segundos)
+                lugares[id(pedido)].image(pedido.dados, width="stretch")
+        pedidos_graficos.clear()
+
+
+    st.sidebar.title("Navegação")
+    pagina = st.sidebar.radio("Ir para:", ["Painel Analítico"])
+
+    if pagina == "Painel Analítico":
+        st.title("Painel Analítico de Obesidade")
+        st.markdown("Análise de perfil de obesidade com base nos dados do estudo.")
+
+        st.sidebar.header("Filtros")
+
+        genero_opcoes = list(rotulos["genero_tradutor"].values())
+        genero_selecionado = st.sidebar.multiselect("Gênero", genero_opcoes, default=genero_opcoes)
+        genero_valores = [k for k, v in rotulos["genero_tradutor"].items() if v in genero_selecionado]
+
+        idade = st.sidebar.slider("Idade", int(df["Age"].min()), int(df["Age"].max()), (int(df["Age"].min()), int(df["Age"].max())))
+        altura = st.sidebar.slider("Altura (m)", float(df["Height"].min()), float(df["Height"].max()), (float(df["Height"].min()), float(df["Height"].max())))
+        peso = st.sidebar.slider("Peso (kg)", float(df["Weight"].min()), float(df["Weight"].max()), (float(df["Weight"].min()), float(df["Weight"].max())))
+
+        hist_opcoes = list(rotulos["historico_tradutor"].values())
+        hist_selecionado = st.sidebar.multiselect("Histórico Familiar", hist_opcoes, default=hist_opcoes)
+        hist_valores = [k for k, v in rotulos["historico_tradutor"].items() if v in hist_selecionado]
+
+        caec_opcoes = list(rotulos["caec_tradutor"].values())
+        caec_selecionado = st.sidebar.multiselect("Lanches Fora de Hora", caec_opcoes, default=caec_opcoes)
+        caec_valores = [k for k, v in rotulos["caec_tradutor"].items() if v in caec_selecionado]
+
+        favc_opcoes = list(rotulos["favc_tradutor"].values())
+        favc_selecionado = st.sidebar.multiselect("Consumo de Comida Calórica", favc_opcoes, default=favc_opcoes)
+        favc_valores = [k for k, v in rotulos["favc_tradutor"].items() if v in favc_selecionado]
+
+        filtros = dict(
+            categorias={
+                "Gender": genero_valores,
+                "family_history": hist_valores,
+                "CAEC": caec_valores,
+                "FAVC": favc_valores,
+            },
+            intervalos={"Age": idade, "Height": altura, "Weight": peso},
+        )
+        with span("filtro"):
+            ids_filtrados = indice.consultar(**filtros)
+            # Visão sem cópia extra, com Obesity já traduzida e ordenada
+            ids_graficos = None if len(ids_filtrados) == dados.n else ids_filtrados
+            df_filtrado = dados.visao(ids_graficos, COLUNAS_GRAFICOS)
+
+        # Totais, médias e contagens saem do cubo; df_filtrado fica para os gráficos linha a linha
+        with span("cubo"):
+            resumo = cubo.resumo(**filtros)
+            medias = resumo["media"]
+            contagem_genero = cubo.contar("Gender", **filtros)
+            contagem_hist = cubo.contar("family_history", **filtros)
+            contagem_caec = cubo.contar("CAEC", **filtros)
+            contagem_favc = cubo.contar("FAVC", **filtros)
+
+
+        st.subheader("Visão Geral")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Total de Registros", resumo["n"])
+        col2.metric("Média de Peso (kg)", f"{medias['Weight']:.1f}")
+        col3.metric("Média de Altura (m)", f"{medias['Height']:.2f}")
+        cronometro.mark("primeira resposta")
+
+        ordem_obesidade = dados.ordem_obesidade
+
+        col_dist, col_insight1 = st.columns([3, 2])
+
+        with col_dist:
+            st.subheader("Distribuição dos Níveis de Obesidade")
+            dist = cubo.contar("Obesity", **filtros).rename(dados.rotulos["Obesity"])
+            dist = (dist / resumo["n"]).reindex(ordem_obesidade).fillna(0).mul(100)
+            st.bar_chart(dist)
+
+        with col_insight1:
+            with st.expander("📌 Ver Insight"):
+                if not dist.empty:
+                    maior_categoria = dist.idxmax()
+                    percentual = dist.max()
+                    st.markdown(f"""
+                    - A categoria mais comum é **{maior_categoria}** com **{percentual:.1f}%** dos registros filtrados.
+                    """)
+
+        # Abas com estado: só o conteúdo da aba aberta é executado a cada rerun
+        aba1, aba2, aba3, aba4, aba5 = st.tabs([
+                "📊 Demografia", 
+                "👨‍👩‍👧‍👦 Histórico Familiar", 
+                "⚖️ Altura x Peso", 
+                "🏃‍♂️ Atividade Física",
+                "🍔 Comportamento Alimentar"
+            ], on_change="rerun", key="aba_painel")
+
+        with aba1:
+            if aba1.open:
+                if df_filtrado.empty:
+                    st.warning("❌ Não existem registros para os filtros selecionados.")
                 else:
-                    fig1, ax1 = plt.subplots(figsize=(7, 4.5))
-                    crosstab = pd.crosstab(df_temp1["Obesity"], df_temp1["Gender"])
-                    crosstab = crosstab.reindex(ordem_obesidade, fill_value=0)
-                    crosstab.plot(kind='bar', ax=ax1)
-                    plt.xticks(rotation=45)
-                    plt.tight_layout()
-                    st.pyplot(fig1)
+                    card1, card2, card3 = st.columns(3)
+                    card1.metric("Média de Idade", f"{medias['Age']:.1f} anos")
+                    card2.metric("Total de Mulheres", contagem_genero.get("Female", 0))
+                    card3.metric("Total de Homens", contagem_genero.get("Male", 0))
+            
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.subheader("Distribuição de Obesidade por Gênero")
+                        if resumo["n"] == 0:
+                            st.info("🔍 Não existem registros suficientes para gerar este gráfico.")
+                        else:
+                            pedir_grafico(
+                                "obesidade_genero", filtros, "barras", lambda: (crosstab_obesidade("Gender", filtros),),
+                                figsize=(7, 4.5), tight_layout={}
+                            )
             
-            with col2:
-                st.subheader("Distribuição da Idade por Categoria de Obesidade")
-                fig_age, ax_age = plt.subplots(figsize=(7, 4.5))
-                sns.histplot(data=df_temp1, x="Age", hue="Obesity", multiple="stack", ax=ax_age)
-                plt.tight_layout()
-                st.pyplot(fig_age)
+                    with col2:
+                        st.subheader("Distribuição da Idade por Categoria de Obesidade")
+                        if modo_grande:
+                            # Bins de 1 ano (2 bins finos de 0.5)
+                            pedir_grafico("idade_obesidade", filtros, "histograma_idade_agregado", lambda: (
+                                agregados.contagens("Age", "Obesity", ids_graficos, fator=2),
+                                agregados.colunas["Age"].bordas(2), ordem_obesidade,
+                            ))
+                        else:
+                            pedir_grafico("idade_obesidade", filtros, "histograma_idade", lambda: (df_filtrado[["Age", "Obesity"]],))
     
             
-            with st.expander("📌 Ver Insight"):
-                if df_filtrado[["Obesity", "Gender"]].dropna().empty:
-                    st.info("📌 Não existem dados disponíveis para gerar insights.")
-                else:
-                    tabela_percent = pd.crosstab(df_filtrado["Obesity"], df_filtrado["Gender"], normalize='columns') * 100
-                    st.dataframe(tabela_percent.round(1))
+                    with st.expander("📌 Ver Insight"):
+                        if df_filtrado[["Obesity", "Gender"]].dropna().empty:
+                            st.info("📌 Não existem dados disponíveis para gerar insights.")
+                        else:
+                            tabela_percent = cubo.crosstab("Obesity", "Gender", **filtros)
+                            tabela_percent = tabela_percent / tabela_percent.sum() * 100
+                            st.dataframe(tabela_percent.round(1))
             
-                    total_fem = (df_filtrado["Gender"] == "Female").sum()
-                    total_masc = (df_filtrado["Gender"] == "Male").sum()
+                            total_fem = contagem_genero.get("Female", 0)
+                            total_masc = contagem_genero.get("Male", 0)
             
-                    if total_fem > 0 and total_masc == 0:
+                            if total_fem > 0 and total_masc == 0:
+                                st.markdown("""
+                                ### 🔍 Mulheres:
+                                - Maior prevalência em **obesidade III**, indicando risco elevado.
+                                - Há também concentração significativa nas faixas de **sobrepeso II** e **obesidade I**.
+                                - A distribuição etária mostra que **a maioria está entre 20 e 25 anos**, com casos graves até os 40+.
+                                """)
+                            elif total_masc > 0 and total_fem == 0:
+                                st.markdown("""
+                                ### 🔍 Homens:
+                                - A maior incidência está em **obesidade II** e **sobrepeso I/II**.
+                                - Homens com **peso normal ou abaixo do peso** são menos comuns, indicando tendência ao excesso de peso.
+                                - Idade majoritária entre **18 e 28 anos**, mas também há obesidade severa acima dos 30.
+                                """)
+                            else:
+                                st.markdown("""
+                                ### 🔍 Geral:
+                                - **Homens** concentram-se em **obesidade II** e **sobrepeso**, enquanto **mulheres** apresentam maior número em **obesidade III**.
+                                - Há uma distribuição consistente de obesidade moderada em ambos os sexos.
+                                - A faixa etária predominante é entre **20 e 25 anos**, indicando uma população jovem já em níveis de obesidade preocupantes.
+                                """)
+
+
+
+
+        with aba2:
+            if aba2.open:
+        
+                card_fam1, card_fam2 = st.columns(2)
+                hist_sim = contagem_hist.get("yes", 0)
+                card_fam1.metric("Com histórico familiar", f"{hist_sim} registros")
+                card_fam2.metric("Sem histórico", f"{resumo['n'] - hist_sim} registros")
+
+                col_fam1, col_fam2 = st.columns(2)
+                with col_fam1:
+                    st.subheader("Obesidade por Histórico Familiar")
+                    pedir_grafico(
+                        "obesidade_historico", filtros, "barras", lambda: (crosstab_obesidade("family_history", filtros),),
+                        figsize=(6, 4.2), tight_layout={"pad": 1.5}
+                    )
+
+                with col_fam2:
+                    st.subheader("Peso vs historico familiar")
+                    if modo_grande:
+                        pedir_grafico(
+                            "peso_historico", filtros, "caixas_agregadas",
+                            lambda: (agregados.caixas("Weight", "family_history", ids_graficos), "family_history", "Weight"),
+                            figsize=(6, 4.2), tight_layout={"pad": 1.5}
+                        )
+                    else:
+                        pedir_grafico(
+                            "peso_historico", filtros, "caixas",
+                            lambda: (df_filtrado[["family_history", "Weight"]], "family_history", "Weight"),
+                            figsize=(6, 4.2), tight_layout={"pad": 1.5}
+                        )
+
+       
+                with st.expander("📌 Ver Insight"):
+                    count_sim = contagem_hist.get("yes", 0)
+                    count_nao = contagem_hist.get("no", 0)
+
+                    if count_sim > 0 and count_nao == 0:
                         st.markdown("""
-                        ### 🔍 Mulheres:
-                        - Maior prevalência em **obesidade III**, indicando risco elevado.
-                        - Há também concentração significativa nas faixas de **sobrepeso II** e **obesidade I**.
-                        - A distribuição etária mostra que **a maioria está entre 20 e 25 anos**, com casos graves até os 40+.
+                        ### ✅ Apenas com histórico familiar
+                        - Indivíduos com **histórico familiar positivo** apresentam grande incidência de **obesidade tipo II e III**.
+                        - Praticamente não há registros de **peso normal ou insuficiente** nesse grupo.
+                        - A mediana de peso é **significativamente mais alta**, com presença de **outliers de peso elevado**.
+                        - Isso pode indicar uma **predisposição genética relevante**.
                         """)
-                    elif total_masc > 0 and total_fem == 0:
+
+                    elif count_nao > 0 and count_sim == 0:
                         st.markdown("""
-                        ### 🔍 Homens:
-                        - A maior incidência está em **obesidade II** e **sobrepeso I/II**.
-                        - Homens com **peso normal ou abaixo do peso** são menos comuns, indicando tendência ao excesso de peso.
-                        - Idade majoritária entre **18 e 28 anos**, mas também há obesidade severa acima dos 30.
+                        ### 🚫 Apenas sem histórico familiar
+                        - Indivíduos **sem histórico familiar** concentram-se em **peso normal ou sobrepeso I**.
+                        - A distribuição de obesidade severa (tipos II e III) é praticamente inexistente.
+                        - O peso tende a ser **mais baixo e estável**, com **menor variabilidade**.
+                        - Isso sugere que **a ausência de predisposição genética pode ser um fator protetivo**.
                         """)
-                    else:
+
+                    elif count_sim > 0 and count_nao > 0:
                         st.markdown("""
-                        ### 🔍 Geral:
-                        - **Homens** concentram-se em **obesidade II** e **sobrepeso**, enquanto **mulheres** apresentam maior número em **obesidade III**.
-                        - Há uma distribuição consistente de obesidade moderada em ambos os sexos.
-                        - A faixa etária predominante é entre **20 e 25 anos**, indicando uma população jovem já em níveis de obesidade preocupantes.
+                        ### 🧬 Comparativo Geral: com vs sem histórico
+                        - Indivíduos com **histórico familiar** de obesidade têm **maior propensão** a níveis severos de obesidade.
+                        - A média e mediana de peso são **notavelmente maiores** nesse grupo.
+                        - Já os sem histórico se concentram mais em **faixas saudáveis**, com maior percentual de **peso normal**.
+                        - A **disparidade entre os grupos** reforça a hipótese de que **genética e ambiente familiar** influenciam fortemente o quadro de obesidade.
                         """)
 
+                    else:
+                        st.info("📌 Não existem dados disponíveis para gerar insights.")
 
 
 
-    with aba2:
+        with aba3:
+            if aba3.open:
+                card_hp1, card_hp2 = st.columns(2)
+                imc_medio = medias["IMC"]
+                card_hp1.metric("IMC Médio", f"{imc_medio:.1f}")
+                card_hp2.metric("Peso Médio", f"{medias['Weight']:.1f} kg")
         
-        card_fam1, card_fam2 = st.columns(2)
-        hist_sim = df_filtrado[df_filtrado["family_history"] == "yes"]
-        card_fam1.metric("Com histórico familiar", f"{len(hist_sim)} registros")
-        card_fam2.metric("Sem histórico", f"{len(df_filtrado) - len(hist_sim)} registros")
-
-        col_fam1, col_fam2 = st.columns(2)
-        with col_fam1:
-            st.subheader("Obesidade por Histórico Familiar")
-            df_temp2 = df_filtrado.copy()
-            df_temp2["Obesity"] = df_temp2["Obesity"].map(rotulos["obesidade_tradutor"])
-            df_temp2["Obesity"] = pd.Categorical(df_temp2["Obesity"], categories=ordem_obesidade, ordered=True)
-            df_temp2["family_history"] = df_temp2["family_history"].map(rotulos["historico_tradutor"])
-            fig2, ax2 = plt.subplots(figsize=(6, 4.2))
-            crosstab2 = pd.crosstab(df_temp2["Obesity"], df_temp2["family_history"])
-            crosstab2 = crosstab2.reindex(ordem_obesidade, fill_value=0)
-            crosstab2.plot(kind='bar', ax=ax2)
-            plt.xticks(rotation=45)
-            plt.tight_layout(pad=1.5)
-            st.pyplot(fig2)
-
-        with col_fam2:
-            st.subheader("Peso vs historico familiar")
-            fig_peso_hist, ax_peso_hist = plt.subplots(figsize=(6, 4.2))
-            sns.boxplot(data=df_filtrado, x="family_history", y="Weight", ax=ax_peso_hist)
-            plt.tight_layout(pad=1.5)
-            st.pyplot(fig_peso_hist)
+                col_hp1, col_hp2 = st.columns(2)
+                with col_hp1:
+                    st.subheader("Altura vs Peso por Categoria")
+                    if modo_grande:
+                        def preparar():
+                            grade, bordas_x, bordas_y = agregados.densidade("Height", "Weight", ids_graficos)
+                            amostra = dados.visao(agregados.amostra("Obesity", ids_graficos), ["Height", "Weight", "Obesity"])
+                            return (grade, bordas_x, bordas_y, amostra["Height"].to_numpy(), amostra["Weight"].to_numpy(),
+                                    amostra["Obesity"].array.codes, ordem_obesidade)
+                        pedir_grafico("altura_peso", filtros, "dispersao_agregada", preparar)
+                    else:
+                        pedir_grafico("altura_peso", filtros, "dispersao", lambda: (df_filtrado[["Height", "Weight", "Obesity"]],))
 
-       
-        with st.expander("📌 Ver Insight"):
-            count_sim = df_filtrado[df_filtrado["family_history"] == "yes"].shape[0]
-            count_nao = df_filtrado[df_filtrado["family_history"] == "no"].shape[0]
-
-            if count_sim > 0 and count_nao == 0:
-                st.markdown("""
-                ### ✅ Apenas com histórico familiar
-                - Indivíduos com **histórico familiar positivo** apresentam grande incidência de **obesidade tipo II e III**.
-                - Praticamente não há registros de **peso normal ou insuficiente** nesse grupo.
-                - A mediana de peso é **significativamente mais alta**, com presença de **outliers de peso elevado**.
-                - Isso pode indicar uma **predisposição genética relevante**.
-                """)
-
-            elif count_nao > 0 and count_sim == 0:
-                st.markdown("""
-                ### 🚫 Apenas sem histórico familiar
-                - Indivíduos **sem histórico familiar** concentram-se em **peso normal ou sobrepeso I**.
-                - A distribuição de obesidade severa (tipos II e III) é praticamente inexistente.
-                - O peso tende a ser **mais baixo e estável**, com **menor variabilidade**.
-                - Isso sugere que **a ausência de predisposição genética pode ser um fator protetivo**.
-                """)
-
-            elif count_sim > 0 and count_nao > 0:
-                st.markdown("""
-                ### 🧬 Comparativo Geral: com vs sem histórico
-                - Indivíduos com **histórico familiar** de obesidade têm **maior propensão** a níveis severos de obesidade.
-                - A média e mediana de peso são **notavelmente maiores** nesse grupo.
-                - Já os sem histórico se concentram mais em **faixas saudáveis**, com maior percentual de **peso normal**.
-                - A **disparidade entre os grupos** reforça a hipótese de que **genética e ambiente familiar** influenciam fortemente o quadro de obesidade.
-                """)
-
-            else:
-                st.info("📌 Não existem dados disponíveis para gerar insights.")
-
-
-
-    with aba3:
-        card_hp1, card_hp2 = st.columns(2)
-        imc_medio = (df_filtrado["Weight"] / df_filtrado["Height"]**2).mean()
-        card_hp1.metric("IMC Médio", f"{imc_medio:.1f}")
-        card_hp2.metric("Peso Médio", f"{df_filtrado['Weight'].mean():.1f} kg")
-        
-        col_hp1, col_hp2 = st.columns(2)
-        with col_hp1:
-            st.subheader("Altura vs Peso por Categoria")
-            df_temp4 = df_filtrado.copy()
-            df_temp4["Obesity"] = df_temp4["Obesity"].map(rotulos["obesidade_tradutor"])
-            df_temp4["Obesity"] = pd.Categorical(df_temp4["Obesity"], categories=ordem_obesidade, ordered=True)
-            fig4, ax4 = plt.subplots(figsize=(7, 4.5))
-            sns.scatterplot(data=df_temp4, x="Height", y="Weight", hue="Obesity", ax=ax4)
-            plt.tight_layout()
-            st.pyplot(fig4)
-
-        with col_hp2:
-            st.subheader("Relação de peso por Categoria de obesidade ")
-            fig_boxpeso, ax_boxpeso = plt.subplots(figsize=(7, 4.5))
-            sns.boxplot(data=df_temp4, x="Obesity", y="Weight", order=ordem_obesidade, ax=ax_boxpeso)
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            st.pyplot(fig_boxpeso)
-
-        st.subheader("Relação de Altura por Categoria obesidade")
-        fig_boxaltura, ax_boxaltura = plt.subplots(figsize=(7, 4.5))
-        sns.boxplot(data=df_temp4, x="Obesity", y="Height", order=ordem_obesidade, ax=ax_boxaltura)
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        st.pyplot(fig_boxaltura)
+                with col_hp2:
+                    st.subheader("Relação de peso por Categoria de obesidade ")
+                    caixas_por_classe("box_peso", "Weight")
+
+                st.subheader("Relação de Altura por Categoria obesidade")
+                caixas_por_classe("box_altura", "Height")
 
 
         
-        with st.expander("📌 Ver Insight"):
-            if df_filtrado[["Height", "Weight", "Obesity"]].dropna().empty:
-                st.info("📌 Não existem dados disponíveis para gerar insights.")
-            else:
-                imc_medio = df_filtrado["Weight"] / (df_filtrado["Height"] ** 2)
-                imc_medio = imc_medio.mean()
-
-                st.markdown(f"""
-                ### 📏 Análise de Altura e Peso (dados Gerais)
+                with st.expander("📌 Ver Insight"):
+                    if df_filtrado[["Height", "Weight", "Obesity"]].dropna().empty:
+                        st.info("📌 Não existem dados disponíveis para gerar insights.")
+                    else:
+                        imc_medio = medias["IMC"]
+
+                        st.markdown(f"""
+                        ### 📏 Análise de Altura e Peso (dados Gerais)
                 
-                - O **IMC médio** da amostra é de aproximadamente **{imc_medio:.1f}**, o que indica **sobrepeso** segundo a classificação da OMS.
-                - A relação entre **altura e peso** mostra que **quanto maior o peso para uma mesma altura**, mais provável é a associação com **obesidade severa**.
-                - As categorias de **obesidade II e III** apresentam indivíduos com **altos pesos**, independentemente da altura, e muitos estão fora dos limites interquartis (outliers).
-                - Já os grupos de **peso normal e abaixo do peso** tendem a se concentrar em alturas médias com pesos significativamente menores.
-                - A análise da **altura isolada** por categoria de obesidade mostra uma **leve tendência de maior altura** nos grupos com obesidade moderada, mas sem grandes diferenças significativas.
-                """)
+                        - O **IMC médio** da amostra é de aproximadamente **{imc_medio:.1f}**, o que indica **sobrepeso** segundo a classificação da OMS.
+                        - A relação entre **altura e peso** mostra que **quanto maior o peso para uma mesma altura**, mais provável é a associação com **obesidade severa**.
+                        - As categorias de **obesidade II e III** apresentam indivíduos com **altos pesos**, independentemente da altura, e muitos estão fora dos limites interquartis (outliers).
+                        - Já os grupos de **peso normal e abaixo do peso** tendem a se concentrar em alturas médias com pesos significativamente menores.
+                        - A análise da **altura isolada** por categoria de obesidade mostra uma **leve tendência de maior altura** nos grupos com obesidade moderada, mas sem grandes diferenças significativas.
+                        """)
 
-                st.caption("ℹ️ Os gráficos ajudam a identificar padrões extremos (outliers) e comportamentos típicos por categoria de obesidade.")
+                        st.caption("ℹ️ Os gráficos ajudam a identificar padrões extremos (outliers) e comportamentos típicos por categoria de obesidade.")
 
 
-    with aba4:
+        with aba4:
+            if aba4.open:
 
-        pct_sedentarios = (df_filtrado["FAF"] == 0).mean() * 100
+                pct_sedentarios = medias["FAF_0"] * 100
 
-        card_faf1, card_faf2 = st.columns(2)
-        card_faf1.metric("Sedentários", f"{pct_sedentarios:.1f}%", "FAF = 0")
+                card_faf1, card_faf2 = st.columns(2)
+                card_faf1.metric("Sedentários", f"{pct_sedentarios:.1f}%", "FAF = 0")
 
-        pct_ativos = (df_filtrado["FAF"] >= 2).mean() * 100
-        card_faf2.metric("Fisicamente Ativos", f"{pct_ativos:.1f}%", "FAF ≥ 2")
+                pct_ativos = medias["FAF_2"] * 100
+                card_faf2.metric("Fisicamente Ativos", f"{pct_ativos:.1f}%", "FAF ≥ 2")
 
         
-        col_faf_grafico, col_faf_insight = st.columns(2)
-        with col_faf_grafico:
-            st.subheader("Atividade Física por Categoria de Obesidade")
-            df_temp4["Obesity"] = pd.Categorical(df_temp4["Obesity"], categories=ordem_obesidade, ordered=True)
-            fig5, ax5 = plt.subplots(figsize=(7, 4.5))
-            sns.boxplot(data=df_temp4, x="Obesity", y="FAF", order=ordem_obesidade, ax=ax5)
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            st.pyplot(fig5)
-
-        with col_faf_insight:
-            st.subheader("Distribuição do Tempo de Atividade Física por Nível de Obesidade")
-            df_temp_faf = df_filtrado.copy()
-            df_temp_faf["Obesity"] = df_temp_faf["Obesity"].map(rotulos["obesidade_tradutor"])
-            df_temp_faf["Obesity"] = pd.Categorical(df_temp_faf["Obesity"], categories=ordem_obesidade, ordered=True)
-
-            fig_faf_hist, ax_faf_hist = plt.subplots(figsize=(7, 4.5))
-            sns.histplot(
-                data=df_temp_faf,
-                x="FAF",
-                hue="Obesity",
-                multiple="fill",
-                palette="Set2",
-                hue_order=ordem_obesidade,
-                edgecolor="black",
-                binwidth=0.25
-            )
-            ax_faf_hist.set_title("Distribuição do Tempo de Atividade Física por Nível de Obesidade")
-            ax_faf_hist.set_xlabel("FAF (frequência de atividade física semanal)")
-            ax_faf_hist.set_ylabel("Proporção")
-            plt.tight_layout()
-            st.pyplot(fig_faf_hist)
+                col_faf_grafico, col_faf_insight = st.columns(2)
+                with col_faf_grafico:
+                    st.subheader("Atividade Física por Categoria de Obesidade")
+                    caixas_por_classe("box_faf", "FAF")
+
+                with col_faf_insight:
+                    st.subheader("Distribuição do Tempo de Atividade Física por Nível de Obesidade")
+                    if modo_grande:
+                        # binwidth 0.25 = 5 bins finos de 0.05
+                        pedir_grafico("hist_faf", filtros, "proporcao_faf_agregada", lambda: (
+                            agregados.contagens("FAF", "Obesity", ids_graficos, fator=5),
+                            agregados.colunas["FAF"].bordas(5), ordem_obesidade,
+                        ))
+                    else:
+                        pedir_grafico("hist_faf", filtros, "proporcao_faf", lambda: (df_filtrado[["FAF", "Obesity"]], ordem_obesidade))
 
 
     
-        with st.expander("📌 Ver Insight"):
-            if df_filtrado["FAF"].dropna().empty:
-                st.info("📌 Não existem dados disponíveis para gerar insights.")
-            else:
-                faf_mean = df_filtrado["FAF"].mean()
-                faf_median = df_filtrado["FAF"].median()
-
-                st.markdown(f"""
-                ### 🏃 Análise de Atividade Física
-
-                - O valor **médio** da frequência de atividade física semanal (FAF) é **{faf_mean:.2f}**, enquanto a **mediana** é **{faf_median:.2f}** — indicando uma **distribuição assimétrica**, com muitas pessoas relatando níveis baixos de atividade.
-                - **Indivíduos com obesidade severa (tipo II e III)** tendem a praticar **menos atividade física** em comparação com os grupos de peso normal ou abaixo do peso.
-                - O gráfico de proporção revela que, mesmo entre aqueles com **alta frequência de exercícios (FAF = 2 ou 3)**, ainda existem casos de **sobrepeso e obesidade**, o que pode indicar influência de **outros fatores como alimentação ou genética**.
-                - Já os grupos com **FAF = 0** apresentam alta concentração de **obesidade tipo III**, reforçando a **associação entre sedentarismo e obesidade grave**.
-                
-                """)
-                st.caption("ℹ️ FAF representa a frequência de atividade física semanal (escala de 0 a 3).")
-
-
-    with aba5:
-        card_freq1, card_freq2, card_freq3 = st.columns(3)
-        caec_freq = df_filtrado[df_filtrado["CAEC"] != "no"]
-        card_freq1.metric("Faz lanches fora de hora", f"{len(caec_freq)} pessoas")
-        card_freq2.metric("Consome comida calórica", f"{len(df_filtrado[df_filtrado['FAVC'] == 'yes'])} pessoas")
-        card_freq3.metric("Não consome comida calórica", f"{len(df_filtrado[df_filtrado['FAVC'] == 'no'])} pessoas")
-
-        df_temp5 = df_filtrado.copy()
-        df_temp5["Obesity"] = df_temp5["Obesity"].map(rotulos["obesidade_tradutor"])
-        df_temp5["Obesity"] = pd.Categorical(df_temp5["Obesity"], categories=ordem_obesidade, ordered=True)
-        df_temp5["CAEC"] = df_temp5["CAEC"].map(rotulos["caec_tradutor"])
-        df_temp5["FAVC"] = df_temp5["FAVC"].map(rotulos["favc_tradutor"])
-
-        col_caec, col_favc = st.columns(2)
-
-        with col_caec:
-            st.subheader("Obesidade por Frequência de Lanches Fora de Hora")
-            fig6, ax6 = plt.subplots()
-            crosstab5 = pd.crosstab(df_temp5["Obesity"], df_temp5["CAEC"])
-            crosstab5 = crosstab5.reindex(ordem_obesidade, fill_value=0)
-            crosstab5.plot(kind="bar", ax=ax6)
-            plt.xticks(rotation=45)
-            st.pyplot(fig6)
-
-        with col_favc:
-            st.subheader("Obesidade por Consumo de Comida Calórica")
-            fig7, ax7 = plt.subplots()
-            crosstab_favc = pd.crosstab(df_temp5["Obesity"], df_temp5["FAVC"])
-            crosstab_favc = crosstab_favc.reindex(ordem_obesidade, fill_value=0)
-            crosstab_favc.plot(kind="bar", ax=ax7)
-            plt.xticks(rotation=45)
-            st.pyplot(fig7)
-
-        with st.expander("📌 Ver Insight"):
-            st.markdown("""
-            - **Frequência alta de lanches fora de hora** (principalmente “Às vezes”, “Frequentemente” e “Sempre”) está fortemente associada a maiores níveis de obesidade, especialmente do tipo II e III.
-            - O **consumo de comida calórica** (FAVC = Sim) é predominante nas categorias de sobrepeso e obesidade — praticamente todos os casos graves de obesidade pertencem a esse grupo.
-            - Indivíduos que **não consomem comida calórica** apresentam maior proporção de “Peso Normal” ou “Abaixo do Peso”, e são minoria nas categorias de obesidade.
-            - A **combinação de ambos os comportamentos** (lanches fora de hora + consumo de comida calórica) marca o grupo de maior risco, com altíssimos números em obesidade severa.
-            - Estratégias de prevenção devem focar na **redução do consumo de lanches entre as refeições** e no **controle da qualidade dos alimentos**.
-            """)
+                with st.expander("📌 Ver Insight"):
+                    if df_filtrado["FAF"].dropna().empty:
+                        st.info("📌 Não existem dados disponíveis para gerar insights.")
+                    else:
+                        faf_mean = medias["FAF"]
+                        faf_median = agregados.quantil("FAF", 0.5, ids_graficos) if modo_grande else df_filtrado["FAF"].median()
 
+                        st.markdown(f"""
+                        ### 🏃 Análise de Atividade Física
+
+                        - O valor **médio** da frequência de atividade física semanal (FAF) é **{faf_mean:.2f}**, enquanto a **mediana** é **{faf_median:.2f}** — indicando uma **distribuição assimétrica**, com muitas pessoas relatando níveis baixos de atividade.
+                        - **Indivíduos com obesidade severa (tipo II e III)** tendem a praticar **menos atividade física** em comparação com os grupos de peso normal ou abaixo do peso.
+                        - O gráfico de proporção revela que, mesmo entre aqueles com **alta frequência de exercícios (FAF = 2 ou 3)**, ainda existem casos de **sobrepeso e obesidade**, o que pode indicar influência de **outros fatores como alimentação ou genética**.
+                        - Já os grupos com **FAF = 0** apresentam alta concentração de **obesidade tipo III**, reforçando a **associação entre sedentarismo e obesidade grave**.
+                
+                        """)
+                        st.caption("ℹ️ FAF representa a frequência de atividade física semanal (escala de 0 a 3).")
+
+
+        with aba5:
+            if aba5.open:
+                card_freq1, card_freq2, card_freq3 = st.columns(3)
+                caec_freq = resumo["n"] - contagem_caec.get("no", 0)
+                card_freq1.metric("Faz lanches fora de hora", f"{caec_freq} pessoas")
+                card_freq2.metric("Consome comida calórica", f"{contagem_favc.get('yes', 0)} pessoas")
+                card_freq3.metric("Não consome comida calórica", f"{contagem_favc.get('no', 0)} pessoas")
+
+                col_caec, col_favc = st.columns(2)
+
+                with col_caec:
+                    st.subheader("Obesidade por Frequência de Lanches Fora de Hora")
+                    pedir_grafico("obesidade_caec", filtros, "barras", lambda: (crosstab_obesidade("CAEC", filtros),))
+
+                with col_favc:
+                    st.subheader("Obesidade por Consumo de Comida Calórica")
+                    pedir_grafico("obesidade_favc", filtros, "barras", lambda: (crosstab_obesidade("FAVC", filtros),))
+
+                with st.expander("📌 Ver Insight"):
+                    st.markdown("""
+                    - **Frequência alta de lanches fora de hora** (principalmente “Às vezes”, “Frequentemente” e “Sempre”) está fortemente associada a maiores níveis de obesidade, especialmente do tipo II e III.
+                    - O **consumo de comida calórica** (FAVC = Sim) é predominante nas categorias de sobrepeso e obesidade — praticamente todos os casos graves de obesidade pertencem a esse grupo.
+                    - Indivíduos que **não consomem comida calórica** apresentam maior proporção de “Peso Normal” ou “Abaixo do Peso”, e são minoria nas categorias de obesidade.
+                    - A **combinação de ambos os comportamentos** (lanches fora de hora + consumo de comida calórica) marca o grupo de maior risco, com altíssimos números em obesidade severa.
+                    - Estratégias de prevenção devem focar na **redução do consumo de lanches entre as refeições** e no **controle da qualidade dos alimentos**.
+                    """)
+
+    entregar_graficos()
+
+    # Resumo das fases de partida, uma vez por processo
+    if cronometro.mark("execução completa"):
+        cronometro.log()
+finally:
+    observe("script_run", time.perf_counter() - inicio_execucao)
+    perfil.stop()
@@ -0,0 +1,97 @@
+"""Contribuição de cada feature para uma predição do GradientBoostingClassifier (caminho de Saabas).
+
+Em cada árvore, o valor da folha é o valor da raiz mais a soma das variações do valor do nó
+(tree_.value, a expectativa do nó) ao longo do caminho; cada variação é creditada à feature
+que decidiu aquele desvio. Somando todas as árvores de uma classe:
+
+    logit[classe] = bias[classe] + soma das contribuições[feature, classe]
+
+com igualdade exata (a mesma soma que decision_function faz, só que reagrupada).
+
+Na carga, o vetor de contribuições acumuladas da raiz até cada folha é pré-calculado uma
+vez, nível a nível, sobre os arrays achatados do motor (gb_inference.py). Explicar um lote
+vira: folhas alcançadas (engine.apply) + soma das linhas pré-calculadas dessas folhas.
+"""
+import numpy as np
+
+from modelo import DUMMY_COLS
+
+# Limite de (linhas x árvores) reunidos por bloco, para limitar a memória intermediária
+_BLOCK_ROWS_TREES = 1 << 15
+
+
+class TreeAttribution:
+    def __init__(self, engine, feature_names):
+        self.engine = engine
+        self.feature_names = list(feature_names)
+        self.classes_ = engine.classes_
+        n_nodes = len(engine.feature)
+        n_features = len(self.feature_names)
+        k = engine.n_trees_per_stage
+
+        # Pai e profundidade de cada nó (folhas apontam para si mesmas nos arrays do motor)
+        internal = np.flatnonzero(engine.left != np.arange(n_nodes))
+        parent = np.full(n_nodes, -1, dtype=np.int64)
+        parent[engine.left[internal]] = internal
+        parent[engine.right[internal]] = internal
+        depth = np.zeros(n_nodes, dtype=np.int32)
+        frontier = np.asarray(engine.roots, dtype=np.int64)
+        for d in range(1, engine.max_depth + 1):
+            frontier = frontier[np.isin(frontier, internal)]
+            frontier = np.concatenate([engine.left[frontier], engine.right[frontier]]).astype(np.int64)
+            depth[frontier] = d
+
+        # Contribuições acumuladas da raiz até cada nó, calculadas nível a nível
+        path = np.zeros((n_nodes, n_features), dtype=np.float64)
+        value = engine.value
+        for d in range(1, engine.max_depth + 1):
+            nodes = np.flatnonzero(depth == d)
+            pais = parent[nodes]
+            path[nodes] = path[pais]
+            path[nodes, engine.feature[pais]] += value[nodes] - value[pais]
+
+        # Só as folhas são alcançadas por apply(); uma linha por folha
+        leaves = np.setdiff1d(np.arange(n_nodes), internal)
+        self._leaf_row = np.full(n_nodes, -1, dtype=np.int64)
+        self._leaf_row[leaves] = np.arange(len(leaves))
+        self._leaf_contrib = path[leaves]
+
+        # Parte que não depende do paciente: prior + valor das raízes de cada classe
+        roots = np.asarray(engine.roots).reshape(engine.n_stages, k)
+        self.bias = engine.init_raw + value[roots].sum(axis=0)
+        # Classe de cada árvore: árvore t = estágio * k + classe
+        self._tree_class = np.tile(np.arange(k), engine.n_stages)
+
+        # Grupos de features por campo de entrada (dummies somados na coluna original)
+        self.input_names = []
+        self._input_of = np.empty(n_features, dtype=np.int64)
+        for i, name in enumerate(self.feature_names):
+            col = next((c for c in DUMMY_COLS if name.startswith(c + '_')), name)
+            if col not in self.input_names:
+                self.input_names.append(col)
+            self._input_of[i] = self.input_names.index(col)
+
+    # Contribuições (n_linhas, n_features, n_classes) do logit de cada classe
+    def contributions(self, X) -> np.ndarray:
+        leaves = self._leaf_row[self.engine.apply(X)]
+        n, k = len(leaves), len(self.bias)
+        out = np.zeros((n, len(self.feature_names), k), dtype=np.float64)
+        block = max(1, _BLOCK_ROWS_TREES // leaves.shape[1])
+        for c in range(k):
+            cols = leaves[:, self._tree_class == c]
+            for start in range(0, n, block):
+                out[start:start + block, :, c] = self._leaf_contrib[cols[start:start + block]].sum(axis=1)
+        return out
+
+    # Mesmas contribuições somadas por campo de entrada (CAEC_*, CALC_*, MTRANS_* viram um só)
+    def input_contributions(self, X) -> np.ndarray:
+        contrib = self.contributions(X)
+        out = np.zeros((len(contrib), len(self.input_names), contrib.shape[2]), dtype=np.float64)
+        np.add.at(out, (slice(None), self._input_of), contrib)
+        return out
+
+    # Uma linha: {campo: contribuição} para a classe de índice `klass`, da maior para a menor em módulo
+    def explain_one(self, x, klass: int) -> dict:
+        contrib = self.input_contributions(np.atleast_2d(x))[0, :, klass]
+        order = np.argsort(-np.abs(contrib), kind="stable")
+        return {self.input_names[i]: float(contrib[i]) for i in order}
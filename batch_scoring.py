@@ -0,0 +1,102 @@
+"""Escoragem em lote de arquivos CSV no esquema de data/Obesity.csv.
+
+Com --similar K, cada linha ganha a mistura de classes dos K registros mais parecidos da
+população de referência (similarity_index.py): similar_<classe> e a majoritária, similar_class.
+
+Uso:
+    python batch_scoring.py data/Obesity.csv -o predicoes.csv --chunksize 50000
+    python batch_scoring.py novos.csv -o predicoes.csv --similar 10
+"""
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from modelo import (
+    DATA_PATH, MODEL_PATH, ENCODER_PATH, FEATURES_PATH,
+    load_artifacts, translate_class
+)
+from feature_encoder import FeatureEncoder
+from gb_inference import FlatGradientBoosting
+
+
+# Escora um bloco de linhas com uma única passada vetorizada pelo ensemble
+def score_frame(
+    chunk: pd.DataFrame, engine, encoder, feature_encoder, height_cm: bool = False, similarity=None, k: int = 10
+) -> pd.DataFrame:
+    X = feature_encoder.encode_batch(chunk, height_cm=height_cm)
+    num_pred, proba = engine.predict_with_proba(X)
+    class_raw = encoder.inverse_transform(num_pred)
+    out = pd.DataFrame(index=chunk.index)
+    out['pred_class'] = class_raw
+    out['pred_label'] = [translate_class(c) for c in class_raw]
+    for i, c in enumerate(encoder.inverse_transform(engine.classes_)):
+        out[f'proba_{c}'] = proba[:, i]
+    if similarity is not None:
+        _, vizinhos = similarity.query_batch(chunk, k, height_cm=height_cm)
+        mix = similarity.class_mix(vizinhos)
+        out['similar_class'] = [similarity.class_labels[j] for j in mix.argmax(axis=1)]
+        for i, c in enumerate(similarity.class_labels):
+            out[f'similar_{c}'] = mix[:, i]
+    return out
+
+
+# Lê o CSV em blocos de tamanho fixo e grava as predições de forma incremental
+def score_csv(
+    path_in,
+    path_out,
+    model,
+    encoder,
+    feature_names,
+    chunksize: int = 50_000,
+    height_cm: bool = False,
+    keep_columns: bool = False,
+    similarity=None,
+    k: int = 10
+) -> int:
+    feature_encoder = FeatureEncoder(feature_names)
+    engine = FlatGradientBoosting(model)
+    total = 0
+    for i, chunk in enumerate(pd.read_csv(path_in, chunksize=chunksize)):
+        scored = score_frame(chunk, engine, encoder, feature_encoder, height_cm, similarity, k)
+        if keep_columns:
+            scored = pd.concat([chunk, scored], axis=1)
+        scored.to_csv(path_out, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        total += len(chunk)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Escoragem em lote do modelo Gradient Boosting")
+    parser.add_argument("input", help="CSV de entrada no esquema de data/Obesity.csv")
+    parser.add_argument("-o", "--output", required=True, help="CSV de saída com as predições")
+    parser.add_argument("--chunksize", type=int, default=50_000, help="linhas por bloco (limita a memória)")
+    parser.add_argument("--height-cm", action="store_true", help="altura de entrada em centímetros em vez de metros")
+    parser.add_argument("--keep-columns", action="store_true", help="copia as colunas de entrada para a saída")
+    parser.add_argument("--similar", type=int, default=0, metavar="K",
+                        help="acrescenta a mistura de classes dos K registros mais parecidos da referência")
+    parser.add_argument("--reference", default=DATA_PATH, help="população de referência para --similar")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--encoder", default=ENCODER_PATH)
+    parser.add_argument("--features", default=FEATURES_PATH)
+    args = parser.parse_args(argv)
+
+    model, encoder, feature_names = load_artifacts(args.model, args.encoder, args.features)
+    similarity = None
+    if args.similar > 0:
+        from dataset_cache import load_dataset
+        from similarity_index import SimilarityIndex
+        similarity = SimilarityIndex(load_dataset(args.reference), feature_names)
+    inicio = time.perf_counter()
+    total = score_csv(
+        args.input, args.output, model, encoder, feature_names,
+        chunksize=args.chunksize, height_cm=args.height_cm, keep_columns=args.keep_columns,
+        similarity=similarity, k=args.similar
+    )
+    dur = time.perf_counter() - inicio
+    print(f"✅ {total} linhas escoradas em {dur:.2f}s ({total / max(dur, 1e-9):,.0f} linhas/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
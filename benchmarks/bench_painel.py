@@ -0,0 +1,129 @@
+"""Benchmark dos gráficos linha a linha do painel analítico em função do número de linhas.
+
+Para cada tamanho, a base é ampliada com synthetic_data.synthesize a partir de
+data/Obesity.csv e cada gráfico (histograma de idade, boxplot de peso, dispersão altura x peso
+e histograma de FAF) é renderizado até PNG como no painel: pelo caminho seaborn sobre as
+linhas (até --max-linhas-seaborn) e pelo caminho agregado de graficos_agregados.py.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_painel --rows 2111,100000,1000000,3000000 --output bench_painel.json
+"""
+import argparse
+import json
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+from benchmarks.common import time_calls, summarize, machine_info, save_results
+from cache_graficos import renderizar_figura
+from dados_painel import DadosPainel
+from dataset_cache import load_dataset
+from graficos_agregados import AgregadosGraficos, desenhar_caixas, desenhar_dispersao, desenhar_histograma
+from modelo import DATA_PATH
+from synthetic_data import synthesize
+
+
+def graficos_seaborn(df, ordem):
+    def idade():
+        fig, ax = plt.subplots(figsize=(7, 4.5))
+        sns.histplot(data=df, x="Age", hue="Obesity", multiple="stack", ax=ax)
+        return renderizar_figura(fig)
+
+    def caixa_peso():
+        fig, ax = plt.subplots(figsize=(7, 4.5))
+        sns.boxplot(data=df, x="Obesity", y="Weight", order=ordem, ax=ax)
+        return renderizar_figura(fig)
+
+    def dispersao():
+        fig, ax = plt.subplots(figsize=(7, 4.5))
+        sns.scatterplot(data=df, x="Height", y="Weight", hue="Obesity", ax=ax)
+        return renderizar_figura(fig)
+
+    def faf():
+        fig, ax = plt.subplots(figsize=(7, 4.5))
+        sns.histplot(data=df, x="FAF", hue="Obesity", multiple="fill", palette="Set2",
+                     hue_order=ordem, edgecolor="black", binwidth=0.25, ax=ax)
+        return renderizar_figura(fig)
+
+    return {"idade": idade, "caixa_peso": caixa_peso, "dispersao": dispersao, "faf": faf}
+
+
+def graficos_agregados(dados, agregados, ordem):
+    def idade():
+        fig, ax = plt.subplots(figsize=(7, 4.5))
+        desenhar_histograma(ax, agregados.contagens("Age", "Obesity", fator=2),
+                            agregados.colunas["Age"].bordas(2), ordem, sns.color_palette())
+        return renderizar_figura(fig)
+
+    def caixa_peso():
+        fig, ax = plt.subplots(figsize=(7, 4.5))
+        desenhar_caixas(ax, agregados.caixas("Weight", "Obesity", ordem=ordem), sns.color_palette()[0])
+        return renderizar_figura(fig)
+
+    def dispersao():
+        fig, ax = plt.subplots(figsize=(7, 4.5))
+        grade, bx, by = agregados.densidade("Height", "Weight")
+        amostra = dados.visao(agregados.amostra("Obesity"), ["Height", "Weight", "Obesity"])
+        desenhar_dispersao(ax, grade, bx, by, amostra["Height"].to_numpy(), amostra["Weight"].to_numpy(),
+                           amostra["Obesity"].array.codes, ordem, sns.color_palette())
+        return renderizar_figura(fig)
+
+    def faf():
+        fig, ax = plt.subplots(figsize=(7, 4.5))
+        desenhar_histograma(ax, agregados.contagens("FAF", "Obesity", fator=5), agregados.colunas["FAF"].bordas(5),
+                            ordem, sns.color_palette("Set2"), multiple="fill", edgecolor="black")
+        return renderizar_figura(fig)
+
+    return {"idade": idade, "caixa_peso": caixa_peso, "dispersao": dispersao, "faf": faf}
+
+
+def bench_tamanho(base, rotulos, n: int, repeat: int, max_seaborn: int) -> dict:
+    df = base if n == len(base) else synthesize(n, base)
+    t0 = time.perf_counter()
+    dados = DadosPainel(df, rotulos)
+    t1 = time.perf_counter()
+    agregados = AgregadosGraficos(dados)
+    t2 = time.perf_counter()
+    ordem = dados.ordem_obesidade
+    out = {"dados_ms": (t1 - t0) * 1e3, "agregados_ms": (t2 - t1) * 1e3, "agregado": {}, "seaborn": {}}
+    for nome, fn in graficos_agregados(dados, agregados, ordem).items():
+        out["agregado"][nome] = summarize(time_calls(fn, repeat, warmup=1))
+    if n <= max_seaborn:
+        visao = dados.visao(None, ["Age", "Height", "Weight", "FAF", "Obesity"])
+        for nome, fn in graficos_seaborn(visao, ordem).items():
+            out["seaborn"][nome] = summarize(time_calls(fn, max(1, repeat // 3), warmup=1))
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos gráficos do painel por número de linhas")
+    parser.add_argument("--rows", default="2111,100000,1000000", help="tamanhos da base, separados por vírgula")
+    parser.add_argument("--repeat", type=int, default=5, help="renderizações por gráfico (agregado)")
+    parser.add_argument("--max-linhas-seaborn", type=int, default=200_000, help="maior base medida no caminho seaborn")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--output", default="bench_painel.json")
+    args = parser.parse_args(argv)
+
+    with open("rotulos_traduzidos.json", encoding="utf-8") as f:
+        rotulos = json.load(f)
+    base = load_dataset(args.data)
+    resultados = {"meta": machine_info(), "tamanhos": {}}
+    print(f"{'linhas':>10} {'gráfico':<12} {'agregado p50':>13} {'seaborn p50':>12}")
+    for n in [int(r) for r in args.rows.split(",") if r]:
+        r = bench_tamanho(base, rotulos, n, args.repeat, args.max_linhas_seaborn)
+        resultados["tamanhos"][str(n)] = r
+        for nome, s in r["agregado"].items():
+            sb = r["seaborn"].get(nome)
+            print(f"{n:>10,} {nome:<12} {s['p50_ms']:11.1f}ms "
+                  + (f"{sb['p50_ms']:10.1f}ms" if sb else f"{'-':>12}"))
+        print(f"{'':>10} (montagem: dados {r['dados_ms']:.0f}ms, agregados {r['agregados_ms']:.0f}ms)")
+
+    save_results(resultados, args.output)
+    print(f"\n💾 Resultados salvos em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Benchmark de replay de carga do caminho de predição de app.py.
+
+Reproduz payloads de um arquivo JSONL (uma linha por paciente, formato de sidebar_inputs())
+e completa com registros sintéticos no formato de data/Obesity.csv. Cada etapa é cronometrada
+separadamente, nos modos linha a linha e em lote, e o resultado é salvo em JSON.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_predicao --requests requests.jsonl --output antes.json
+    python -m benchmarks.bench_predicao --output depois.json --compare antes.json
+"""
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+
+from modelo import (
+    MODEL_PATH, ENCODER_PATH, FEATURES_PATH,
+    load_artifacts, preprocess_data, decode_label, translate_class
+)
+from feature_encoder import FeatureEncoder
+from gb_inference import FlatGradientBoosting
+from synthetic_data import synthesize, to_payloads
+from benchmarks.common import time_calls, summarize, read_payloads, machine_info, save_results, compare
+
+
+def bench_load(paths, repeat: int) -> dict:
+    model, encoder, feature_names = load_artifacts(*paths)
+    return {
+        "load_model_and_encoders": summarize(time_calls(lambda: load_artifacts(*paths), repeat, warmup=1)),
+        "feature_encoder_build": summarize(time_calls(lambda: FeatureEncoder(feature_names), repeat)),
+        "inference_engine_build": summarize(time_calls(lambda: FlatGradientBoosting(model), repeat, warmup=1)),
+    }
+
+
+def bench_single(payloads, model, encoder, feature_names) -> dict:
+    feature_encoder = FeatureEncoder(feature_names)
+    engine = FlatGradientBoosting(model)
+    stages = {k: [] for k in (
+        "preprocess_data", "feature_encoder", "sklearn_predict+predict_proba",
+        "engine_predict_with_proba", "decode_label", "end_to_end_baseline", "end_to_end_current"
+    )}
+    clock = time.perf_counter
+    for p in payloads:
+        t0 = clock()
+        X_df = preprocess_data(pd.DataFrame([p]), feature_names)
+        t1 = clock()
+        num_pred = model.predict(X_df)[0]
+        model.predict_proba(X_df)
+        t2 = clock()
+        translate_class(decode_label(num_pred, encoder))
+        t3 = clock()
+        X = feature_encoder.encode_one(p)
+        t4 = clock()
+        labels, _ = engine.predict_with_proba(X)
+        t5 = clock()
+        translate_class(decode_label(labels[0], encoder))
+        t6 = clock()
+        stages["preprocess_data"].append(t1 - t0)
+        stages["sklearn_predict+predict_proba"].append(t2 - t1)
+        stages["decode_label"].append(t3 - t2)
+        stages["end_to_end_baseline"].append(t3 - t0)
+        stages["feature_encoder"].append(t4 - t3)
+        stages["engine_predict_with_proba"].append(t5 - t4)
+        stages["end_to_end_current"].append(t6 - t3)
+    return {k: summarize(v) for k, v in stages.items()}
+
+
+def bench_batch(df: pd.DataFrame, sizes, repeat: int, model, encoder, feature_names) -> dict:
+    feature_encoder = FeatureEncoder(feature_names)
+    engine = FlatGradientBoosting(model)
+    results = {}
+    for size in sizes:
+        chunk = df.iloc[:size]
+        X_df = preprocess_data(chunk, feature_names, height_cm=False)
+        X = feature_encoder.encode_batch(chunk, height_cm=False)
+        labels, _ = engine.predict_with_proba(X)
+
+        def decode():
+            return [translate_class(c) for c in encoder.inverse_transform(labels)]
+
+        def sklearn_both():
+            model.predict(X_df)
+            model.predict_proba(X_df)
+
+        r = max(3, min(repeat, 200_000 // size))
+        results[str(size)] = {
+            "preprocess_data": summarize(time_calls(lambda: preprocess_data(chunk, feature_names, height_cm=False), r), size),
+            "feature_encoder": summarize(time_calls(lambda: feature_encoder.encode_batch(chunk, height_cm=False), r), size),
+            "sklearn_predict+predict_proba": summarize(time_calls(sklearn_both, r), size),
+            "engine_predict_with_proba": summarize(time_calls(lambda: engine.predict_with_proba(X), r), size),
+            "decode_label": summarize(time_calls(decode, r), size),
+        }
+    return results
+
+
+def print_table(title: str, stats: dict):
+    print(f"\n{title}")
+    for stage, s in stats.items():
+        print(f"  {stage:<32} p50 {s['p50_ms']:9.3f}ms  p95 {s['p95_ms']:9.3f}ms  "
+              f"p99 {s['p99_ms']:9.3f}ms  {s['rows_per_s']:12,.0f} linhas/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do caminho de predição")
+    parser.add_argument("--requests", default="requests.jsonl", help="JSONL com payloads de 16 campos")
+    parser.add_argument("--synthetic", type=int, default=2000, help="payloads sintéticos para completar o replay")
+    parser.add_argument("--batch-sizes", default="64,1024,16384")
+    parser.add_argument("--repeat", type=int, default=30, help="repetições por tamanho de lote")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_predicao.json")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--encoder", default=ENCODER_PATH)
+    parser.add_argument("--features", default=FEATURES_PATH)
+    args = parser.parse_args(argv)
+
+    paths = (args.model, args.encoder, args.features)
+    model, encoder, feature_names = load_artifacts(*paths)
+    sizes = [int(s) for s in args.batch_sizes.split(",") if s]
+
+    replayed = read_payloads(args.requests) if os.path.exists(args.requests) else []
+    synthetic = synthesize(max(args.synthetic, max(sizes)), seed=args.seed)
+    payloads = replayed + to_payloads(synthetic.iloc[:args.synthetic])
+    print(f"Payloads: {len(replayed)} do replay + {len(payloads) - len(replayed)} sintéticos")
+
+    results = {
+        "meta": dict(machine_info(), replayed=len(replayed), single_rows=len(payloads), batch_sizes=sizes),
+        "load": bench_load(paths, repeat=5),
+        "single": bench_single(payloads, model, encoder, feature_names),
+        "batch": bench_batch(synthetic, sizes, args.repeat, model, encoder, feature_names),
+    }
+
+    print_table("Carga", results["load"])
+    print_table("Linha a linha", results["single"])
+    for size, stats in results["batch"].items():
+        print_table(f"Lote de {size}", stats)
+
+    save_results(results, args.output)
+    print(f"\n💾 Resultados salvos em {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print(f"\nComparação com {args.compare}:")
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
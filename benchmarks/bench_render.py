@@ -0,0 +1,137 @@
+"""Benchmark da renderização dos gráficos de cada aba do painel: serial x pool de threads x processos.
+
+Para cada aba, todas as figuras (figuras_painel.py, com os dados preparados como em
+app_analitico.py para os filtros padrão) são renderizadas até PNG, sem cache, e mede-se o
+tempo total da aba em cada modo de render_paralelo.py. A referência é o gráfico mais lento
+da aba (limite inferior do tempo em paralelo) e a soma de todos (tempo serial).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_render --workers 1,2,4 --output bench_render.json
+    python -m benchmarks.bench_render --rows 1000000   # modo de bases grandes
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import wait
+
+import pandas as pd
+
+from benchmarks.common import machine_info, save_results
+from cache_graficos import CacheGraficos
+from dados_painel import DadosPainel
+from dataset_cache import load_dataset
+from graficos_agregados import AgregadosGraficos
+from modelo import DATA_PATH
+from render_paralelo import RenderizadorGraficos, renderizar_tarefa
+from synthetic_data import synthesize
+
+
+def _crosstab(visao, coluna, dados, ordem):
+    tabela = pd.crosstab(visao["Obesity"], dados.tabela[coluna].map(dados.rotulos[coluna]).astype(str))
+    return tabela.sort_index(axis=1).reindex(ordem, fill_value=0)
+
+
+# (figura, args, opcoes) de cada gráfico, por aba, como em app_analitico.py sem filtros
+def tarefas_por_aba(dados, agregados=None) -> dict:
+    ordem = dados.ordem_obesidade
+    df = dados.visao(None, ["Gender", "Age", "Height", "Weight", "family_history", "FAF", "Obesity"])
+    barras = lambda col, **op: ("barras", (_crosstab(df, col, dados, ordem),), op)
+    if agregados is None:
+        caixa = lambda col: ("caixas", (df[["Obesity", col]], "Obesity", col, ordem), {"rotacao": 45, "tight_layout": {}})
+        abas = {
+            "demografia": [barras("Gender", figsize=(7, 4.5), tight_layout={}),
+                           ("histograma_idade", (df[["Age", "Obesity"]],), {})],
+            "historico": [barras("family_history", figsize=(6, 4.2), tight_layout={"pad": 1.5}),
+                          ("caixas", (df[["family_history", "Weight"]], "family_history", "Weight"),
+                           {"figsize": (6, 4.2), "tight_layout": {"pad": 1.5}})],
+            "altura_peso": [("dispersao", (df[["Height", "Weight", "Obesity"]],), {}), caixa("Weight"), caixa("Height")],
+            "atividade": [caixa("FAF"), ("proporcao_faf", (df[["FAF", "Obesity"]], ordem), {})],
+        }
+    else:
+        caixa = lambda col, grupo="Obesity", **op: (
+            "caixas_agregadas", (agregados.caixas(col, grupo, ordem=ordem if grupo == "Obesity" else None), grupo, col), op
+        )
+        grade, bx, by = agregados.densidade("Height", "Weight")
+        amostra = dados.visao(agregados.amostra("Obesity"), ["Height", "Weight", "Obesity"])
+        abas = {
+            "demografia": [barras("Gender", figsize=(7, 4.5), tight_layout={}),
+                           ("histograma_idade_agregado", (agregados.contagens("Age", "Obesity", fator=2),
+                                                          agregados.colunas["Age"].bordas(2), ordem), {})],
+            "historico": [barras("family_history", figsize=(6, 4.2), tight_layout={"pad": 1.5}),
+                          caixa("Weight", "family_history", figsize=(6, 4.2), tight_layout={"pad": 1.5})],
+            "altura_peso": [("dispersao_agregada", (grade, bx, by, amostra["Height"].to_numpy(), amostra["Weight"].to_numpy(),
+                                                    amostra["Obesity"].array.codes, ordem), {}),
+                            caixa("Weight", rotacao=45, tight_layout={}), caixa("Height", rotacao=45, tight_layout={})],
+            "atividade": [caixa("FAF", rotacao=45, tight_layout={}),
+                          ("proporcao_faf_agregada", (agregados.contagens("FAF", "Obesity", fator=5),
+                                                      agregados.colunas["FAF"].bordas(5), ordem), {})],
+        }
+    abas["alimentar"] = [barras("CAEC"), barras("FAVC")]
+    abas["todas"] = [t for nome in list(abas) for t in abas[nome]]
+    return abas
+
+
+# Tempo de parede para renderizar todas as tarefas (submetidas juntas) no renderizador
+def tempo_pagina(renderizador, tarefas) -> float:
+    inicio = time.perf_counter()
+    if renderizador.executor is None:
+        for figura, args, opcoes in tarefas:
+            renderizar_tarefa(figura, args, opcoes)
+    else:
+        wait([renderizador.executor.submit(renderizar_tarefa, f, a, o) for f, a, o in tarefas])
+    return time.perf_counter() - inicio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de renderização dos gráficos por aba")
+    parser.add_argument("--rows", type=int, help="amplia a base com registros sintéticos (modo de bases grandes)")
+    parser.add_argument("--workers", default="1,2,4", help="tamanhos de pool, separados por vírgula")
+    parser.add_argument("--modes", default="thread,process")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--output", default="bench_render.json")
+    args = parser.parse_args(argv)
+
+    with open("rotulos_traduzidos.json", encoding="utf-8") as f:
+        rotulos = json.load(f)
+    base = load_dataset(args.data)
+    dados = DadosPainel(synthesize(args.rows, base) if args.rows else base, rotulos)
+    abas = tarefas_por_aba(dados, AgregadosGraficos(dados) if args.rows else None)
+
+    serial = RenderizadorGraficos(CacheGraficos(), modo="serial")
+    tempo_pagina(serial, abas["todas"])  # aquece imports e caches de fontes
+    individuais = {}
+    for nome, tarefas in abas.items():
+        individuais[nome] = [statistics.median(tempo_pagina(serial, [t]) for _ in range(args.repeat)) for t in tarefas]
+
+    configuracoes = [("serial", 1)] + [
+        (modo, int(w)) for modo in args.modes.split(",") if modo for w in args.workers.split(",") if w
+    ]
+    resultados = {"meta": dict(machine_info(), linhas=dados.n, cpus=os.cpu_count()), "abas": {}}
+    for modo, workers in configuracoes:
+        renderizador = serial if modo == "serial" else RenderizadorGraficos(CacheGraficos(), workers, modo)
+        tempo_pagina(renderizador, abas["todas"])  # sobe e aquece o pool
+        for nome, tarefas in abas.items():
+            total = statistics.median(tempo_pagina(renderizador, tarefas) for _ in range(args.repeat))
+            resultados["abas"].setdefault(nome, {
+                "graficos": len(tarefas),
+                "mais_lento_ms": max(individuais[nome]) * 1e3,
+                "soma_ms": sum(individuais[nome]) * 1e3,
+            })[f"{modo}x{workers}_ms"] = total * 1e3
+        renderizador.encerrar()
+
+    colunas = [f"{m}x{w}" for m, w in configuracoes]
+    print(f"{dados.n:,} linhas, {os.cpu_count()} CPU(s)")
+    print(f"{'aba':<12} {'n':>2} {'mais lento':>11} {'soma':>9} " + " ".join(f"{c:>11}" for c in colunas))
+    for nome, r in resultados["abas"].items():
+        print(f"{nome:<12} {r['graficos']:>2} {r['mais_lento_ms']:9.0f}ms {r['soma_ms']:7.0f}ms "
+              + " ".join(f"{r[c + '_ms']:9.0f}ms" for c in colunas))
+
+    save_results(resultados, args.output)
+    print(f"\n💾 Resultados salvos em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
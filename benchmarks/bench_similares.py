@@ -0,0 +1,83 @@
+"""Benchmark do índice de pacientes semelhantes (similarity_index.py) em função do tamanho da população.
+
+Para cada tamanho, a base é ampliada com synthetic_data.synthesize a partir de
+data/Obesity.csv. Mede-se a montagem do índice, a latência de uma consulta (um paciente,
+como no app) e a vazão em lote (como na escoragem em lote), comparando com um KDTree único
+sobre as 26 colunas padronizadas (até --max-linhas-arvore-unica). Os vizinhos de uma amostra
+de consultas são conferidos contra a força bruta.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_similares --rows 2111,100000,1000000 --output bench_similares.json
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import time_calls, summarize, machine_info, save_results
+from dataset_cache import load_dataset
+from modelo import DATA_PATH
+from similarity_index import SimilarityIndex
+from synthetic_data import synthesize
+
+
+def bench_tamanho(base, n: int, k: int, repeat: int, lote: int, max_arvore_unica: int) -> dict:
+    from sklearn.neighbors import KDTree, NearestNeighbors
+
+    df = base if n == len(base) else synthesize(n, base)
+    consultas = synthesize(max(lote, repeat), base, seed=7)
+    t0 = time.perf_counter()
+    indice = SimilarityIndex(df)
+    out = {"montagem_s": time.perf_counter() - t0, "grupos": len(indice.sizes), "arvores": len(indice.trees)}
+
+    X = indice.encode(consultas, height_cm=False)
+    linhas = iter(range(10 ** 9))
+    out["uma"] = summarize(time_calls(lambda: indice.query(X[next(linhas) % len(X)], k), repeat))
+    out["lote"] = summarize(time_calls(lambda: indice.query(X[:lote], k), 5, warmup=1), rows_per_call=lote)
+
+    # Conferência: mesmas distâncias que a força bruta no espaço padronizado completo
+    Z = (indice.encode(df, height_cm=False) - indice.mean) / indice.scale
+    amostra = (X[:200] - indice.mean) / indice.scale
+    exatas, _ = NearestNeighbors(n_neighbors=k, algorithm="brute").fit(Z).kneighbors(amostra)
+    out["erro_max_distancia"] = float(np.abs(indice.query(X[:200], k)[0] - exatas).max())
+
+    if n <= max_arvore_unica:
+        t0 = time.perf_counter()
+        arvore = KDTree(Z)
+        out["arvore_unica_montagem_s"] = time.perf_counter() - t0
+        Zq = (X - indice.mean) / indice.scale
+        linhas = iter(range(10 ** 9))
+        out["arvore_unica_uma"] = summarize(
+            time_calls(lambda: arvore.query(Zq[next(linhas) % len(Zq)][None], k=k), repeat)
+        )
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do índice de pacientes semelhantes")
+    parser.add_argument("--rows", default="2111,100000,1000000", help="tamanhos da população, separados por vírgula")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=500, help="consultas de um paciente por tamanho")
+    parser.add_argument("--batch", type=int, default=10_000, help="linhas por consulta em lote")
+    parser.add_argument("--max-linhas-arvore-unica", type=int, default=200_000)
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--output", default="bench_similares.json")
+    args = parser.parse_args(argv)
+
+    base = load_dataset(args.data)
+    resultados = {"meta": machine_info(), "k": args.k, "tamanhos": {}}
+    print(f"{'linhas':>10} {'montagem':>9} {'grupos':>6} {'uma p50':>9} {'uma p99':>9} "
+          f"{'lote linhas/s':>14} {'árvore única p50':>17} {'erro máx':>9}")
+    for n in [int(r) for r in args.rows.split(",") if r]:
+        r = bench_tamanho(base, n, args.k, args.repeat, args.batch, args.max_linhas_arvore_unica)
+        resultados["tamanhos"][str(n)] = r
+        unica = f"{r['arvore_unica_uma']['p50_ms']:15.3f}ms" if "arvore_unica_uma" in r else f"{'-':>17}"
+        print(f"{n:>10,} {r['montagem_s']:8.2f}s {r['grupos']:>6} {r['uma']['p50_ms']:7.3f}ms "
+              f"{r['uma']['p99_ms']:7.3f}ms {r['lote']['rows_per_s']:14,.0f} {unica} {r['erro_max_distancia']:9.1e}")
+
+    save_results(resultados, args.output)
+    print(f"\n💾 Resultados salvos em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
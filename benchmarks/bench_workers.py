@@ -0,0 +1,131 @@
+"""Benchmark de vazão e memória do serviço de escoragem com N workers.
+
+Compara, para cada N:
+- supervisor: `python supervisor.py score --workers N` (modelo carregado uma vez, workers por fork);
+- independentes: N processos `python scoring_service.py`, um por porta, cada um com a sua carga.
+
+A carga vem de processos clientes com conexões keep-alive (POST /predict de um paciente por
+requisição, payloads sintéticos). A memória é a soma de RSS e de PSS (/proc/<pid>/smaps_rollup,
+páginas compartilhadas divididas entre os processos que as mapeiam) de todos os processos do
+serviço, medida depois da carga. Só Linux.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_workers --workers 1,2,4 --seconds 10 --output bench_workers.json
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import machine_info, save_results
+from dataset_cache import load_dataset
+from synthetic_data import synthesize, to_payloads
+
+
+def _memoria(pid: int) -> dict:
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for linha in f:
+            campo, _, valor = linha.partition(":")
+            if campo in ("Rss", "Pss"):
+                out[campo.lower() + "_mb"] = int(valor.split()[0]) / 1024
+    return out
+
+
+def _filhos(pid: int) -> list:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def _esperar(porta: int, limite: float = 60.0):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", porta, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"serviço na porta {porta} não respondeu")
+
+
+# Cliente: requisições de um paciente em sequência, numa conexão keep-alive, por `segundos`
+def _cliente(porta: int, corpos: list, segundos: float, fila):
+    conn = http.client.HTTPConnection("127.0.0.1", porta)
+    n, fim = 0, time.monotonic() + segundos
+    while time.monotonic() < fim:
+        conn.request("POST", "/predict", corpos[n % len(corpos)], {"Content-Type": "application/json"})
+        conn.getresponse().read()
+        n += 1
+    fila.put(n)
+
+
+def medir(comandos: list, portas: list, clientes: int, segundos: float, corpos: list) -> dict:
+    procs = [subprocess.Popen(c, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) for c in comandos]
+    try:
+        for porta in portas:
+            _esperar(porta)
+        time.sleep(1.0)  # workers do supervisor terminando de subir
+        fila = multiprocessing.Queue()
+        cs = [multiprocessing.Process(target=_cliente, args=(portas[j % len(portas)], corpos, segundos, fila))
+              for j in range(clientes)]
+        for c in cs:
+            c.start()
+        total = sum(fila.get() for _ in cs)
+        for c in cs:
+            c.join()
+        pids = [p.pid for p in procs]
+        pids += [f for p in procs for f in _filhos(p.pid)]
+        memorias = [_memoria(pid) for pid in pids]
+        return {
+            "processos": len(pids),
+            "req_s": total / segundos,
+            "rss_mb": sum(m["rss_mb"] for m in memorias),
+            "pss_mb": sum(m["pss_mb"] for m in memorias),
+        }
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait(timeout=30)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vazão e memória do serviço de escoragem com N workers")
+    parser.add_argument("--workers", default="1,2,4", help="números de workers, separados por vírgula")
+    parser.add_argument("--clients", type=int, default=0, help="processos clientes (padrão: 2 por worker)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--output", default="bench_workers.json")
+    args = parser.parse_args(argv)
+
+    corpos = [json.dumps(p).encode() for p in to_payloads(synthesize(1000, load_dataset(), seed=11))]
+    resultados = {"meta": dict(machine_info(), cpus=os.cpu_count()), "workers": {}}
+    print(f"{os.cpu_count()} CPU(s)")
+    print(f"{'N':>3} {'modo':<14} {'proc':>4} {'req/s':>8} {'RSS total':>10} {'PSS total':>10}")
+    for n in [int(w) for w in args.workers.split(",") if w]:
+        clientes = args.clients or 2 * n
+        supervisor = [[sys.executable, "supervisor.py", "--workers", str(n), "score", "--port", str(args.port)]]
+        independentes = [[sys.executable, "scoring_service.py", "--port", str(args.port + i)] for i in range(n)]
+        r = {
+            "supervisor": medir(supervisor, [args.port], clientes, args.seconds, corpos),
+            "independentes": medir(independentes, [args.port + i for i in range(n)], clientes, args.seconds, corpos),
+        }
+        resultados["workers"][str(n)] = r
+        for modo, m in r.items():
+            print(f"{n:>3} {modo:<14} {m['processos']:>4} {m['req_s']:8.0f} {m['rss_mb']:8.0f}MB {m['pss_mb']:8.0f}MB")
+
+    save_results(resultados, args.output)
+    print(f"\n💾 Resultados salvos em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
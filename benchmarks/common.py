@@ -0,0 +1,87 @@
+"""Utilitários compartilhados pelos benchmarks: cronometragem, percentis e gravação em JSON."""
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from modelo import INPUT_COLS
+
+
+# Executa fn repetidamente e devolve as durações em segundos
+def time_calls(fn, repeat: int, warmup: int = 3) -> np.ndarray:
+    for _ in range(warmup):
+        fn()
+    out = np.empty(repeat)
+    for i in range(repeat):
+        t = time.perf_counter()
+        fn()
+        out[i] = time.perf_counter() - t
+    return out
+
+
+# Resumo de latência (ms) e vazão para um conjunto de medições
+def summarize(durations, rows_per_call: int = 1) -> dict:
+    d = np.asarray(durations, dtype=np.float64)
+    return {
+        "n": int(len(d)),
+        "mean_ms": float(d.mean() * 1e3),
+        "p50_ms": float(np.percentile(d, 50) * 1e3),
+        "p95_ms": float(np.percentile(d, 95) * 1e3),
+        "p99_ms": float(np.percentile(d, 99) * 1e3),
+        "rows_per_s": float(rows_per_call * len(d) / d.sum()) if d.sum() > 0 else 0.0,
+    }
+
+
+# Lê payloads de 16 campos de um arquivo JSONL; linhas que não são payloads são ignoradas
+def read_payloads(path) -> list:
+    payloads = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            for key in ("inputs", "payload"):
+                if isinstance(obj, dict) and isinstance(obj.get(key), dict):
+                    obj = obj[key]
+            if isinstance(obj, dict) and all(c in obj for c in INPUT_COLS):
+                payloads.append({c: obj[c] for c in INPUT_COLS})
+    return payloads
+
+
+def machine_info() -> dict:
+    import pandas as pd
+    import sklearn
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def save_results(results: dict, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+# Compara p50 e vazão de duas execuções com a mesma estrutura de resultados
+def compare(old: dict, new: dict, prefix: str = ""):
+    for key, value in new.items():
+        if not isinstance(value, dict) or key == "meta":
+            continue
+        if "p50_ms" in value and key in old and "p50_ms" in old[key]:
+            before, after = old[key]["p50_ms"], value["p50_ms"]
+            ratio = before / after if after else float("inf")
+            print(f"{prefix}{key:<40} p50 {before:9.3f}ms -> {after:9.3f}ms  ({ratio:5.2f}x)")
+        elif key in old:
+            compare(old[key], value, prefix + key + "/")
@@ -0,0 +1,100 @@
+"""Cache de gráficos renderizados do painel analítico (app_analitico.py).
+
+Cada gráfico é guardado já renderizado (bytes PNG ou SVG), indexado por
+(id do gráfico, hash do estado dos filtros). Um acerto custa uma cópia de bytes em vez de
+uma passada completa do matplotlib/seaborn. O total de bytes é limitado: ao passar do
+limite, os gráficos usados há mais tempo são descartados primeiro.
+"""
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+
+# Mesmas opções que st.pyplot usa ao salvar a figura, para a imagem sair idêntica
+SAVEFIG_PADRAO = {"bbox_inches": "tight", "dpi": 200}
+
+
+# Hash estável do estado (dicts, listas, tuplas e números dos filtros)
+def hash_estado(estado) -> str:
+    texto = json.dumps(estado, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.blake2b(texto.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# Figuras do pyplot são fechadas depois; as da API orientada a objetos (figuras_painel.py) não
+# estão registradas no pyplot e são só descartadas
+def renderizar_figura(fig, formato: str = "png", **savefig) -> bytes:
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format=formato, **{**SAVEFIG_PADRAO, **savefig})
+    finally:
+        if getattr(fig.canvas, "manager", None) is not None:
+            import matplotlib.pyplot as plt
+            plt.close(fig)
+    return buffer.getvalue()
+
+
+class CacheGraficos:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, formato: str = "png"):
+        if max_bytes < 1:
+            raise ValueError("max_bytes deve ser >= 1")
+        if formato not in ("png", "svg"):
+            raise ValueError(f"Formato não suportado: {formato!r} (aceitos: ['png', 'svg'])")
+        self.max_bytes = max_bytes
+        self.formato = formato
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def obter(self, chave):
+        with self._lock:
+            dados = self._data.get(chave)
+            if dados is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(chave)
+            self.hits += 1
+            return dados
+
+    def guardar(self, chave, dados: bytes) -> bytes:
+        # Um gráfico maior que o limite inteiro não é guardado
+        if len(dados) > self.max_bytes:
+            return dados
+        with self._lock:
+            antigo = self._data.pop(chave, None)
+            if antigo is not None:
+                self.bytes -= len(antigo)
+            self._data[chave] = dados
+            self.bytes += len(dados)
+            while self.bytes > self.max_bytes:
+                _, removido = self._data.popitem(last=False)
+                self.bytes -= len(removido)
+                self.evictions += 1
+        return dados
+
+    # desenhar() -> Figure; executado (fora do lock) só quando o gráfico não está no cache
+    def renderizar(self, id_grafico: str, estado, desenhar) -> bytes:
+        chave = (id_grafico, hash_estado(estado))
+        dados = self.obter(chave)
+        if dados is None:
+            dados = self.guardar(chave, renderizar_figura(desenhar(), self.formato))
+        return dados
+
+    def limpar(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "itens": len(self._data),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
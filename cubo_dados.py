@@ -0,0 +1,267 @@
+"""Cubo de agregação pré-computado para os crosstabs e cards do painel analítico.
+
+Cada célula do cubo é uma combinação de Obesity x Gender x family_history x CAEC x FAVC
+com Age, Height e Weight discretizados em faixas. Para cada célula são guardados a
+contagem, as somas e as somas de quadrados das medidas (idade, altura, peso, FAF, IMC e
+os indicadores de sedentarismo/atividade). Crosstabs, distribuições e métricas são
+respondidos somando células.
+
+As faixas numéricas dos sliders raramente caem exatamente nas bordas das faixas do cubo.
+As faixas totalmente cobertas vêm do cubo; as linhas das faixas parcialmente cobertas
+(no máximo duas por coluna) vêm do índice ordenado de IndiceFiltros, então o resultado é
+exato e igual ao da máscara sobre as linhas.
+"""
+import numpy as np
+import pandas as pd
+
+from filtro_indexado import IndiceFiltros
+
+DIMENSOES = ["Obesity", "Gender", "family_history", "CAEC", "FAVC"]
+BINAGENS = {"Age": 1.0, "Height": 0.01, "Weight": 1.0}
+MEDIDAS = ["Age", "Height", "Weight", "FAF", "IMC", "FAF_0", "FAF_2"]
+
+# Empacotamento da chave da célula em um int64
+_BITS_CAT = 4
+_BITS_BIN = 14
+_DESLOC_BIN = 1 << (_BITS_BIN - 1)
+
+
+def calcular_medidas(df: pd.DataFrame) -> np.ndarray:
+    faf = df["FAF"].to_numpy(dtype=np.float64)
+    return np.column_stack([
+        df["Age"].to_numpy(dtype=np.float64),
+        df["Height"].to_numpy(dtype=np.float64),
+        df["Weight"].to_numpy(dtype=np.float64),
+        faf,
+        df["Weight"].to_numpy(dtype=np.float64) / df["Height"].to_numpy(dtype=np.float64) ** 2,
+        (faf == 0).astype(np.float64),
+        (faf >= 2).astype(np.float64),
+    ])
+
+
+# Soma cada coluna de `pesos` por grupo; sempre float64, mesmo sem linhas
+def _somar_por_grupo(grupos, pesos, n_grupos) -> np.ndarray:
+    somas = np.zeros((n_grupos, pesos.shape[1]))
+    for j in range(pesos.shape[1]):
+        somas[:, j] = np.bincount(grupos, pesos[:, j], n_grupos)
+    return somas
+
+
+class Binagem:
+    def __init__(self, largura: float, origem: float = 0.0):
+        self.largura = largura
+        self.origem = origem
+
+    def borda(self, k):
+        return np.round(self.origem + np.asarray(k) * self.largura, 9)
+
+    # Faixa k cobre [borda(k), borda(k + 1)); a correção evita erros de arredondamento
+    def faixa(self, valores) -> np.ndarray:
+        v = np.asarray(valores, dtype=np.float64)
+        k = np.floor((v - self.origem) / self.largura).astype(np.int64)
+        k -= v < self.borda(k)
+        k += v >= self.borda(k + 1)
+        return k
+
+
+class CuboDados:
+    def __init__(self, df: pd.DataFrame, indice: IndiceFiltros = None, dimensoes=DIMENSOES, binagens=BINAGENS):
+        self.indice = indice if indice is not None else IndiceFiltros(df)
+        self.dimensoes = list(dimensoes)
+        self.numericas = list(binagens)
+        self.binagens = {col: Binagem(w) for col, w in binagens.items()}
+        self.n_medidas = len(MEDIDAS)
+
+        # Dimensões que o índice já codifica compartilham os mesmos códigos por linha
+        self.categorias = {}
+        self._codigos_proprios = {}
+        for d in self.dimensoes:
+            if d in self.indice.codigos:
+                self.categorias[d] = self.indice.categorias[d]
+            else:
+                codigos, categorias = pd.factorize(df[d], sort=True)
+                self.categorias[d] = list(categorias)
+                self._codigos_proprios[d] = codigos.astype(np.int16)
+        self.medidas_linha = calcular_medidas(df)
+        self.n = len(df)
+
+        self._pos = {}
+        self.chaves = np.empty(0, dtype=np.int64)
+        self.contagem = np.empty(0, dtype=np.int64)
+        self.somas = np.empty((0, self.n_medidas))
+        self.quadrados = np.empty((0, self.n_medidas))
+        self._agregar(np.arange(self.n))
+
+    def _codigos(self, d, ids) -> np.ndarray:
+        if d in self._codigos_proprios:
+            return self._codigos_proprios[d][ids]
+        return self.indice.codigos[d][ids]
+
+    def _chave(self, ids) -> np.ndarray:
+        chave = np.zeros(len(ids), dtype=np.int64)
+        desloc = 0
+        for d in self.dimensoes:
+            if len(self.categorias[d]) > (1 << _BITS_CAT):
+                raise ValueError(f"Dimensão {d} tem categorias demais para o cubo")
+            codigos = self._codigos(d, ids).astype(np.int64)
+            # Código -1 (valor ausente) invadiria os campos vizinhos da chave
+            if len(codigos) and codigos.min() < 0:
+                raise ValueError(f"Dimensão {d} tem valores ausentes; o cubo não os representa")
+            chave |= codigos << desloc
+            desloc += _BITS_CAT
+        for col in self.numericas:
+            valores = self.indice.valores[col][ids]
+            with np.errstate(invalid="ignore"):
+                faixa = self.binagens[col].faixa(valores) + _DESLOC_BIN
+            # Faixas fora dos _BITS_BIN bits (ou NaN) corromperiam os campos vizinhos da chave
+            fora = (faixa < 0) | (faixa >= (1 << _BITS_BIN)) | np.isnan(valores)
+            if fora.any():
+                b = self.binagens[col]
+                raise ValueError(
+                    f"Coluna {col}: {int(fora.sum())} valor(es) fora do intervalo do cubo "
+                    f"[{b.borda(-_DESLOC_BIN)}, {b.borda(_DESLOC_BIN)}) ou ausentes (ex.: {valores[fora][0]})"
+                )
+            chave |= faixa << desloc
+            desloc += _BITS_BIN
+        return chave
+
+    # Código de uma dimensão (categórica ou faixa numérica) em cada célula
+    def _codigo_celula(self, d) -> np.ndarray:
+        if d in self.categorias:
+            desloc = _BITS_CAT * self.dimensoes.index(d)
+            return (self.chaves >> desloc) & ((1 << _BITS_CAT) - 1)
+        desloc = _BITS_CAT * len(self.dimensoes) + _BITS_BIN * self.numericas.index(d)
+        return ((self.chaves >> desloc) & ((1 << _BITS_BIN) - 1)) - _DESLOC_BIN
+
+    # Soma as linhas dadas nas células do cubo (novas células são criadas no fim)
+    def _agregar(self, ids):
+        chaves, inv = np.unique(self._chave(ids), return_inverse=True)
+        contagem = np.bincount(inv, minlength=len(chaves))
+        medidas = self.medidas_linha[ids]
+        somas = _somar_por_grupo(inv, medidas, len(chaves))
+        quadrados = _somar_por_grupo(inv, medidas ** 2, len(chaves))
+
+        pos = np.fromiter((self._pos.get(k, -1) for k in chaves.tolist()), dtype=np.intp, count=len(chaves))
+        existentes = pos >= 0
+        self.contagem[pos[existentes]] += contagem[existentes]
+        self.somas[pos[existentes]] += somas[existentes]
+        self.quadrados[pos[existentes]] += quadrados[existentes]
+
+        novas = ~existentes
+        inicio = len(self.chaves)
+        self._pos.update(zip(chaves[novas].tolist(), range(inicio, inicio + int(novas.sum()))))
+        self.chaves = np.concatenate([self.chaves, chaves[novas]])
+        self.contagem = np.concatenate([self.contagem, contagem[novas]])
+        self.somas = np.concatenate([self.somas, somas[novas]])
+        self.quadrados = np.concatenate([self.quadrados, quadrados[novas]])
+
+    # Atualização incremental: só as linhas novas são agregadas
+    def acrescentar(self, df_novo: pd.DataFrame):
+        self.indice.acrescentar(df_novo)
+        for d, codigos in self._codigos_proprios.items():
+            categorias = self.categorias[d]
+            for v in pd.unique(df_novo[d].to_numpy()):
+                if v not in categorias:
+                    categorias.append(v)
+            novos = pd.Index(categorias).get_indexer(df_novo[d].to_numpy()).astype(np.int16)
+            self._codigos_proprios[d] = np.concatenate([codigos, novos])
+        self.medidas_linha = np.concatenate([self.medidas_linha, calcular_medidas(df_novo)])
+        ids = np.arange(self.n, self.n + len(df_novo))
+        self.n += len(df_novo)
+        self._agregar(ids)
+
+    def _permitidas(self, d, selecionadas) -> np.ndarray:
+        return np.isin(np.asarray(self.categorias[d], dtype=object), list(selecionadas))
+
+    # Agrega (contagem, somas, quadrados) por `por`, aplicando os filtros
+    def agregar(self, por=(), categorias: dict = None, intervalos: dict = None):
+        categorias = categorias or {}
+        intervalos = intervalos or {}
+        mascara = np.ones(len(self.chaves), dtype=bool)
+        for d, selecionadas in categorias.items():
+            mascara &= self._permitidas(d, selecionadas)[self._codigo_celula(d)]
+
+        bordas = []
+        for col, (lo, hi) in intervalos.items():
+            ordenados = self.indice.ordenados[col]
+            binagem = self.binagens[col]
+            b_lo, b_hi = (int(b) for b in binagem.faixa([lo, hi]))
+            # Uma faixa é parcial se pode conter linhas fora de [lo, hi]
+            cheio_lo = b_lo if (lo <= ordenados[0] or binagem.borda(b_lo) >= lo) else b_lo + 1
+            cheio_hi = b_hi if hi >= ordenados[-1] else b_hi - 1
+            codigo = self._codigo_celula(col)
+            mascara &= (codigo >= cheio_lo) & (codigo <= cheio_hi)
+            if cheio_lo > cheio_hi:
+                bordas.append(self.indice.linhas_no_intervalo(col, lo, hi))
+                continue
+            if cheio_lo > b_lo:
+                fim = np.nextafter(binagem.borda(b_lo + 1), -np.inf)
+                bordas.append(self.indice.linhas_no_intervalo(col, lo, fim))
+            if cheio_hi < b_hi:
+                bordas.append(self.indice.linhas_no_intervalo(col, binagem.borda(b_hi), hi))
+
+        tamanhos = [len(self.categorias[d]) for d in por]
+        n_grupos = int(np.prod(tamanhos)) if por else 1
+
+        # Índice do grupo em ordem row-major sobre as dimensões de `por`
+        def grupo(codigos, n):
+            g = np.zeros(n, dtype=np.intp)
+            for c, t in zip(codigos, tamanhos):
+                g = g * t + c
+            return g
+
+        # Parte do cubo: células totalmente dentro dos filtros
+        g = grupo([self._codigo_celula(d)[mascara] for d in por], int(mascara.sum()))
+        contagem = np.bincount(g, self.contagem[mascara], n_grupos).astype(np.float64)
+        somas = _somar_por_grupo(g, self.somas[mascara], n_grupos)
+        quadrados = _somar_por_grupo(g, self.quadrados[mascara], n_grupos)
+
+        # Parte das bordas: linhas em faixas parcialmente cobertas, filtradas exatamente
+        if bordas:
+            ids = np.unique(np.concatenate(bordas))
+            cat_indice = {d: v for d, v in categorias.items() if d in self.indice.codigos}
+            ids = self.indice.filtrar(ids, cat_indice, intervalos)
+            for d, selecionadas in categorias.items():
+                if d in self._codigos_proprios:
+                    ids = ids[self._permitidas(d, selecionadas)[self._codigos_proprios[d][ids]]]
+            g = grupo([self._codigos(d, ids) for d in por], len(ids))
+            medidas = self.medidas_linha[ids]
+            contagem += np.bincount(g, minlength=n_grupos)
+            somas += _somar_por_grupo(g, medidas, n_grupos)
+            quadrados += _somar_por_grupo(g, medidas ** 2, n_grupos)
+
+        forma = tamanhos or []
+        return (
+            contagem.round().astype(np.int64).reshape(forma),
+            somas.reshape(forma + [self.n_medidas]),
+            quadrados.reshape(forma + [self.n_medidas]),
+        )
+
+    # Contagem por categoria, como value_counts()
+    def contar(self, d, **filtros) -> pd.Series:
+        contagem, _, _ = self.agregar((d,), **filtros)
+        return pd.Series(contagem, index=pd.Index(self.categorias[d], name=d), name="count")
+
+    # Equivalente a pd.crosstab(df[linha], df[coluna]) sobre as linhas filtradas
+    def crosstab(self, linha, coluna, **filtros) -> pd.DataFrame:
+        contagem, _, _ = self.agregar((linha, coluna), **filtros)
+        tabela = pd.DataFrame(
+            contagem,
+            index=pd.Index(self.categorias[linha], name=linha),
+            columns=pd.Index(self.categorias[coluna], name=coluna),
+        )
+        tabela = tabela.loc[tabela.sum(axis=1) > 0, tabela.sum(axis=0) > 0]
+        return tabela.sort_index().sort_index(axis=1)
+
+    # Total, médias, desvios e proporções das medidas sobre as linhas filtradas
+    def resumo(self, **filtros) -> dict:
+        contagem, somas, quadrados = self.agregar((), **filtros)
+        n = int(contagem)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            media = somas / n
+            var = (quadrados - somas ** 2 / n) / (n - 1)
+        return {
+            "n": n,
+            "media": dict(zip(MEDIDAS, media.tolist())),
+            "desvio": dict(zip(MEDIDAS, np.sqrt(np.maximum(var, 0)).tolist())),
+        }
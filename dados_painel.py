@@ -0,0 +1,118 @@
+"""Modelo de dados do painel analítico, montado e traduzido uma única vez na carga.
+
+- Colunas de texto viram pd.Categorical (códigos inteiros compactos), com as categorias na
+  ordem em que aparecem no CSV, a mesma que pandas/seaborn usavam nas colunas de texto.
+  Colunas que já chegam categóricas (cache colunar de dataset_cache.py) são usadas sem cópia.
+- Os rótulos em português de rotulos_traduzidos.json e a ordem de ordem_obesidade ficam como
+  metadados. A coluna Obesity traduzida é montada remapeando códigos, sem .map de strings.
+- Colunas numéricas são reduzidas (int8/16/32 ou float32) só quando a conversão é exata, para
+  não mexer nos limites dos sliders nem nas médias.
+
+As visões para os gráficos são montadas por take dos códigos/arrays, sem copy() + map() por aba.
+"""
+import numpy as np
+import pandas as pd
+
+ORDEM_OBESIDADE = [
+    "Abaixo do Peso", "Peso Normal", "Sobrepeso I",
+    "Sobrepeso II", "Obesidade I", "Obesidade II", "Obesidade III"
+]
+
+# Coluna -> chave do dicionário de rótulos em rotulos_traduzidos.json
+TRADUTORES = {
+    "Gender": "genero_tradutor",
+    "family_history": "historico_tradutor",
+    "FAVC": "favc_tradutor",
+    "CAEC": "caec_tradutor",
+    "Obesity": "obesidade_tradutor",
+}
+
+
+# Menor dtype que representa a coluna sem perda; a própria série se nenhum servir
+def reduzir_numerica(serie: pd.Series) -> pd.Series:
+    valores = serie.to_numpy()
+    if valores.dtype.kind == "f" and np.isnan(valores).any():
+        candidatos = [np.float32]
+    elif valores.dtype.kind in "iuf":
+        candidatos = [np.int8, np.int16, np.int32, np.float32]
+    else:
+        return serie
+    for dtype in candidatos:
+        if np.dtype(dtype).itemsize >= valores.dtype.itemsize:
+            break
+        reduzido = valores.astype(dtype)
+        if np.array_equal(reduzido.astype(valores.dtype), valores, equal_nan=valores.dtype.kind == "f"):
+            return pd.Series(reduzido, index=serie.index, name=serie.name)
+    return serie
+
+
+def _bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+class DadosPainel:
+    def __init__(self, df: pd.DataFrame, rotulos: dict, ordem_obesidade=ORDEM_OBESIDADE):
+        self.n = len(df)
+        self.bytes_original = _bytes(df)
+
+        colunas = {}
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                colunas[col] = df[col].array
+            elif pd.api.types.is_numeric_dtype(df[col]):
+                colunas[col] = reduzir_numerica(df[col])
+            else:
+                codigos, categorias = pd.factorize(df[col])
+                colunas[col] = pd.Categorical.from_codes(codigos, categories=categorias)
+        self.tabela = pd.DataFrame(colunas, copy=False)
+
+        self.rotulos = {col: dict(rotulos[chave]) for col, chave in TRADUTORES.items() if chave in rotulos}
+        self.ordem_obesidade = list(ordem_obesidade)
+
+        # Obesity traduzida: cada código original aponta para a posição em ordem_obesidade
+        obesidade = self.tabela["Obesity"].cat
+        mapa = np.array(
+            [self.ordem_obesidade.index(self.rotulos["Obesity"][c]) for c in obesidade.categories],
+            dtype=obesidade.codes.dtype,
+        )
+        codigos = obesidade.codes.to_numpy()
+        self.obesidade_traduzida = pd.Categorical.from_codes(
+            np.where(codigos >= 0, mapa[codigos], -1),
+            dtype=pd.CategoricalDtype(self.ordem_obesidade, ordered=True),
+        )
+
+    def memoria(self) -> dict:
+        return {
+            "linhas": self.n,
+            "bytes_original": self.bytes_original,
+            "bytes_compacto": _bytes(self.tabela) + int(self.obesidade_traduzida.nbytes),
+            "dtypes": {col: str(dtype) for col, dtype in self.tabela.dtypes.items()},
+        }
+
+    # Linhas dadas (todas se ids for None) com Obesity já traduzida, só com as colunas pedidas
+    def visao(self, ids=None, colunas=None) -> pd.DataFrame:
+        dados = {}
+        for col in (colunas or self.tabela.columns):
+            if col == "Obesity":
+                valores = self.obesidade_traduzida
+            elif isinstance(self.tabela[col].dtype, pd.CategoricalDtype):
+                valores = self.tabela[col].array
+            else:
+                valores = self.tabela[col].to_numpy()
+            if ids is not None:
+                valores = valores.take(ids)
+                # Categorias ausentes no recorte não devem virar eixos vazios nos gráficos
+                if col != "Obesity" and isinstance(valores, pd.Categorical):
+                    valores = valores.remove_unused_categories()
+            dados[col] = valores
+        return pd.DataFrame(dados, copy=False)
+
+
+# Base do painel pelo cache colunar; linhas > 0 amplia com registros sintéticos (synthetic_data.py)
+def montar_dados(caminho: str, rotulos: dict, linhas: int = 0) -> DadosPainel:
+    from dataset_cache import load_dataset
+    base = load_dataset(caminho)
+    if linhas:
+        from synthetic_data import synthesize
+        base = synthesize(linhas, base)
+    return DadosPainel(base, rotulos)
@@ -0,0 +1,206 @@
+"""Cache colunar do dataset, compartilhado por app.py, app_analitico.py e seus workers.
+
+O CSV é convertido uma única vez em colunas binárias tipadas (.npy), abertas com
+np.load(mmap_mode="r"): a carga não analisa texto e todos os processos leem a mesma cópia
+do page cache do sistema operacional.
+
+- colunas numéricas: um .npy com o dtype inferido pelo pandas;
+- colunas de texto: um .npy de códigos (int8/int16/int32) + categorias no manifest.json,
+  na ordem em que aparecem no CSV. Abrem como pd.Categorical sem copiar os códigos.
+
+A validade é dada pelo CSV de origem: (mtime, tamanho) é o teste rápido e o SHA-256 do
+conteúdo identifica a versão. Um CSV só tocado (mesmo hash) reaproveita o cache; um CSV
+alterado gera um diretório novo, publicado de forma atômica (os.replace), então processos
+concorrentes nunca veem um cache pela metade.
+
+Uso (pré-aquecer o cache no deploy):
+    python dataset_cache.py data/Obesity.csv
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from modelo import DATA_PATH
+
+DATASET_CACHE_DIR = os.path.join("data", ".cache")
+SCHEMA_VERSION = 1
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _codes_dtype(n_categories: int):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _write_json(path: str, data: dict):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Lê o CSV em blocos: ({coluna: [arrays]}, vocabulários das categóricas, None), ou, se uma
+# coluna tida como numérica vier com texto num bloco, (None, None, nome da coluna)
+def _ler_blocos(path: str, chunksize: int, nomes, numericas: set):
+    dtypes = {c: str for c in nomes if c not in numericas}
+    partes = {c: [] for c in nomes}
+    vocabularios = {c: {} for c in nomes if c not in numericas}
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype=dtypes):
+        for col in chunk.columns:
+            if col in numericas:
+                if not pd.api.types.is_numeric_dtype(chunk[col]):
+                    return None, None, col
+                partes[col].append(chunk[col].to_numpy())
+                continue
+            vocab = vocabularios[col]
+            codigos, uniques = pd.factorize(chunk[col])
+            for v in uniques:
+                vocab.setdefault(v, len(vocab))
+            lookup = np.array([vocab[v] for v in uniques] + [-1], dtype=np.int64)
+            partes[col].append(lookup[codigos])
+    return partes, vocabularios, None
+
+
+# Converte o CSV em colunas .npy dentro de `destino`, lendo em blocos de `chunksize` linhas.
+# O tipo de cada coluna numérica só é fixado depois da passada inteira (int + float ou NaN em
+# blocos posteriores -> float64); uma coluna que deixa de ser numérica num bloco posterior
+# vira categórica e a leitura recomeça.
+def _build(path: str, destino: str, chunksize: int) -> list:
+    amostra = pd.read_csv(path, nrows=chunksize)
+    numericas = {c for c in amostra.columns if pd.api.types.is_numeric_dtype(amostra[c])}
+    while True:
+        partes, vocabularios, texto = _ler_blocos(path, chunksize, amostra.columns, numericas)
+        if texto is None:
+            break
+        numericas.discard(texto)
+
+    colunas = []
+    for i, col in enumerate(amostra.columns):
+        arquivo = f"{i:03d}.npy"
+        if col in numericas:
+            valores = np.concatenate(partes.pop(col))
+            colunas.append({"nome": col, "tipo": "numerica", "dtype": valores.dtype.str, "arquivo": arquivo})
+        else:
+            categorias = list(vocabularios[col])
+            valores = np.concatenate(partes.pop(col)).astype(_codes_dtype(len(categorias)))
+            colunas.append({"nome": col, "tipo": "categorica", "dtype": valores.dtype.str,
+                            "arquivo": arquivo, "categorias": categorias})
+        np.save(os.path.join(destino, arquivo), valores)
+    return colunas
+
+
+# Garante o cache atual do CSV e devolve o diretório da versão válida
+def ensure_dataset_cache(path: str = DATA_PATH, cache_dir: str = DATASET_CACHE_DIR, chunksize: int = 500_000) -> str:
+    stat = os.stat(path)
+    origem = os.path.abspath(path)
+    # Nome do CSV + hash do caminho absoluto: CSVs homônimos em pastas diferentes não colidem
+    nome = os.path.splitext(os.path.basename(path))[0]
+    chave = f"{nome}-{hashlib.sha256(origem.encode()).hexdigest()[:8]}"
+    indice_path = os.path.join(cache_dir, f"{chave}.json")
+
+    # Caminho rápido: mesmo (mtime, tamanho) da última validação
+    indice = _read_json(indice_path)
+    if indice and indice.get("mtime_ns") == stat.st_mtime_ns and indice.get("size") == stat.st_size:
+        versao = os.path.join(cache_dir, indice["versao"])
+        if os.path.exists(os.path.join(versao, "manifest.json")):
+            return versao
+
+    sha = file_sha256(path)
+    nome_versao = f"{chave}-{sha[:16]}"
+    versao = os.path.join(cache_dir, nome_versao)
+    if not os.path.exists(os.path.join(versao, "manifest.json")):
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=f".{nome_versao}-", dir=cache_dir)
+        try:
+            colunas = _build(path, tmp, chunksize)
+            n = int(np.load(os.path.join(tmp, colunas[0]["arquivo"]), mmap_mode="r").shape[0]) if colunas else 0
+            _write_json(os.path.join(tmp, "manifest.json"), {
+                "schema_version": SCHEMA_VERSION,
+                "source": origem,
+                "sha256": sha,
+                "linhas": n,
+                "colunas": colunas,
+            })
+            # mkdtemp cria 0700; a versão publicada é lida por processos de outros usuários
+            os.chmod(tmp, 0o755)
+            os.replace(tmp, versao)
+        except OSError:
+            # Outro processo publicou a mesma versão primeiro
+            if not os.path.exists(os.path.join(versao, "manifest.json")):
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        # Versões antigas do mesmo CSV; processos que ainda as mapeiam seguem válidos
+        for entrada in os.listdir(cache_dir):
+            if not entrada.startswith(f"{chave}-") or entrada == nome_versao:
+                continue
+            manifest = _read_json(os.path.join(cache_dir, entrada, "manifest.json"))
+            if manifest is not None and manifest.get("source") == origem:
+                shutil.rmtree(os.path.join(cache_dir, entrada), ignore_errors=True)
+
+    _write_json(indice_path, {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": sha, "versao": nome_versao})
+    return versao
+
+
+# Abre uma versão do cache: colunas como memmaps somente leitura, sem cópia
+def open_dataset(versao: str) -> pd.DataFrame:
+    manifest = _read_json(os.path.join(versao, "manifest.json"))
+    if manifest is None or manifest.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"Cache de dataset inválido em {versao}")
+    dados = {}
+    for col in manifest["colunas"]:
+        valores = np.load(os.path.join(versao, col["arquivo"]), mmap_mode="r")
+        if col["tipo"] == "categorica":
+            dtype = pd.CategoricalDtype(pd.Index(col["categorias"], dtype=object))
+            dados[col["nome"]] = pd.Categorical.from_codes(valores, dtype=dtype, validate=False)
+        else:
+            dados[col["nome"]] = pd.Series(valores, copy=False)
+    return pd.DataFrame(dados, copy=False)
+
+
+def load_dataset(path: str = DATA_PATH, cache_dir: str = DATASET_CACHE_DIR) -> pd.DataFrame:
+    return open_dataset(ensure_dataset_cache(path, cache_dir))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera/valida o cache colunar do dataset")
+    parser.add_argument("input", nargs="?", default=DATA_PATH)
+    parser.add_argument("--cache-dir", default=DATASET_CACHE_DIR)
+    parser.add_argument("--chunksize", type=int, default=500_000)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    versao = ensure_dataset_cache(args.input, args.cache_dir, args.chunksize)
+    t1 = time.perf_counter()
+    df = open_dataset(versao)
+    t2 = time.perf_counter()
+    print(f"✅ Cache em {versao}: {len(df)} linhas, {df.shape[1]} colunas "
+          f"(validação {1e3 * (t1 - t0):.1f}ms, abertura {1e3 * (t2 - t1):.1f}ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""Monitor de drift em fluxo: compara os pacientes escorados com a população de treino.
+
+A referência (data/Obesity.csv) é resumida uma vez em sketches de tamanho fixo:
+
+- features numéricas (as de population_index.py, mais o IMC): proporções em bins pelos
+  decis da referência (para o PSI) e CDF em bins pelos percentis (para o KS);
+- campos categóricos (CAEC, CALC, MTRANS e os binários): frequência de cada categoria;
+- classe: distribuição dos rótulos de treino, comparada com a das classes previstas.
+
+Cada evento incrementa só contadores desses mesmos bins (uma busca binária por feature),
+então memória e custo por evento são constantes, não importa quantos eventos passem.
+PSI e KS saem dos contadores a qualquer momento; o KS é o da CDF discretizada nos percentis.
+
+Os eventos vêm do app (DRIFT_LOG grava um JSONL com {"ts", "inputs", "class"}) ou de
+qualquer log no formato de requests.jsonl (payload de 16 campos, solto ou em "inputs" /
+"payload"); sem a classe no log, --score escora os blocos com o bundle ativo.
+
+Uso:
+    python drift_monitor.py reference -o models/drift_reference.json
+    python drift_monitor.py report logs/*.jsonl --window 100000 --output drift.json
+    python drift_monitor.py report requests.jsonl --score
+    DRIFT_LOG=logs/app.jsonl streamlit run app.py
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from modelo import BIN_MAP, DATA_PATH, DUMMY_COLS, INPUT_COLS
+from population_index import PERCENTILE_FEATURES
+
+NUMERIC_FEATURES = PERCENTILE_FEATURES + ["BMI"]
+CATEGORICAL_FEATURES = list(BIN_MAP) + DUMMY_COLS
+CLASS_KEY = "class"
+# Categoria fora do vocabulário da referência
+OTHER = "__outra__"
+# Proporção mínima nos logaritmos do PSI (bins vazios)
+EPS = 1e-4
+# Faixas usuais do PSI: < 0.1 estável, 0.1-0.25 moderado, > 0.25 significativo
+PSI_MODERATE, PSI_SIGNIFICANT = 0.1, 0.25
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    e = np.maximum(expected, EPS)
+    a = np.maximum(actual, EPS)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def status(value: float) -> str:
+    if value is None or np.isnan(value):
+        return "sem dados"
+    return "significativo" if value > PSI_SIGNIFICANT else "moderado" if value > PSI_MODERATE else "estável"
+
+
+# Bordas internas pelos quantis da referência; bin = searchsorted(bordas, x, "right")
+def _edges(values: np.ndarray, n_bins: int) -> np.ndarray:
+    return np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+
+
+# Índice de cada valor no vocabulário (o último, OTHER, para valores desconhecidos), por valor distinto
+def _lookup(values, index: dict) -> np.ndarray:
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object).astype(str))
+    return np.array([index.get(u, len(index) - 1) for u in uniques], dtype=np.int64)[codes]
+
+
+def _proportions(counts: np.ndarray) -> np.ndarray:
+    total = counts.sum()
+    return counts / total if total else np.zeros(len(counts))
+
+
+class DriftReference:
+    """Bordas e proporções da população de referência; serializável em JSON."""
+
+    def __init__(self, numeric: dict, categorical: dict, classes: dict, n: int):
+        self.numeric = {
+            f: {k: np.asarray(v, dtype=np.float64) for k, v in spec.items()} for f, spec in numeric.items()
+        }
+        self.categorical = {
+            f: {"categories": list(spec["categories"]), "ref": np.asarray(spec["ref"], dtype=np.float64)}
+            for f, spec in categorical.items()
+        }
+        self.classes = {"categories": list(classes["categories"]), "ref": np.asarray(classes["ref"], dtype=np.float64)}
+        self.n = n
+
+    # Referência a partir do dataset de treino (Height em metros no CSV, em cm nos eventos)
+    @classmethod
+    def from_frame(cls, df, psi_bins: int = 10, ks_bins: int = 100, class_col: str = "Obesity"):
+        cols = {c: df[c].to_numpy(dtype=np.float64) for c in PERCENTILE_FEATURES}
+        cols["BMI"] = cols["Weight"] / cols["Height"] ** 2
+        cols["Height"] = cols["Height"] * 100
+        numeric = {}
+        for f in NUMERIC_FEATURES:
+            v = cols[f]
+            psi_edges, ks_edges = _edges(v, psi_bins), _edges(v, ks_bins)
+            numeric[f] = {
+                "psi_edges": psi_edges,
+                "psi_ref": _proportions(np.bincount(np.searchsorted(psi_edges, v, "right"), minlength=len(psi_edges) + 1)),
+                "ks_edges": ks_edges,
+                "ks_cdf": np.cumsum(_proportions(np.bincount(np.searchsorted(ks_edges, v, "right"), minlength=len(ks_edges) + 1))),
+            }
+        categorical = {}
+        for f in CATEGORICAL_FEATURES:
+            cats, counts = np.unique(np.asarray(df[f], dtype=object).astype(str), return_counts=True)
+            categorical[f] = {"categories": list(cats) + [OTHER], "ref": _proportions(np.append(counts, 0))}
+        cats, counts = np.unique(np.asarray(df[class_col], dtype=object).astype(str), return_counts=True)
+        classes = {"categories": list(cats) + [OTHER], "ref": _proportions(np.append(counts, 0))}
+        return cls(numeric, categorical, classes, len(df))
+
+    @classmethod
+    def from_csv(cls, path: str = DATA_PATH, **kwargs):
+        from dataset_cache import load_dataset
+        return cls.from_frame(load_dataset(path), **kwargs)
+
+    def to_dict(self) -> dict:
+        return {
+            "n": self.n,
+            "numeric": {f: {k: v.tolist() for k, v in spec.items()} for f, spec in self.numeric.items()},
+            "categorical": {f: {"categories": s["categories"], "ref": s["ref"].tolist()} for f, s in self.categorical.items()},
+            "classes": {"categories": self.classes["categories"], "ref": self.classes["ref"].tolist()},
+        }
+
+    def save(self, path: str):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, encoding="utf-8") as f:
+            d = json.load(f)
+        return cls(d["numeric"], d["categorical"], d["classes"], d["n"])
+
+
+class DriftMonitor:
+    """Contadores de tamanho fixo sobre os bins da referência; seguro entre threads."""
+
+    def __init__(self, reference: DriftReference):
+        self.reference = reference
+        self._lock = threading.Lock()
+        self._index = {
+            f: {c: i for i, c in enumerate(s["categories"])} for f, s in reference.categorical.items()
+        }
+        self._class_index = {c: i for i, c in enumerate(reference.classes["categories"])}
+        self.reset()
+
+    def reset(self):
+        ref = self.reference
+        with self._lock:
+            self.events = 0
+            self.classified = 0
+            self._psi_counts = {f: np.zeros(len(s["psi_ref"]), dtype=np.int64) for f, s in ref.numeric.items()}
+            self._ks_counts = {f: np.zeros(len(s["ks_cdf"]), dtype=np.int64) for f, s in ref.numeric.items()}
+            self._cat_counts = {f: np.zeros(len(s["ref"]), dtype=np.int64) for f, s in ref.categorical.items()}
+            self._class_counts = np.zeros(len(ref.classes["ref"]), dtype=np.int64)
+
+    # Um evento: inputs no formato de sidebar_inputs() (altura em cm) e a classe prevista
+    def update(self, inputs: dict, predicted: str = None):
+        ref = self.reference
+        values = {f: float(inputs[f]) for f in PERCENTILE_FEATURES}
+        values["BMI"] = values["Weight"] / (values["Height"] / 100) ** 2
+        with self._lock:
+            self.events += 1
+            for f, v in values.items():
+                spec = ref.numeric[f]
+                self._psi_counts[f][np.searchsorted(spec["psi_edges"], v, "right")] += 1
+                self._ks_counts[f][np.searchsorted(spec["ks_edges"], v, "right")] += 1
+            for f, idx in self._index.items():
+                self._cat_counts[f][idx.get(str(inputs[f]), len(idx) - 1)] += 1
+            if predicted is not None:
+                self.classified += 1
+                self._class_counts[self._class_index.get(str(predicted), len(self._class_index) - 1)] += 1
+
+    # Um bloco de eventos: {campo: sequência} (altura em cm) e as classes previstas
+    def update_many(self, columns: dict, predicted=None):
+        ref = self.reference
+        values = {f: np.asarray(columns[f], dtype=np.float64) for f in PERCENTILE_FEATURES}
+        values["BMI"] = values["Weight"] / (values["Height"] / 100) ** 2
+        n = len(values["Age"])
+        psi_bins = {
+            f: np.bincount(np.searchsorted(s["psi_edges"], values[f], "right"), minlength=len(s["psi_ref"]))
+            for f, s in ref.numeric.items()
+        }
+        ks_bins = {
+            f: np.bincount(np.searchsorted(s["ks_edges"], values[f], "right"), minlength=len(s["ks_cdf"]))
+            for f, s in ref.numeric.items()
+        }
+        cat_bins = {f: np.bincount(_lookup(columns[f], idx), minlength=len(idx)) for f, idx in self._index.items()}
+        class_bins = None
+        if predicted is not None:
+            codes = _lookup([c for c in predicted if c is not None], self._class_index)
+            class_bins = (len(codes), np.bincount(codes, minlength=len(self._class_index)))
+        with self._lock:
+            self.events += n
+            for f in psi_bins:
+                self._psi_counts[f] += psi_bins[f]
+                self._ks_counts[f] += ks_bins[f]
+            for f in cat_bins:
+                self._cat_counts[f] += cat_bins[f]
+            if class_bins is not None:
+                self.classified += class_bins[0]
+                self._class_counts += class_bins[1]
+
+    # PSI (e KS, nas numéricas) de cada feature e da classe prevista contra a referência
+    def report(self) -> dict:
+        ref = self.reference
+        with self._lock:
+            psi_counts = {f: c.copy() for f, c in self._psi_counts.items()}
+            ks_counts = {f: c.copy() for f, c in self._ks_counts.items()}
+            cat_counts = {f: c.copy() for f, c in self._cat_counts.items()}
+            class_counts = self._class_counts.copy()
+            events, classified = self.events, self.classified
+
+        features = {}
+        for f, spec in ref.numeric.items():
+            if not events:
+                features[f] = {"psi": float("nan"), "ks": float("nan"), "status": status(None)}
+                continue
+            value = psi(spec["psi_ref"], _proportions(psi_counts[f]))
+            ks = float(np.max(np.abs(np.cumsum(_proportions(ks_counts[f])) - spec["ks_cdf"])))
+            features[f] = {"psi": value, "ks": ks, "status": status(value)}
+        for f, spec in ref.categorical.items():
+            value = psi(spec["ref"], _proportions(cat_counts[f])) if events else float("nan")
+            features[f] = {
+                "psi": value, "status": status(value),
+                "frequencies": dict(zip(spec["categories"], _proportions(cat_counts[f]).tolist())),
+            }
+        cats = ref.classes["categories"]
+        value = psi(ref.classes["ref"], _proportions(class_counts)) if classified else float("nan")
+        classes = {
+            "psi": value, "status": status(value),
+            "reference": dict(zip(cats, ref.classes["ref"].tolist())),
+            "observed": dict(zip(cats, _proportions(class_counts).tolist())),
+        }
+        return {"events": events, "classified": classified, "features": features, "classes": classes}
+
+    # Resumo numérico para instrumentation.register_stats
+    def stats(self) -> dict:
+        rep = self.report()
+        valores = [v["psi"] for v in rep["features"].values() if not np.isnan(v["psi"])]
+        ks = [v["ks"] for v in rep["features"].values() if "ks" in v and not np.isnan(v["ks"])]
+        return {
+            "events": rep["events"],
+            "psi_max": max(valores, default=0.0),
+            "ks_max": max(ks, default=0.0),
+            "features_drifted": sum(v > PSI_SIGNIFICANT for v in valores),
+            "class_psi": 0.0 if np.isnan(rep["classes"]["psi"]) else rep["classes"]["psi"],
+        }
+
+
+# Acrescenta um evento escorado ao log JSONL (uma linha por evento, uma escrita por linha)
+def append_event(path: str, inputs: dict, predicted: str):
+    line = json.dumps({"ts": time.time(), "inputs": inputs, CLASS_KEY: predicted}, ensure_ascii=False) + "\n"
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+
+
+# Lê logs JSONL em blocos de `chunk` eventos: (colunas, classes previstas ou None por evento)
+def read_events(paths, chunk: int = 50_000):
+    columns = {c: [] for c in INPUT_COLS}
+    predicted = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(obj, dict):
+                    continue
+                klass = obj.get(CLASS_KEY)
+                for key in ("inputs", "payload"):
+                    if isinstance(obj.get(key), dict):
+                        obj = obj[key]
+                if not all(c in obj for c in INPUT_COLS):
+                    continue
+                for c in INPUT_COLS:
+                    columns[c].append(obj[c])
+                predicted.append(klass)
+                if len(predicted) >= chunk:
+                    yield columns, predicted
+                    columns = {c: [] for c in INPUT_COLS}
+                    predicted = []
+    if predicted:
+        yield columns, predicted
+
+
+# Classes previstas de um bloco pelo bundle ativo (altura em cm, como no app)
+def _score(bundle, columns: dict) -> list:
+    X = bundle.feature_encoder.encode_batch(pd.DataFrame(columns), height_cm=True)
+    return list(bundle.encoder.inverse_transform(bundle.engine.predict(X)))
+
+
+def _print_line(prefix: str, rep: dict):
+    piores = sorted(
+        ((f, v["psi"]) for f, v in rep["features"].items() if not np.isnan(v["psi"])), key=lambda t: -t[1]
+    )[:3]
+    classe = rep["classes"]["psi"]
+    print(f"{prefix} {rep['events']:>10,} eventos | maior PSI: "
+          + ", ".join(f"{f}={v:.3f}" for f, v in piores)
+          + ("" if np.isnan(classe) else f" | classe PSI={classe:.3f}"))
+
+
+def print_report(rep: dict):
+    print(f"{'feature':<16} {'PSI':>7} {'KS':>7}  situação")
+    for f, v in rep["features"].items():
+        ks = f"{v['ks']:7.3f}" if "ks" in v else f"{'-':>7}"
+        print(f"{f:<16} {v['psi']:7.3f} {ks}  {v['status']}")
+    c = rep["classes"]
+    print(f"{'classe prevista':<16} {c['psi']:7.3f} {'-':>7}  {c['status']} ({rep['classified']:,} eventos com classe)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monitor de drift dos pacientes escorados")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("reference", help="resume a população de treino em JSON")
+    p.add_argument("--data", default=DATA_PATH)
+    p.add_argument("-o", "--output", required=True)
+    p = sub.add_parser("report", help="calcula o drift de logs JSONL")
+    p.add_argument("logs", nargs="+")
+    p.add_argument("--reference", help="JSON gerado por 'reference' (padrão: calcula de --data)")
+    p.add_argument("--data", default=DATA_PATH)
+    p.add_argument("--chunk", type=int, default=50_000, help="eventos por bloco (limita a memória)")
+    p.add_argument("--window", type=int, help="imprime o drift de cada janela de N eventos")
+    p.add_argument("--score", action="store_true", help="escora eventos sem classe com o bundle ativo")
+    p.add_argument("--output", help="grava o relatório final em JSON")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "reference":
+        DriftReference.from_csv(args.data).save(args.output)
+        print(f"✅ Referência em {args.output}")
+        return
+
+    reference = DriftReference.load(args.reference) if args.reference else DriftReference.from_csv(args.data)
+    total = DriftMonitor(reference)
+    janela = DriftMonitor(reference) if args.window else None
+    bundle = None
+    if args.score:
+        from model_bundle import load_active_bundle
+        bundle = load_active_bundle()
+
+    inicio = time.perf_counter()
+    # Com --window, blocos de no máximo N eventos: cada janela fecha no primeiro bloco que a completa
+    chunk = min(args.chunk, args.window) if args.window else args.chunk
+    for columns, predicted in read_events(args.logs, chunk):
+        if bundle is not None and any(c is None for c in predicted):
+            predicted = _score(bundle, columns)
+        if all(c is None for c in predicted):
+            predicted = None
+        total.update_many(columns, predicted)
+        if janela is not None:
+            janela.update_many(columns, predicted)
+            if janela.events >= args.window:
+                _print_line("🪟", janela.report())
+                janela.reset()
+    dur = time.perf_counter() - inicio
+
+    rep = total.report()
+    print_report(rep)
+    print(f"⏱️ {rep['events']:,} eventos em {dur:.2f}s ({rep['events'] / max(dur, 1e-9):,.0f} eventos/s)", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rep, f, ensure_ascii=False, indent=2)
+        print(f"📄 Relatório em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Codificador de features com esquema fixo, montado uma única vez a partir de feature_names.joblib.
+
+Produz diretamente a matriz float64 na ordem exata de feature_names, com o mesmo
+resultado de preprocess_data (modelo.py), sem o custo de copy/map/get_dummies/reindex.
+"""
+import numpy as np
+import pandas as pd
+
+from modelo import BIN_MAP, DUMMY_COLS
+
+
+class FeatureEncoder:
+    def __init__(self, feature_names):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.height_idx = self.feature_names.index('Height')
+
+        # Colunas numéricas copiadas como estão
+        self.numeric = []
+        # Colunas binárias: (coluna, índice, mapeamento)
+        self.binary = []
+        # Colunas one-hot: coluna -> {categoria: índice}
+        self.dummies = {col: {} for col in DUMMY_COLS}
+
+        for idx, name in enumerate(self.feature_names):
+            prefix = next((c for c in DUMMY_COLS if name.startswith(c + '_')), None)
+            if prefix is not None:
+                self.dummies[prefix][name[len(prefix) + 1:]] = idx
+            elif name in BIN_MAP:
+                self.binary.append((name, idx, BIN_MAP[name]))
+            else:
+                self.numeric.append((name, idx))
+
+        # Vocabulários e tabelas de consulta para o caminho em lote
+        self._binary_lookup = [
+            (name, idx, pd.Index(list(m)), np.array(list(m.values()), dtype=np.float64))
+            for name, idx, m in self.binary
+        ]
+        self._dummy_lookup = [
+            (col, pd.Index(list(vocab)), np.array(list(vocab.values()), dtype=np.intp))
+            for col, vocab in self.dummies.items()
+        ]
+
+    @property
+    def vocabularies(self) -> dict:
+        vocab = {name: list(m) for name, _, m in self.binary}
+        vocab.update({col: list(v) for col, v in self.dummies.items()})
+        return vocab
+
+    # Caminho rápido para um único paciente (dict no formato de sidebar_inputs)
+    def encode_one(self, inputs: dict, height_cm: bool = True) -> np.ndarray:
+        X = np.zeros((1, self.n_features), dtype=np.float64)
+        row = X[0]
+        for name, idx in self.numeric:
+            row[idx] = inputs[name]
+        if height_cm:
+            row[self.height_idx] = row[self.height_idx] / 100
+        for name, idx, m in self.binary:
+            value = inputs[name]
+            if value not in m:
+                raise _unknown(name, value, m)
+            row[idx] = m[value]
+        for col, vocab in self.dummies.items():
+            value = inputs[col]
+            if value not in vocab:
+                raise _unknown(col, value, vocab)
+            row[vocab[value]] = 1.0
+        return X
+
+    # Caminho vetorizado para lotes (DataFrame ou lista de dicts)
+    def encode_batch(self, records, height_cm: bool = True) -> np.ndarray:
+        if not isinstance(records, pd.DataFrame):
+            records = pd.DataFrame.from_records(records)
+        n = len(records)
+        X = np.zeros((n, self.n_features), dtype=np.float64)
+        for name, idx in self.numeric:
+            X[:, idx] = records[name].to_numpy(dtype=np.float64)
+        if height_cm:
+            X[:, self.height_idx] /= 100
+        for name, idx, cats, values in self._binary_lookup:
+            codes = _codes(records[name], cats)
+            X[:, idx] = values[codes]
+        rows = np.arange(n)
+        for col, cats, positions in self._dummy_lookup:
+            codes = _codes(records[col], cats)
+            X[rows, positions[codes]] = 1.0
+        return X
+
+
+# Fatoriza a coluna e consulta o vocabulário só para os valores distintos
+def _codes(column: pd.Series, cats: pd.Index) -> np.ndarray:
+    codes, uniques = pd.factorize(column, use_na_sentinel=False)
+    lookup = cats.get_indexer(uniques)
+    if (lookup < 0).any():
+        bad = list(uniques[lookup < 0])
+        raise ValueError(f"Categoria desconhecida em {column.name}: {bad[:5]} (aceitas: {cats.tolist()})")
+    return lookup[codes]
+
+
+def _unknown(col, value, vocab) -> ValueError:
+    return ValueError(f"Categoria desconhecida em {col}: {value!r} (aceitas: {list(vocab)})")
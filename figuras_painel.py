@@ -0,0 +1,123 @@
+"""Figuras do painel analítico na API orientada a objetos do matplotlib (Figure + FigureCanvasAgg).
+
+Cada função recebe só os dados já preparados do gráfico (crosstab, recorte de colunas ou
+contagens de graficos_agregados.py) e devolve uma Figure própria, sem passar pelo estado
+global do pyplot (plt.subplots / plt.xticks / plt.tight_layout). Assim as figuras podem ser
+montadas em paralelo em threads ou processos (render_paralelo.py) e são liberadas pelo
+coletor de lixo, sem ficar registradas no pyplot.
+
+As opções de tamanho, rotação e tight_layout reproduzem as do código original com pyplot, para
+as imagens saírem idênticas.
+"""
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import seaborn as sns
+
+from graficos_agregados import desenhar_caixas, desenhar_dispersao, desenhar_histograma
+
+
+def _figura(figsize=None):
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots()
+
+
+# Mesmo efeito de plt.xticks(rotation=...) no eixo atual
+def _girar_rotulos(ax, rotacao):
+    for rotulo in ax.get_xticklabels():
+        rotulo.set_rotation(rotacao)
+
+
+def _ajustar(fig, tight_layout):
+    if tight_layout is not None:
+        fig.tight_layout(**tight_layout)
+
+
+# Barras de um crosstab Obesity x coluna (DataFrame.plot)
+def barras(tabela, figsize=None, rotacao=45, tight_layout=None):
+    fig, ax = _figura(figsize)
+    tabela.plot(kind="bar", ax=ax)
+    _girar_rotulos(ax, rotacao)
+    _ajustar(fig, tight_layout)
+    return fig
+
+
+def histograma_idade(df, figsize=(7, 4.5)):
+    fig, ax = _figura(figsize)
+    sns.histplot(data=df, x="Age", hue="Obesity", multiple="stack", ax=ax)
+    fig.tight_layout()
+    return fig
+
+
+# Bins de 1 ano a partir das contagens pré-binadas
+def histograma_idade_agregado(contagens, bordas, ordem, figsize=(7, 4.5)):
+    fig, ax = _figura(figsize)
+    desenhar_histograma(ax, contagens, bordas, ordem, sns.color_palette())
+    ax.set_xlabel("Age")
+    ax.set_ylabel("Count")
+    fig.tight_layout()
+    return fig
+
+
+def caixas(df, x, y, order=None, figsize=(7, 4.5), rotacao=None, tight_layout=None):
+    fig, ax = _figura(figsize)
+    sns.boxplot(data=df, x=x, y=y, order=order, ax=ax)
+    if rotacao is not None:
+        _girar_rotulos(ax, rotacao)
+    _ajustar(fig, tight_layout)
+    return fig
+
+
+# Boxplot a partir das estatísticas de AgregadosGraficos.caixas
+def caixas_agregadas(estatisticas, x, y, figsize=(7, 4.5), rotacao=None, tight_layout=None):
+    fig, ax = _figura(figsize)
+    desenhar_caixas(ax, estatisticas, sns.color_palette()[0])
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    if rotacao is not None:
+        _girar_rotulos(ax, rotacao)
+    _ajustar(fig, tight_layout)
+    return fig
+
+
+def dispersao(df, figsize=(7, 4.5)):
+    fig, ax = _figura(figsize)
+    sns.scatterplot(data=df, x="Height", y="Weight", hue="Obesity", ax=ax)
+    fig.tight_layout()
+    return fig
+
+
+# Grade de densidade + amostra estratificada (AgregadosGraficos.densidade / amostra)
+def dispersao_agregada(grade, bordas_x, bordas_y, x, y, codigos, ordem, figsize=(7, 4.5)):
+    fig, ax = _figura(figsize)
+    desenhar_dispersao(ax, grade, bordas_x, bordas_y, x, y, codigos, ordem, sns.color_palette())
+    ax.set_xlabel("Height")
+    ax.set_ylabel("Weight")
+    fig.tight_layout()
+    return fig
+
+
+def _rotulos_faf(ax):
+    ax.set_title("Distribuição do Tempo de Atividade Física por Nível de Obesidade")
+    ax.set_xlabel("FAF (frequência de atividade física semanal)")
+    ax.set_ylabel("Proporção")
+
+
+def proporcao_faf(df, ordem, figsize=(7, 4.5)):
+    fig, ax = _figura(figsize)
+    sns.histplot(
+        data=df, x="FAF", hue="Obesity", multiple="fill", palette="Set2",
+        hue_order=ordem, edgecolor="black", binwidth=0.25, ax=ax
+    )
+    _rotulos_faf(ax)
+    fig.tight_layout()
+    return fig
+
+
+# binwidth 0.25 = 5 bins finos de 0.05
+def proporcao_faf_agregada(contagens, bordas, ordem, figsize=(7, 4.5)):
+    fig, ax = _figura(figsize)
+    desenhar_histograma(ax, contagens, bordas, ordem, sns.color_palette("Set2"), multiple="fill", edgecolor="black")
+    _rotulos_faf(ax)
+    fig.tight_layout()
+    return fig
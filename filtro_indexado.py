@@ -0,0 +1,186 @@
+"""Motor de filtros indexado para o painel analítico (app_analitico.py).
+
+Montado uma única vez na carga dos dados:
+- colunas categóricas: códigos inteiros, bitmaps compactados e listas de linhas por categoria;
+- colunas numéricas dos sliders: índice ordenado (argsort + valores ordenados).
+
+A combinação de filtros da barra lateral é respondida cruzando índices: o predicado mais
+seletivo fornece as linhas candidatas e os demais são verificados só nelas. Predicados que
+cobrem todo o domínio (o caso padrão dos filtros) não custam nada.
+"""
+import numpy as np
+import pandas as pd
+
+CATEGORICAS = ["Gender", "family_history", "CAEC", "FAVC"]
+NUMERICAS = ["Age", "Height", "Weight"]
+
+# Abaixo desta fração de linhas candidatas, verificar os demais predicados linha a linha
+# é mais barato que cruzar bitmaps do tamanho da tabela
+_FRACAO_ESPARSA = 1 / 16
+
+
+class IndiceFiltros:
+    def __init__(self, df: pd.DataFrame, categoricas=CATEGORICAS, numericas=NUMERICAS):
+        self.n = len(df)
+        self.categorias = {}
+        self.codigos = {}
+        self.bitmaps = {}
+        self.linhas = {}
+        self.contagens = {}
+        for col in categoricas:
+            codigos, categorias = pd.factorize(df[col], sort=True)
+            codigos = codigos.astype(np.int16)
+            self.categorias[col] = list(categorias)
+            self.codigos[col] = codigos
+            self.contagens[col] = np.bincount(codigos, minlength=len(categorias))
+            ordem = np.argsort(codigos, kind="stable")
+            limites = np.concatenate([[0], np.cumsum(self.contagens[col])])
+            self.linhas[col] = [ordem[limites[i]:limites[i + 1]] for i in range(len(categorias))]
+            self.bitmaps[col] = np.packbits(codigos[None, :] == np.arange(len(categorias))[:, None], axis=1)
+
+        self.valores = {}
+        self.ordem = {}
+        self.ordenados = {}
+        for col in numericas:
+            valores = df[col].to_numpy()
+            ordem = np.argsort(valores, kind="stable")
+            self.valores[col] = valores
+            self.ordem[col] = ordem
+            self.ordenados[col] = valores[ordem]
+
+    # Acrescenta linhas novas sem reconstruir os índices a partir do zero
+    def acrescentar(self, df_novo: pd.DataFrame):
+        k = len(df_novo)
+        novos_ids = np.arange(self.n, self.n + k)
+        for col, categorias in self.categorias.items():
+            valores = df_novo[col].to_numpy()
+            for v in pd.unique(valores):
+                if v not in categorias:
+                    categorias.append(v)
+                    self.linhas[col].append(np.empty(0, dtype=np.intp))
+            codigos = pd.Index(categorias).get_indexer(valores).astype(np.int16)
+            self.codigos[col] = np.concatenate([self.codigos[col], codigos])
+            novas = np.bincount(codigos, minlength=len(categorias))
+            self.contagens[col] = np.pad(self.contagens[col], (0, len(categorias) - len(self.contagens[col]))) + novas
+            for i in np.flatnonzero(novas):
+                self.linhas[col][i] = np.concatenate([self.linhas[col][i], novos_ids[codigos == i]])
+            self.bitmaps[col] = np.packbits(
+                self.codigos[col][None, :] == np.arange(len(categorias))[:, None], axis=1
+            )
+        for col in self.valores:
+            valores = df_novo[col].to_numpy()
+            ordem = np.argsort(valores, kind="stable")
+            # side="right" mantém a ordem estável: linhas novas depois das antigas de mesmo valor
+            pos = np.searchsorted(self.ordenados[col], valores[ordem], side="right")
+            self.valores[col] = np.concatenate([self.valores[col], valores])
+            self.ordenados[col] = np.insert(self.ordenados[col], pos, valores[ordem])
+            self.ordem[col] = np.insert(self.ordem[col], pos, novos_ids[ordem])
+        self.n += k
+
+    def _permitidas(self, col, selecionadas) -> np.ndarray:
+        return np.isin(np.asarray(self.categorias[col], dtype=object), list(selecionadas))
+
+    # Converte os filtros em predicados ativos; None quando algum é vazio
+    def _predicados(self, categorias, intervalos):
+        predicados = []
+
+        for col, selecionadas in (categorias or {}).items():
+            permitidas = self._permitidas(col, selecionadas)
+            if permitidas.all():
+                continue
+            total = int(self.contagens[col][permitidas].sum())
+            if total == 0:
+                return None
+            predicados.append(("cat", col, permitidas, total))
+
+        for col, (lo, hi) in (intervalos or {}).items():
+            ini, fim = self._fatia(col, lo, hi)
+            if ini == 0 and fim == self.n:
+                continue
+            if fim <= ini:
+                return None
+            predicados.append(("num", col, (ini, fim, lo, hi), fim - ini))
+
+        predicados.sort(key=lambda p: p[3])
+        return predicados
+
+    def _fatia(self, col, lo, hi):
+        ordenados = self.ordenados[col]
+        return int(np.searchsorted(ordenados, lo, side="left")), int(np.searchsorted(ordenados, hi, side="right"))
+
+    # Devolve as posições (ordenadas) das linhas que atendem a todos os filtros
+    def consultar(self, categorias: dict = None, intervalos: dict = None) -> np.ndarray:
+        predicados = self._predicados(categorias, intervalos)
+        if predicados is None:
+            return np.empty(0, dtype=np.intp)
+        if not predicados:
+            return np.arange(self.n)
+        if predicados[0][3] <= self.n * _FRACAO_ESPARSA:
+            return self._consulta_esparsa(predicados)
+        return self._consulta_densa(predicados)
+
+    # Linhas com valor no intervalo fechado [lo, hi] da coluna numérica
+    def linhas_no_intervalo(self, col, lo, hi) -> np.ndarray:
+        ini, fim = self._fatia(col, lo, hi)
+        return self.ordem[col][ini:fim]
+
+    # Mantém, entre as linhas dadas, só as que atendem a todos os filtros
+    def filtrar(self, ids: np.ndarray, categorias: dict = None, intervalos: dict = None) -> np.ndarray:
+        predicados = self._predicados(categorias, intervalos)
+        if predicados is None:
+            return np.empty(0, dtype=np.intp)
+        return self._verificar(ids, predicados)
+
+    def _verificar(self, ids, predicados) -> np.ndarray:
+        for tipo, col, arg, _ in predicados:
+            if tipo == "cat":
+                ids = ids[arg[self.codigos[col][ids]]]
+            else:
+                _, _, lo, hi = arg
+                v = self.valores[col][ids]
+                ids = ids[(v >= lo) & (v <= hi)]
+        return ids
+
+    # Parte das linhas do predicado mais seletivo e verifica os demais só nelas
+    def _consulta_esparsa(self, predicados) -> np.ndarray:
+        tipo, col, arg, _ = predicados[0]
+        if tipo == "cat":
+            ids = np.concatenate([self.linhas[col][i] for i in np.flatnonzero(arg)])
+        else:
+            ini, fim, _, _ = arg
+            ids = self.ordem[col][ini:fim]
+        return np.sort(self._verificar(ids, predicados[1:]))
+
+    # Cruza os bitmaps das categorias e aplica os intervalos pelo lado menor do índice ordenado
+    def _consulta_densa(self, predicados) -> np.ndarray:
+        bits = None
+        for tipo, col, arg, _ in predicados:
+            if tipo != "cat":
+                continue
+            uniao = np.bitwise_or.reduce(self.bitmaps[col][arg], axis=0)
+            bits = uniao if bits is None else bits & uniao
+        if bits is None:
+            mascara = np.ones(self.n, dtype=bool)
+        else:
+            mascara = np.unpackbits(bits, count=self.n).view(bool)
+        for tipo, col, arg, total in predicados:
+            if tipo != "num":
+                continue
+            ini, fim, _, _ = arg
+            ordem = self.ordem[col]
+            if total < self.n - total:
+                dentro = np.zeros(self.n, dtype=bool)
+                dentro[ordem[ini:fim]] = True
+                mascara &= dentro
+            else:
+                mascara[ordem[:ini]] = False
+                mascara[ordem[fim:]] = False
+        return np.flatnonzero(mascara)
+
+    # Contagem por categoria dentro de um subconjunto de linhas (sem refiltrar o DataFrame)
+    def contar(self, col, ids=None) -> dict:
+        if ids is None:
+            contagens = self.contagens[col]
+        else:
+            contagens = np.bincount(self.codigos[col][ids], minlength=len(self.categorias[col]))
+        return dict(zip(self.categorias[col], contagens.tolist()))
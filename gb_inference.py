@@ -0,0 +1,178 @@
+"""Inferência do GradientBoostingClassifier a partir de arrays contíguos.
+
+As árvores do ensemble são achatadas uma única vez em vetores (feature, threshold,
+filhos, valor da folha). Uma única passada devolve rótulos e probabilidades,
+numericamente iguais aos do scikit-learn:
+
+- lotes pequenos (o caso do app) percorrem todas as árvores ao mesmo tempo com NumPy;
+- lotes maiores usam o kernel compilado predict_stages do scikit-learn diretamente,
+  sem a validação de entrada de predict/predict_proba, que domina o custo por chamada.
+
+predict_stages e model._raw_predict_init são internos privados do scikit-learn (versão fixada
+em requirements.txt). Se faltarem na versão instalada, o motor recorre à API pública do
+modelo (predict_proba/decision_function), mais lenta porém correta.
+"""
+import numpy as np
+from scipy.special import expit
+from sklearn.dummy import DummyClassifier
+
+from modelo import ignore_feature_names_warning
+
+try:
+    from sklearn.ensemble._gradient_boosting import predict_stages
+except ImportError:
+    predict_stages = None
+
+# Até este número de linhas a travessia NumPy é mais rápida que o kernel compilado
+NUMPY_MAX_ROWS = 8
+# Limite de células (linhas x árvores) percorridas por bloco, para limitar a memória
+_BLOCK_CELLS = 1 << 16
+# Arrays achatados; gravados no bundle do modelo (model_bundle.py) e reabertos via mmap
+FLAT_ARRAYS = ("feature", "threshold", "left", "right", "node_value", "value", "roots", "_threshold32", "_children")
+
+
+class FlatGradientBoosting:
+    def __init__(self, model, arrays: dict = None):
+        if not (model.init_ == "zero" or isinstance(model.init_, DummyClassifier)):
+            # Um init_ arbitrário depende de X: o prior constante (init_raw) não o representa
+            raise TypeError(
+                f"{type(model).__name__} com init_={type(model.init_).__name__}: só init='zero' ou o "
+                "estimador prior padrão (DummyClassifier) são suportados"
+            )
+
+        self.model = model
+        # Sem os internos privados, predições passam pela API pública do modelo
+        self.fallback = predict_stages is None or not hasattr(model, "_raw_predict_init")
+        self.estimators_ = model.estimators_
+        self.learning_rate = model.learning_rate
+        self.classes_ = np.asarray(model.classes_)
+        self.n_features_in_ = model.n_features_in_
+        self.n_stages, self.n_trees_per_stage = model.estimators_.shape
+
+        if arrays is not None:
+            # Arrays já achatados (ex.: memmaps do bundle): usados sem cópia
+            for name in FLAT_ARRAYS:
+                setattr(self, name, arrays[name])
+            self.max_depth = int(arrays["max_depth"])
+        else:
+            self._flatten(model)
+
+        # O prior não depende de X; calculado uma vez com uma linha qualquer
+        x0 = np.zeros((1, self.n_features_in_))
+        if model.init_ == "zero":
+            self.init_raw = np.zeros(self.n_trees_per_stage, dtype=np.float64)
+        elif not self.fallback:
+            self.init_raw = model._raw_predict_init(x0)[0].copy()
+        else:
+            # Logit público menos a soma das árvores na mesma linha (usado por attribution.py)
+            trees = self.value[self.apply(x0)].reshape(self.n_stages, self.n_trees_per_stage).sum(axis=0)
+            with ignore_feature_names_warning():
+                logit = model.decision_function(x0)
+            self.init_raw = np.asarray(logit, dtype=np.float64).reshape(-1) - trees
+
+    def _flatten(self, model):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        # Ordem estágio a estágio, classe a classe: árvore t = estágio * k + classe
+        for stage in model.estimators_:
+            for est in stage:
+                tree = est.tree_
+                is_leaf = tree.children_left == -1
+                own = np.arange(offset, offset + tree.node_count)
+                # Folhas apontam para si mesmas, então a travessia roda
+                # max_depth passos sem ramificar
+                features.append(np.where(is_leaf, 0, tree.feature))
+                thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+                lefts.append(np.where(is_leaf, own, tree.children_left + offset))
+                rights.append(np.where(is_leaf, own, tree.children_right + offset))
+                values.append(tree.value[:, 0, 0])
+                roots.append(offset)
+                offset += tree.node_count
+                max_depth = max(max_depth, tree.max_depth)
+
+        self.feature = np.concatenate(features).astype(np.int32)
+        self.threshold = np.concatenate(thresholds).astype(np.float64)
+        self.left = np.concatenate(lefts).astype(np.int32)
+        self.right = np.concatenate(rights).astype(np.int32)
+        # Valor bruto de cada nó (média dos resíduos) e já escalado pelo learning rate
+        self.node_value = np.concatenate(values)
+        self.value = self.learning_rate * self.node_value
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.max_depth = max_depth
+
+        # O scikit-learn compara X em float32 com o threshold em float64. Para float32 x,
+        # x <= t equivale a x <= maior float32 <= t, então a comparação fica toda em float32.
+        thr32 = self.threshold.astype(np.float32)
+        over = thr32.astype(np.float64) > self.threshold
+        thr32[over] = np.nextafter(thr32[over], np.float32(-np.inf))
+        self._threshold32 = thr32
+        # Filhos intercalados: posição 2*nó + (x <= threshold)
+        self._children = np.stack([self.right, self.left], axis=1).ravel()
+
+    def arrays(self) -> dict:
+        out = {name: getattr(self, name) for name in FLAT_ARRAYS}
+        out["max_depth"] = self.max_depth
+        return out
+
+    # Índice global da folha alcançada em cada árvore: shape (n_linhas, n_árvores)
+    def apply(self, X) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n, n_features = X.shape
+        n_trees = len(self.roots)
+        out = np.empty((n, n_trees), dtype=np.int32)
+        block = max(1, _BLOCK_CELLS // n_trees)
+        for start in range(0, n, block):
+            Xb = X[start:start + block]
+            flat = Xb.ravel()
+            row_offset = (np.arange(len(Xb), dtype=np.int32) * n_features)[:, None]
+            node = np.broadcast_to(self.roots, (len(Xb), n_trees))
+            for _ in range(self.max_depth):
+                go_left = flat[row_offset + self.feature[node]] <= self._threshold32[node]
+                node = self._children[2 * node + go_left]
+            out[start:start + block] = node
+        return out
+
+    def decision_function(self, X) -> np.ndarray:
+        if self.fallback:
+            with ignore_feature_names_warning():
+                raw = self.model.decision_function(X)
+            return np.asarray(raw, dtype=np.float64).reshape(len(X), -1)
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n = len(X)
+        if n <= NUMPY_MAX_ROWS:
+            stages = np.empty((n, self.n_stages + 1, self.n_trees_per_stage), dtype=np.float64)
+            stages[:, 0] = self.init_raw
+            stages[:, 1:] = self.value[self.apply(X)].reshape(n, self.n_stages, self.n_trees_per_stage)
+            # cumsum soma sequencialmente, na mesma ordem (estágio a estágio) do scikit-learn
+            return np.cumsum(stages, axis=1)[:, -1]
+        raw = np.tile(self.init_raw, (n, 1))
+        predict_stages(self.estimators_, X, self.learning_rate, raw)
+        return raw
+
+    def _proba(self, raw) -> np.ndarray:
+        if raw.shape[1] == 1:
+            p = expit(raw[:, 0])
+            return np.column_stack([1 - p, p])
+        e = np.exp(raw - raw.max(axis=1, keepdims=True))
+        return e / e.sum(axis=1, keepdims=True)
+
+    def _labels(self, raw) -> np.ndarray:
+        if raw.shape[1] == 1:
+            return self.classes_[(raw[:, 0] >= 0).astype(int)]
+        return self.classes_[np.argmax(raw, axis=1)]
+
+    # Rótulos e probabilidades em uma única passada pelas árvores
+    def predict_with_proba(self, X):
+        if self.fallback:
+            with ignore_feature_names_warning():
+                proba = self.model.predict_proba(X)
+            return self.classes_[np.argmax(proba, axis=1)], proba
+        raw = self.decision_function(X)
+        return self._labels(raw), self._proba(raw)
+
+    def predict(self, X) -> np.ndarray:
+        return self.predict_with_proba(X)[0] if self.fallback else self._labels(self.decision_function(X))
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self.predict_with_proba(X)[1] if self.fallback else self._proba(self.decision_function(X))
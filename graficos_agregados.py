@@ -0,0 +1,170 @@
+"""Caminhos de gráfico para tabelas grandes (milhões de linhas) no painel analítico.
+
+Na carga, cada coluna numérica dos gráficos linha a linha (Age, Height, Weight, FAF) é
+discretizada uma vez em bins finos de largura fixa (códigos inteiros por linha), e os grupos
+(classe de obesidade, histórico familiar) ficam como códigos. Com isso:
+
+- histogramas: contagens (grupo x bin) por um único bincount sobre as linhas filtradas,
+  reagrupadas na largura do gráfico; sem filtro, as contagens ficam guardadas;
+- boxplots: quartis, bigodes e outliers por grupo saem das mesmas contagens (resolução de um
+  bin fino), desenhados com Axes.bxp;
+- dispersão Altura x Peso: grade 2-D de densidade de todas as linhas filtradas como fundo e
+  uma amostra estratificada por classe (no máximo AMOSTRA_DISPERSAO pontos) por cima.
+
+O desenho recebe só arrays do tamanho da grade ou da amostra, então o tempo de renderização
+não cresce com o número de linhas; o custo por linha é o bincount/take vetorizado.
+"""
+import numpy as np
+
+# Acima deste número de linhas o painel usa estes caminhos (PAINEL_LIMITE_LINHAS em app_analitico.py)
+LIMITE_LINHAS = 200_000
+# Largura dos bins finos por coluna (altura em metros)
+LARGURAS = {"Age": 0.5, "Height": 0.005, "Weight": 0.5, "FAF": 0.05}
+AMOSTRA_DISPERSAO = 10_000
+# Mínimo de pontos por classe na amostra, para classes raras continuarem visíveis
+MINIMO_POR_CLASSE = 300
+
+
+class Discretizacao:
+    def __init__(self, valores: np.ndarray, largura: float):
+        self.largura = largura
+        self.origem = np.floor(np.nanmin(valores) / largura) * largura
+        self.n_bins = int(np.floor((np.nanmax(valores) - self.origem) / largura)) + 1
+        codigos = np.floor((valores - self.origem) / largura)
+        self.codigos = np.clip(codigos, 0, self.n_bins - 1).astype(np.int32)
+
+    def bordas(self, fator: int = 1) -> np.ndarray:
+        n = -(-self.n_bins // fator)
+        return self.origem + np.arange(n + 1) * self.largura * fator
+
+    def centros(self) -> np.ndarray:
+        return self.origem + (np.arange(self.n_bins) + 0.5) * self.largura
+
+
+class AgregadosGraficos:
+    def __init__(self, dados, larguras=LARGURAS, seed: int = 1):
+        tabela = dados.tabela
+        self.n = dados.n
+        self.colunas = {
+            col: Discretizacao(tabela[col].to_numpy(dtype=np.float64), w) for col, w in larguras.items()
+        }
+        # Grupos: códigos por linha (-1 = ausente) e rótulos na ordem dos códigos
+        obesidade = dados.obesidade_traduzida
+        self.grupos = {"Obesity": (np.asarray(obesidade.codes), list(obesidade.categories))}
+        for col in ("family_history", "Gender"):
+            categorico = tabela[col].array
+            self.grupos[col] = (np.asarray(categorico.codes), list(categorico.categories))
+        # Sorteio fixo por linha: a mesma seleção de filtros gera sempre a mesma amostra. A semente
+        # difere da padrão de synthetic_data.py, senão o sorteio acompanha a reamostragem das linhas
+        self._sorteio = np.random.default_rng(seed).random(self.n, dtype=np.float32)
+        self._sem_filtro = {}
+
+    # Contagens (grupos x bins) das linhas `ids` (todas se None); `fator` junta bins vizinhos
+    def contagens(self, col: str, grupo: str, ids=None, fator: int = 1) -> np.ndarray:
+        chave = (col, grupo)
+        if ids is None and chave in self._sem_filtro:
+            contagens = self._sem_filtro[chave]
+        else:
+            disc = self.colunas[col]
+            codigos, rotulos = self.grupos[grupo]
+            g, b = (codigos, disc.codigos) if ids is None else (codigos[ids], disc.codigos[ids])
+            validos = g >= 0
+            chaves = g[validos].astype(np.int64) * disc.n_bins + b[validos]
+            contagens = np.bincount(chaves, minlength=len(rotulos) * disc.n_bins).reshape(len(rotulos), disc.n_bins)
+            if ids is None:
+                self._sem_filtro[chave] = contagens
+        if fator > 1:
+            pad = -contagens.shape[1] % fator
+            contagens = np.pad(contagens, ((0, 0), (0, pad))).reshape(len(contagens), -1, fator).sum(axis=2)
+        return contagens
+
+    # Quantil de `col` nas linhas `ids`, na resolução de um bin fino
+    def quantil(self, col: str, q: float, ids=None) -> float:
+        total = self.contagens(col, "Obesity", ids).sum(axis=0)
+        if not total.sum():
+            return float("nan")
+        return float(_quantis(total, self.colunas[col].centros(), [q])[0])
+
+    # Estatísticas de boxplot por grupo (formato de Axes.bxp), só para grupos com linhas
+    def caixas(self, col: str, grupo: str, ids=None, whis: float = 1.5, ordem=None) -> list:
+        contagens = self.contagens(col, grupo, ids)
+        centros = self.colunas[col].centros()
+        rotulos = self.grupos[grupo][1]
+        saida = []
+        for rotulo in (ordem or rotulos):
+            c = contagens[rotulos.index(rotulo)]
+            if not c.sum():
+                continue
+            q1, med, q3 = _quantis(c, centros, [0.25, 0.5, 0.75])
+            baixo, alto = q1 - whis * (q3 - q1), q3 + whis * (q3 - q1)
+            ocupados = centros[c > 0]
+            dentro = ocupados[(ocupados >= baixo) & (ocupados <= alto)]
+            saida.append({
+                "label": rotulo, "q1": q1, "med": med, "q3": q3,
+                "whislo": dentro.min(), "whishi": dentro.max(),
+                "fliers": ocupados[(ocupados < baixo) | (ocupados > alto)],
+            })
+        return saida
+
+    # Grade 2-D de contagens (bins de x por bins de y) das linhas `ids`
+    def densidade(self, x: str, y: str, ids=None, fator: int = 2) -> tuple:
+        dx, dy = self.colunas[x], self.colunas[y]
+        bx, by = (dx.codigos, dy.codigos) if ids is None else (dx.codigos[ids], dy.codigos[ids])
+        nx, ny = -(-dx.n_bins // fator), -(-dy.n_bins // fator)
+        grade = np.bincount((bx // fator).astype(np.int64) * ny + by // fator, minlength=nx * ny).reshape(nx, ny)
+        return grade, dx.bordas(fator), dy.bordas(fator)
+
+    # Linhas da amostra estratificada por `grupo`: cota proporcional, com um mínimo por grupo
+    def amostra(self, grupo: str = "Obesity", ids=None, n_max: int = AMOSTRA_DISPERSAO,
+                minimo: int = MINIMO_POR_CLASSE) -> np.ndarray:
+        ids = np.arange(self.n) if ids is None else np.asarray(ids)
+        if len(ids) <= n_max:
+            return ids
+        codigos = self.grupos[grupo][0][ids]
+        contagem = np.bincount(codigos[codigos >= 0], minlength=len(self.grupos[grupo][1]))
+        cota = np.maximum(contagem * (n_max / len(ids)), np.minimum(contagem, minimo))
+        taxa = np.append(cota / np.maximum(contagem, 1), 0.0)
+        # Códigos -1 (ausentes) caem na última posição de `taxa`, que nunca é sorteada
+        return ids[self._sorteio[ids] < taxa[codigos]]
+
+
+# Valor (centro do bin) de cada quantil, pela posição (n - 1) * q como em np.quantile
+def _quantis(contagens: np.ndarray, centros: np.ndarray, qs) -> np.ndarray:
+    acumulado = np.cumsum(contagens)
+    posicoes = np.asarray(qs) * (acumulado[-1] - 1)
+    return centros[np.searchsorted(acumulado, posicoes, side="right")]
+
+
+# Histograma empilhado ("stack") ou em proporção por bin ("fill") a partir das contagens
+def desenhar_histograma(ax, contagens, bordas, rotulos, cores, multiple: str = "stack", **bar_kwargs):
+    ocupados = np.flatnonzero(contagens.sum(axis=0))
+    if not len(ocupados):
+        return
+    fatia = slice(ocupados[0], ocupados[-1] + 1)
+    contagens, inicio, larguras = contagens[:, fatia], bordas[:-1][fatia], np.diff(bordas)[fatia]
+    if multiple == "fill":
+        total = contagens.sum(axis=0)
+        contagens = contagens / np.where(total > 0, total, 1)
+    base = np.zeros(contagens.shape[1])
+    for j, rotulo in enumerate(rotulos):
+        if contagens[j].any():
+            ax.bar(inicio, contagens[j], width=larguras, bottom=base, align="edge",
+                   color=cores[j % len(cores)], label=rotulo, **bar_kwargs)
+            base = base + contagens[j]
+    ax.legend(title="Obesity", fontsize="small")
+
+
+def desenhar_caixas(ax, caixas, cor):
+    ax.bxp(caixas, patch_artist=True, boxprops={"facecolor": cor},
+           medianprops={"color": "black"}, flierprops={"marker": "d", "markersize": 4})
+
+
+# Fundo de densidade (escala log) com a amostra estratificada colorida por classe por cima
+def desenhar_dispersao(ax, grade, bordas_x, bordas_y, x, y, codigos, rotulos, cores):
+    ax.imshow(np.log1p(grade).T, origin="lower", aspect="auto", cmap="Greys", interpolation="nearest",
+              extent=(bordas_x[0], bordas_x[-1], bordas_y[0], bordas_y[-1]), zorder=0)
+    for j, rotulo in enumerate(rotulos):
+        sel = codigos == j
+        if sel.any():
+            ax.scatter(x[sel], y[sel], s=6, alpha=0.6, color=cores[j % len(cores)], label=rotulo, zorder=1)
+    ax.legend(title="Obesity", fontsize="small", markerscale=2)
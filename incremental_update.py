@@ -0,0 +1,272 @@
+"""Atualização incremental do modelo com pacientes recém-rotulados, sem retreino completo.
+
+Os registros novos (CSV com as colunas de data/Obesity.csv, altura em metros) são codificados
+sozinhos pelo FeatureEncoder e concatenados à matriz codificada em cache (train_model.py), sem
+recodificar a base. O GradientBoostingClassifier do bundle ativo ganha `--stages` estágios a
+mais com warm_start, ajustados nas linhas de treino da base ampliada: os estágios existentes
+ficam como estão e os novos corrigem os resíduos, inclusive nos registros novos.
+
+Validação antes de publicar, num holdout que nenhuma atualização usa no ajuste:
+- linhas da base original: o teste da divisão do notebook (split_indices);
+- linhas acrescentadas: TEST_SIZE delas, por um hash fixo da posição da linha, então cada
+  linha fica no mesmo lado em todas as atualizações.
+O modelo novo só é publicado se a acurácia no holdout não cair mais que `--tolerance` em
+relação ao modelo atual nem em relação ao bundle do último treino completo (seguindo
+`updated_from` nos manifests): sem a segunda referência, atualizações seguidas poderiam
+perder até `--tolerance` cada uma. Publicar significa: anexar os registros ao CSV (troca atômica),
+gravar a matriz ampliada na versão nova do cache do dataset (o próximo treino completo já a
+encontra), regravar models/gb_model.joblib e ativar um bundle novo (model_bundle.py), que os
+apps em execução carregam sozinhos.
+
+Categorias ou classes que não existem no modelo mudam as features: nesse caso a atualização
+é recusada e é preciso o treino completo (train_model.py).
+
+Uso:
+    python incremental_update.py novos.csv                  # +20 estágios, valida e publica
+    python incremental_update.py novos.csv --stages 50 --dry-run   # não grava nada
+"""
+import argparse
+import copy
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from model_bundle import BUNDLE_DIR, build_bundle, load_active_bundle, load_bundle
+from modelo import DATA_PATH, MODEL_PATH, ignore_feature_names_warning
+from train_model import (
+    TARGET_COL, TEST_SIZE, encoded_matrix, encoded_paths, feature_order, save_encoded, split_indices, _dump_atomic,
+)
+
+# Constante de Fibonacci (2^64 / razão áurea): espalha posições consecutivas em [0, 1)
+_HASH_MULT = np.uint64(0x9E3779B97F4A7C15)
+
+
+# Holdout fixo: teste do notebook nas `linhas_base` primeiras linhas, hash da posição nas demais
+def holdout_mask(y, linhas_base: int) -> np.ndarray:
+    mascara = np.zeros(len(y), dtype=bool)
+    mascara[split_indices(np.asarray(y[:linhas_base]))[1]] = True
+    posicoes = np.arange(linhas_base, len(y), dtype=np.uint64)
+    mascara[linhas_base:] = ((posicoes * _HASH_MULT) >> np.uint64(40)) / float(1 << 24) < TEST_SIZE
+    return mascara
+
+
+def read_new_records(path: str, colunas: list) -> pd.DataFrame:
+    novos = pd.read_csv(path)
+    faltando = [c for c in colunas if c not in novos.columns]
+    if faltando:
+        raise ValueError(f"{path}: colunas ausentes {faltando}")
+    if novos.empty:
+        raise ValueError(f"{path}: nenhum registro novo")
+    return novos[colunas]
+
+
+# Anexa as linhas a uma cópia do CSV e troca o arquivo de uma vez
+def append_csv(path: str, novos: pd.DataFrame):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    shutil.copyfile(path, tmp)
+    try:
+        with open(tmp, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+        novos.to_csv(tmp, mode="a", header=False, index=False)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# Bundle do último treino completo: segue `updated_from` até um bundle que não veio de atualização
+def baseline_bundle(bundle, bundle_dir: str = BUNDLE_DIR):
+    visitados = {bundle.version}
+    while bundle.metrics.get("updated_from"):
+        anterior = bundle.metrics.get("baseline_version") or bundle.metrics["updated_from"]
+        if anterior in visitados:
+            break
+        visitados.add(anterior)
+        try:
+            bundle = load_bundle(anterior, bundle_dir)
+        except (OSError, ValueError):
+            # Bundle removido ou ilegível: a referência fica no mais antigo ainda disponível
+            break
+    return bundle
+
+
+def _avaliar(model, X, y) -> dict:
+    from sklearn.metrics import accuracy_score, f1_score
+    with ignore_feature_names_warning():
+        pred = model.predict(X)
+    return {"accuracy": float(accuracy_score(y, pred)), "f1_macro": float(f1_score(y, pred, average="macro"))}
+
+
+def update(
+    new_path: str,
+    data_path: str = DATA_PATH,
+    stages: int = 20,
+    tolerance: float = 0.01,
+    models_dir: str = "models",
+    bundle_dir: str = BUNDLE_DIR,
+    publish: bool = True,
+) -> dict:
+    from dataset_cache import ensure_dataset_cache, file_sha256, open_dataset
+    from sklearn.ensemble import GradientBoostingClassifier
+
+    if stages < 1:
+        raise ValueError(f"stages deve ser positivo (recebido {stages})")
+    t_inicio = time.perf_counter()
+    bundle = load_active_bundle(bundle_dir)
+    if not isinstance(bundle.model, GradientBoostingClassifier):
+        raise ValueError(f"Bundle {bundle.version}: warm_start exige GradientBoostingClassifier, "
+                         f"não {type(bundle.model).__name__}")
+    x_path, y_path, feature_names, label_encoder, cached = encoded_matrix(data_path)
+    if feature_names != bundle.feature_names or list(label_encoder.classes_) != list(bundle.encoder.classes_):
+        raise ValueError(f"Bundle {bundle.version} não corresponde a {data_path} (features ou classes diferentes); "
+                         "rode o treino completo (train_model.py)")
+    X_base, y_base = np.load(x_path), np.load(y_path)
+    t_dados = time.perf_counter()
+
+    novos = read_new_records(new_path, list(pd.read_csv(data_path, nrows=0).columns))
+    rotulos = np.asarray(novos[TARGET_COL], dtype=object)
+    desconhecidos = sorted(set(rotulos) - set(label_encoder.classes_))
+    if desconhecidos:
+        raise ValueError(f"Classes novas em {new_path}: {desconhecidos}; rode o treino completo (train_model.py)")
+    try:
+        X_novos = bundle.feature_encoder.encode_batch(novos, height_cm=False)
+    except ValueError as e:
+        raise ValueError(f"{e}; categorias novas exigem o treino completo (train_model.py)") from None
+    X = np.concatenate([X_base, X_novos])
+    y = np.concatenate([y_base, label_encoder.transform(rotulos).astype(np.int64)])
+    t_codificacao = time.perf_counter()
+
+    # Linhas da base do último treino completo; as seguintes vieram de atualizações
+    metrics = bundle.metrics
+    linhas_base = metrics.get("base_rows") or (metrics.get("n_train", 0) + metrics.get("n_test", 0)) or len(y_base)
+    teste = holdout_mask(y, linhas_base)
+    modelo = copy.deepcopy(bundle.model)
+    estagios_antes = modelo.n_estimators_
+    modelo.set_params(warm_start=True, n_estimators=estagios_antes + stages)
+    modelo.fit(X[~teste], y[~teste])
+    modelo.set_params(warm_start=False)
+    t_ajuste = time.perf_counter()
+
+    antes, depois = _avaliar(bundle.model, X[teste], y[teste]), _avaliar(modelo, X[teste], y[teste])
+    base = baseline_bundle(bundle, bundle_dir)
+    referencia = antes if base is bundle else _avaliar(base.model, X[teste], y[teste])
+    novos_teste = teste[len(y_base):]
+    aprovado = depois["accuracy"] >= max(antes["accuracy"], referencia["accuracy"]) - tolerance
+    report = {
+        "base_version": bundle.version,
+        "data": {
+            "path": data_path,
+            "new_records": new_path,
+            "rows_before": int(len(y_base)),
+            "rows_new": int(len(X_novos)),
+            "base_rows": int(linhas_base),
+            "n_train": int((~teste).sum()),
+            "n_test": int(teste.sum()),
+            "n_test_new": int(novos_teste.sum()),
+            "encoded_cache_hit": cached,
+        },
+        "stages": {"before": int(estagios_antes), "added": stages, "after": int(modelo.n_estimators_)},
+        "holdout": {"before": antes, "after": depois, "baseline": dict(referencia, version=base.version),
+                    "tolerance": tolerance},
+        "holdout_new_rows": (
+            {"before": _avaliar(bundle.model, X_novos[novos_teste], y[len(y_base):][novos_teste]),
+             "after": _avaliar(modelo, X_novos[novos_teste], y[len(y_base):][novos_teste])}
+            if novos_teste.any() else None
+        ),
+        "accepted": aprovado,
+        "published": False,
+    }
+
+    t_publicacao = time.perf_counter()
+    if aprovado and publish:
+        append_csv(data_path, novos)
+        versao = ensure_dataset_cache(data_path)
+        # Mesma ordem de features (sem categorias novas): a matriz ampliada vale para a versão nova
+        if feature_order(open_dataset(versao)) == feature_names:
+            save_encoded(*encoded_paths(versao, feature_names), X, y)
+        os.makedirs(models_dir, exist_ok=True)
+        _dump_atomic(modelo, os.path.join(models_dir, os.path.basename(MODEL_PATH)))
+        report["bundle"] = build_bundle(modelo, label_encoder, feature_names, {
+            "accuracy": depois["accuracy"],
+            "f1_macro": depois["f1_macro"],
+            "params": {k: modelo.get_params()[k] for k in ("n_estimators", "learning_rate", "max_depth")},
+            "n_train": report["data"]["n_train"],
+            "n_test": report["data"]["n_test"],
+            "base_rows": int(linhas_base),
+            "updated_from": bundle.version,
+            "baseline_version": base.version,
+            "data_sha256": file_sha256(data_path),
+        }, bundle_dir)
+        report["published"] = True
+    t_fim = time.perf_counter()
+    report["timing_s"] = {
+        "load": t_dados - t_inicio,
+        "encode_new": t_codificacao - t_dados,
+        "fit_stages": t_ajuste - t_codificacao,
+        "validate": t_publicacao - t_ajuste,
+        "publish": t_fim - t_publicacao,
+        "total": t_fim - t_inicio,
+    }
+    return report
+
+
+def print_report(report: dict):
+    d, s, h, t = report["data"], report["stages"], report["holdout"], report["timing_s"]
+    print(f"📥 {d['rows_new']} registros novos sobre {d['rows_before']} (cache da matriz: "
+          f"{'sim' if d['encoded_cache_hit'] else 'não'}) | estágios {s['before']} -> {s['after']} | "
+          f"treino {d['n_train']}, holdout {d['n_test']} ({d['n_test_new']} novos)")
+    print(f"⏱️ Carga {t['load']:.2f}s | codificação {t['encode_new']:.3f}s | ajuste {t['fit_stages']:.2f}s | "
+          f"validação {t['validate']:.2f}s | publicação {t['publish']:.2f}s | total {t['total']:.1f}s")
+    print(f"{'holdout':<16} {'acurácia':>9} {'F1':>7}")
+    for nome, chave in (("treino completo", "baseline"), ("modelo atual", "before"), ("atualizado", "after")):
+        print(f"{nome:<16} {h[chave]['accuracy']:9.4f} {h[chave]['f1_macro']:7.4f}")
+    if report["holdout_new_rows"]:
+        n = report["holdout_new_rows"]
+        print(f"  (só registros novos: {n['before']['accuracy']:.4f} -> {n['after']['accuracy']:.4f})")
+    if report["published"]:
+        print(f"✅ Publicado: registros anexados a {d['path']}, bundle ativo {report['bundle']}")
+    elif report["accepted"]:
+        print("ℹ️ Aprovado na validação; nada gravado (--dry-run)")
+    else:
+        print(f"⚠️ Rejeitado: a acurácia no holdout caiu mais que {h['tolerance']} em relação ao modelo atual "
+              f"ou ao treino completo ({h['baseline']['version']}); nada gravado")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Atualização incremental do modelo (warm_start)")
+    parser.add_argument("input", help="CSV com os registros rotulados novos (colunas de data/Obesity.csv)")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--stages", type=int, default=20, help="estágios de boosting acrescentados")
+    parser.add_argument("--tolerance", type=float, default=0.01, help="queda máxima de acurácia no holdout")
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--bundle-dir", default=BUNDLE_DIR)
+    parser.add_argument("--report", default=None,
+                        help="relatório JSON (padrão: models/update_report.json; nenhum com --dry-run)")
+    parser.add_argument("--dry-run", action="store_true", help="só ajusta e valida; não grava nada")
+    args = parser.parse_args(argv)
+    if args.report is None and not args.dry_run:
+        args.report = os.path.join("models", "update_report.json")
+
+    report = update(
+        args.input, args.data, args.stages, args.tolerance, args.models_dir, args.bundle_dir, not args.dry_run
+    )
+    print_report(report)
+    if args.report:
+        os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"📄 Relatório em {args.report}")
+    if not report["accepted"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
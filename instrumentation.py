@@ -0,0 +1,325 @@
+"""Instrumentação leve dos caminhos quentes de app.py e app_analitico.py.
+
+- span("etapa") / @timed("etapa"): mede a duração de uma etapa num histograma por etapa
+  (buckets cumulativos no estilo Prometheus, mais soma, contagem e máximo);
+- inc("contador"): contadores monotônicos; cached(...): envolve st.cache_data/st.cache_resource
+  contando chamadas e execuções do corpo (miss), de onde sai a taxa de acerto;
+- register_collector(fn): valores lidos na hora da coleta (ex.: PredictionCache.stats()).
+
+Saídas: página de texto no formato Prometheus num servidor HTTP próprio (METRICS_PORT), resumo
+periódico no log (METRICS_LOG_INTERVAL, em segundos) e, por execução, um perfil do cProfile
+(?profile=1 na URL ou APP_PROFILE=1) gravado em profiles/.
+
+Com APP_METRICS=0, span() devolve um contexto nulo compartilhado e @timed devolve a própria
+função: o custo desligado é uma chamada de função.
+"""
+import bisect
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+import weakref
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.environ.get("APP_METRICS", "1") != "0"
+PROFILE_DIR = "profiles"
+# Limites superiores dos buckets, em segundos (de 100µs a 10s)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP = nullcontext()
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+
+class Registry:
+    def __init__(self, app: str = ""):
+        self.app = app
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._collectors = []
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            hist = self._histograms.get(stage)
+            if hist is None:
+                hist = self._histograms[stage] = _Histogram()
+            hist.observe(seconds)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    # fn() -> {(nome, tupla de labels): valor}; chamada a cada coleta. None sinaliza um
+    # coletor morto (objeto observado descartado), removido do registro
+    def register_collector(self, fn):
+        with self._lock:
+            self._collectors.append(fn)
+
+    def _collected(self) -> dict:
+        out, mortos = {}, []
+        for fn in list(self._collectors):
+            try:
+                valores = fn()
+            except Exception:
+                continue
+            if valores is None:
+                mortos.append(fn)
+            else:
+                out.update(valores)
+        if mortos:
+            with self._lock:
+                self._collectors = [fn for fn in self._collectors if fn not in mortos]
+        return out
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            hists = {
+                k: {"counts": list(h.counts), "sum": h.sum, "count": h.count, "max": h.max}
+                for k, h in self._histograms.items()
+            }
+            counters = dict(self._counters)
+        return {"histograms": hists, "counters": counters, "gauges": self._collected()}
+
+    def prometheus(self) -> str:
+        snap = self.snapshot()
+        base = {"app": self.app} if self.app else {}
+        lines = ["# TYPE app_stage_seconds histogram"]
+        for stage, h in sorted(snap["histograms"].items()):
+            acumulado = 0
+            for le, c in zip(BUCKETS + ("+Inf",), h["counts"]):
+                acumulado += c
+                lines.append(f"app_stage_seconds_bucket{_labels({**base, 'stage': stage, 'le': le})} {acumulado}")
+            lines.append(f"app_stage_seconds_sum{_labels({**base, 'stage': stage})} {h['sum']:.6f}")
+            lines.append(f"app_stage_seconds_count{_labels({**base, 'stage': stage})} {h['count']}")
+        nomes = set()
+        for (name, labels), value in sorted(snap["counters"].items()):
+            if name not in nomes:
+                lines.append(f"# TYPE app_{name} counter")
+                nomes.add(name)
+            lines.append(f"app_{name}{_labels({**base, **dict(labels)})} {value}")
+        for (name, labels), value in sorted(snap["gauges"].items()):
+            if name not in nomes:
+                lines.append(f"# TYPE app_{name} gauge")
+                nomes.add(name)
+            lines.append(f"app_{name}{_labels({**base, **dict(labels)})} {value}")
+        return "\n".join(lines) + "\n"
+
+    # Resumo legível para o log: contagem, média e máximo por etapa, acerto por cache
+    def summary(self) -> str:
+        snap = self.snapshot()
+        partes = [
+            f"{stage} n={h['count']} média={h['sum'] / h['count'] * 1e3:.2f}ms máx={h['max'] * 1e3:.1f}ms"
+            for stage, h in sorted(snap["histograms"].items()) if h["count"]
+        ]
+        chamadas = {dict(l)["cache"]: v for (n, l), v in snap["counters"].items() if n == "cache_calls_total"}
+        misses = {dict(l)["cache"]: v for (n, l), v in snap["counters"].items() if n == "cache_misses_total"}
+        for cache, total in sorted(chamadas.items()):
+            acertos = total - misses.get(cache, 0)
+            partes.append(f"cache {cache} {acertos}/{total} acertos ({100 * acertos / total:.0f}%)")
+        return f"📈 Métricas de {self.app or 'processo'}: " + (" | ".join(partes) or "sem medições")
+
+
+REGISTRY = Registry()
+
+
+def configure(app: str):
+    REGISTRY.app = app
+
+
+@contextmanager
+def _span(stage: str):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(stage, time.perf_counter() - inicio)
+
+
+def span(stage: str):
+    return _span(stage) if ENABLED else _NOOP
+
+
+def timed(stage: str):
+    def deco(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                REGISTRY.observe(stage, time.perf_counter() - inicio)
+        return wrapper
+    return deco
+
+
+def observe(stage: str, seconds: float):
+    if ENABLED:
+        REGISTRY.observe(stage, seconds)
+
+
+def inc(name: str, value: float = 1, **labels):
+    if ENABLED:
+        REGISTRY.inc(name, value, **labels)
+
+
+def register_collector(fn):
+    REGISTRY.register_collector(fn)
+
+
+# Exporta os campos numéricos de obj.<method>() como gauges <name>_<campo>; a referência é
+# fraca, então um objeto descartado (ex.: cache de um bundle antigo) some da coleta
+def register_stats(name: str, obj, method: str = "stats", **labels):
+    ref = weakref.ref(obj)
+    chave = tuple(sorted(labels.items()))
+
+    def coletar():
+        alvo = ref()
+        if alvo is None:
+            return None
+        return {
+            (f"{name}_{campo}", chave): valor
+            for campo, valor in getattr(alvo, method)().items()
+            if isinstance(valor, (int, float)) and not isinstance(valor, bool)
+        }
+    register_collector(coletar)
+
+
+# Envolve um decorador de cache do Streamlit: conta chamadas, misses (execuções do corpo) e o
+# tempo de cada execução. Uso: @cached(st.cache_resource, "load_data", max_entries=2)
+def cached(cache_decorator, name: str, **cache_kwargs):
+    def deco(fn):
+        @functools.wraps(fn)
+        def corpo(*args, **kwargs):
+            inc("cache_misses_total", cache=name)
+            with span(f"cache_miss:{name}"):
+                return fn(*args, **kwargs)
+
+        em_cache = cache_decorator(**cache_kwargs)(corpo) if cache_kwargs else cache_decorator(corpo)
+
+        @functools.wraps(fn)
+        def chamada(*args, **kwargs):
+            inc("cache_calls_total", cache=name)
+            return em_cache(*args, **kwargs)
+
+        chamada.clear = em_cache.clear
+        return chamada
+    return deco
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_started = set()
+_started_lock = threading.Lock()
+
+
+def _once(key) -> bool:
+    with _started_lock:
+        if key in _started:
+            return False
+        _started.add(key)
+        return True
+
+
+# Servidor /metrics numa thread daemon; uma vez por processo
+def start_http_server(port: int, host: str = "127.0.0.1"):
+    if not _once(("http", port)):
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metricas-http", daemon=True).start()
+    print(f"📈 Métricas em http://{host}:{port}/metrics", flush=True)
+    return server
+
+
+# Imprime REGISTRY.summary() a cada `interval` segundos; uma vez por processo
+def start_log_dump(interval: float):
+    if not _once("log"):
+        return
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            print(REGISTRY.summary(), flush=True)
+
+    threading.Thread(target=loop, name="metricas-log", daemon=True).start()
+
+
+# Liga as saídas configuradas por variáveis de ambiente
+def start_exporters():
+    if not ENABLED:
+        return
+    if os.environ.get("METRICS_PORT"):
+        start_http_server(int(os.environ["METRICS_PORT"]))
+    if os.environ.get("METRICS_LOG_INTERVAL"):
+        start_log_dump(float(os.environ["METRICS_LOG_INTERVAL"]))
+
+
+class RequestProfile:
+    """cProfile de uma execução do script (só a thread que chamou start)."""
+
+    def __init__(self, name: str, enabled: bool):
+        self.name = name
+        self.profiler = cProfile.Profile() if enabled else None
+        if self.profiler is not None:
+            try:
+                self.profiler.enable()
+            except ValueError:
+                # Outro perfil já ativo no processo (Python >= 3.12 permite um por vez)
+                self.profiler = None
+
+    # Grava o .prof em profiles/ e devolve as funções mais caras por tempo acumulado
+    def stop(self, top: int = 15):
+        if self.profiler is None:
+            return None
+        self.profiler.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.prof")
+        self.profiler.dump_stats(path)
+        buffer = io.StringIO()
+        pstats.Stats(self.profiler, stream=buffer).sort_stats("cumulative").print_stats(top)
+        print(f"🔬 Perfil gravado em {path}\n{buffer.getvalue()}", flush=True)
+        self.profiler = None
+        return path
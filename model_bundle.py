@@ -0,0 +1,373 @@
+"""Bundle versionado do modelo: um único artefato com tudo que a predição precisa.
+
+Cada versão fica em models/bundles/<versão>/:
+
+- bundle.joblib: modelo, LabelEncoder, ordem das features, vocabulários das categorias e os
+  arrays achatados do motor de inferência (gb_inference.py). Gravado sem compressão, para
+  abrir com joblib.load(mmap_mode="r"): os arrays NumPy do arquivo são mapeados e todos os
+  processos leem a mesma cópia do page cache. (As árvores do scikit-learn copiam os nós ao
+  desserializar; os arrays achatados do motor, usados nos lotes pequenos, ficam mapeados.)
+- manifest.json: versão, SHA-256 do bundle.joblib, data, versão do scikit-learn, features,
+  classes, vocabulários e métricas de treino.
+
+O arquivo CURRENT aponta para a versão ativa e é trocado com os.replace, então um leitor vê
+a versão anterior ou a nova, nunca um bundle pela metade. Na carga, o hash e a coerência entre
+modelo, encoder e features são conferidos.
+
+LiveBundle segura o bundle ativo do processo: quando CURRENT muda, a nova versão é carregada e
+aquecida numa thread e só então substitui a referência. Quem já pegou o bundle anterior
+termina a predição com ele; ninguém espera a carga.
+
+Com um orçamento de latência (latency_budget_ms), é servida a variante compacta da versão
+ativa (model_variants.py) mais precisa cujo p99 medido cabe no orçamento.
+
+Sem CURRENT, os três joblib avulsos de treino_modelo.ipynb são usados (versão "legacy-...").
+
+Uso:
+    python model_bundle.py build --metrics metrics.json   # empacota os artefatos avulsos
+    python model_bundle.py activate <versão>              # troca (ou volta) a versão ativa
+    python model_bundle.py show
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from modelo import MODEL_PATH, ENCODER_PATH, FEATURES_PATH, load_artifacts, artifact_signature
+from startup import run_in_background
+
+BUNDLE_DIR = os.path.join("models", "bundles")
+BUNDLE_FILE = "bundle.joblib"
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+FORMAT_VERSION = 1
+
+
+def _file_sha256(path: str) -> str:
+    from dataset_cache import file_sha256
+    return file_sha256(path)
+
+
+def _write_atomic(path: str, text: str):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _read_manifest(version_dir: str) -> dict:
+    with open(os.path.join(version_dir, MANIFEST_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def current_version(bundle_dir: str = BUNDLE_DIR):
+    try:
+        with open(os.path.join(bundle_dir, CURRENT_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+# Assinatura barata da versão ativa: (mtime, tamanho) de CURRENT, ou dos artefatos avulsos
+def bundle_signature(bundle_dir: str = BUNDLE_DIR) -> tuple:
+    try:
+        st = os.stat(os.path.join(bundle_dir, CURRENT_FILE))
+        return ("bundle", st.st_mtime_ns, st.st_size)
+    except OSError:
+        return ("legacy",) + artifact_signature()
+
+
+def activate(version: str, bundle_dir: str = BUNDLE_DIR):
+    if not os.path.exists(os.path.join(bundle_dir, version, MANIFEST_FILE)):
+        raise FileNotFoundError(f"Bundle {version!r} não encontrado em {bundle_dir}")
+    _write_atomic(os.path.join(bundle_dir, CURRENT_FILE), version + "\n")
+
+
+def list_versions(bundle_dir: str = BUNDLE_DIR) -> list:
+    if not os.path.isdir(bundle_dir):
+        return []
+    return sorted(
+        v for v in os.listdir(bundle_dir)
+        if os.path.exists(os.path.join(bundle_dir, v, MANIFEST_FILE))
+    )
+
+
+# Versão a servir: a ativa ou, com orçamento de latência, a variante mais precisa da ativa
+# cujo p99 de uma linha cabe no orçamento (a mais rápida, se nenhuma couber)
+def select_version(bundle_dir: str = BUNDLE_DIR, latency_budget_ms: float = None):
+    ativo = current_version(bundle_dir)
+    if ativo is None or latency_budget_ms is None:
+        return ativo
+    medidas = []
+    for v in list_versions(bundle_dir):
+        manifest = _read_manifest(os.path.join(bundle_dir, v))
+        if v != ativo and manifest.get("parent") != ativo:
+            continue
+        metrics = manifest.get("metrics", {})
+        if "p99_single_ms" in metrics and "accuracy" in metrics:
+            medidas.append((metrics["p99_single_ms"], metrics["accuracy"], v))
+    if not medidas:
+        return ativo
+    cabem = [m for m in medidas if m[0] <= latency_budget_ms]
+    if cabem:
+        return max(cabem, key=lambda m: (m[1], -m[0]))[2]
+    return min(medidas)[2]
+
+
+class ModelBundle:
+    def __init__(self, model, encoder, feature_names, manifest: dict, engine_arrays: dict = None):
+        from attribution import TreeAttribution
+        from feature_encoder import FeatureEncoder
+        from gb_inference import FlatGradientBoosting
+
+        self.model = model
+        self.encoder = encoder
+        self.feature_names = list(feature_names)
+        self.manifest = manifest
+        self.version = manifest["version"]
+        self.metrics = manifest.get("metrics", {})
+        self.variant = manifest.get("variant")
+        self.feature_encoder = FeatureEncoder(self.feature_names)
+        self.engine = FlatGradientBoosting(model, engine_arrays)
+        self._validate()
+        # Contribuições por folha pré-calculadas uma vez por bundle
+        self.attribution = TreeAttribution(self.engine, self.feature_names)
+
+    # Modelo, encoder e features precisam ser do mesmo treino
+    def _validate(self):
+        if self.model.n_features_in_ != len(self.feature_names):
+            raise ValueError(
+                f"Bundle {self.version}: o modelo espera {self.model.n_features_in_} features, "
+                f"feature_names tem {len(self.feature_names)}"
+            )
+        if len(self.encoder.classes_) != len(self.model.classes_):
+            raise ValueError(
+                f"Bundle {self.version}: o encoder tem {len(self.encoder.classes_)} classes, "
+                f"o modelo {len(self.model.classes_)}"
+            )
+        if "classes" in self.manifest and list(self.encoder.classes_) != self.manifest["classes"]:
+            raise ValueError(f"Bundle {self.version}: classes do encoder diferentes do manifest")
+        if "vocabularies" in self.manifest and self.feature_encoder.vocabularies != self.manifest["vocabularies"]:
+            raise ValueError(f"Bundle {self.version}: vocabulários das features diferentes do manifest")
+
+    # Uma predição descartável: tira o custo da primeira chamada do caminho do usuário
+    def warm_up(self):
+        import numpy as np
+        self.engine.predict_with_proba(np.zeros((1, self.feature_encoder.n_features)))
+        return self
+
+
+def build_bundle(
+    model, encoder, feature_names,
+    metrics: dict = None,
+    bundle_dir: str = BUNDLE_DIR,
+    activate_now: bool = True,
+    parent: str = None,
+    variant: str = None
+) -> str:
+    import joblib
+    import sklearn
+    from feature_encoder import FeatureEncoder
+    from gb_inference import FlatGradientBoosting
+
+    feature_names = list(feature_names)
+    vocabularies = FeatureEncoder(feature_names).vocabularies
+    payload = {
+        "format": FORMAT_VERSION,
+        "model": model,
+        "encoder": encoder,
+        "feature_names": feature_names,
+        "vocabularies": vocabularies,
+        "engine_arrays": FlatGradientBoosting(model).arrays(),
+    }
+
+    os.makedirs(bundle_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".bundle-", dir=bundle_dir)
+    try:
+        path = os.path.join(tmp, BUNDLE_FILE)
+        # Sem compressão: exigência do mmap_mode
+        joblib.dump(payload, path)
+        sha = _file_sha256(path)
+        created = datetime.datetime.now(datetime.timezone.utc)
+        version = f"{created:%Y%m%d-%H%M%S}-{sha[:8]}"
+        manifest = {
+            "format": FORMAT_VERSION,
+            "version": version,
+            "created_at": created.isoformat(timespec="seconds"),
+            "sha256": sha,
+            "sklearn_version": sklearn.__version__,
+            "model_class": type(model).__name__,
+            "n_features": len(feature_names),
+            "feature_names": feature_names,
+            "classes": [str(c) for c in encoder.classes_],
+            "vocabularies": vocabularies,
+            "metrics": metrics or {},
+        }
+        # Variantes compactas (model_variants.py) apontam para o bundle de origem
+        if parent is not None:
+            manifest.update(parent=parent, variant=variant)
+        _write_atomic(os.path.join(tmp, MANIFEST_FILE), json.dumps(manifest, ensure_ascii=False, indent=2))
+        # mkdtemp cria 0700; o app pode rodar com outro usuário que o treino
+        os.chmod(tmp, 0o755)
+        try:
+            os.replace(tmp, os.path.join(bundle_dir, version))
+        except OSError:
+            # Mesmo conteúdo publicado no mesmo segundo: a versão existente já é este bundle
+            if not os.path.exists(os.path.join(bundle_dir, version, MANIFEST_FILE)):
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if activate_now:
+        activate(version, bundle_dir)
+    return version
+
+
+def load_bundle(version: str = None, bundle_dir: str = BUNDLE_DIR, mmap_mode: str = "r", verify: bool = True) -> ModelBundle:
+    import joblib
+
+    version = version or current_version(bundle_dir)
+    if version is None:
+        raise FileNotFoundError(f"Nenhum bundle ativo em {bundle_dir}")
+    version_dir = os.path.join(bundle_dir, version)
+    manifest = _read_manifest(version_dir)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Bundle {version}: formato {manifest.get('format')!r} não suportado")
+
+    path = os.path.join(version_dir, BUNDLE_FILE)
+    if verify and _file_sha256(path) != manifest["sha256"]:
+        raise ValueError(f"Bundle {version}: SHA-256 de {BUNDLE_FILE} não confere com o manifest")
+    payload = joblib.load(path, mmap_mode=mmap_mode)
+    if payload["feature_names"] != manifest["feature_names"]:
+        raise ValueError(f"Bundle {version}: ordem das features diferente do manifest")
+    return ModelBundle(
+        payload["model"], payload["encoder"], payload["feature_names"], manifest, payload.get("engine_arrays")
+    )
+
+
+# Bundle ativo (ou a variante dentro do orçamento) ou, se não houver, os três artefatos avulsos
+def load_active_bundle(bundle_dir: str = BUNDLE_DIR, latency_budget_ms: float = None) -> ModelBundle:
+    version = select_version(bundle_dir, latency_budget_ms)
+    if version is not None:
+        return load_bundle(version, bundle_dir)
+    # A versão muda junto com os arquivos, para caches por versão não servirem o modelo antigo
+    sig = hashlib.blake2b(repr(artifact_signature()).encode(), digest_size=4).hexdigest()
+    model, encoder, feature_names = load_artifacts(MODEL_PATH, ENCODER_PATH, FEATURES_PATH)
+    return ModelBundle(model, encoder, feature_names, {"version": f"legacy-{sig}"})
+
+
+class LiveBundle:
+    def __init__(self, bundle_dir: str = BUNDLE_DIR, check_interval: float = 2.0, latency_budget_ms=None):
+        self.bundle_dir = bundle_dir
+        self.check_interval = check_interval
+        self.latency_budget_ms = float(latency_budget_ms) if latency_budget_ms not in (None, "") else None
+        self._lock = threading.Lock()
+        self._signature = bundle_signature(bundle_dir)
+        self._bundle = load_active_bundle(bundle_dir, self.latency_budget_ms).warm_up()
+        self._next_check = time.monotonic() + check_interval
+        self._loading = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+
+    # Bundle atual; quem o recebe pode usá-lo até o fim mesmo que haja uma troca no meio
+    def get(self) -> ModelBundle:
+        self.poll()
+        return self._bundle
+
+    # Verifica CURRENT no máximo uma vez a cada check_interval; a carga roda fora desta thread
+    def poll(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return None
+        with self._lock:
+            if now < self._next_check or self._loading is not None:
+                return self._loading
+            self._next_check = now + self.check_interval
+            sig = bundle_signature(self.bundle_dir)
+            if sig == self._signature:
+                return None
+            self._loading = run_in_background(self._reload, sig, name="bundle")
+            return self._loading
+
+    def _reload(self, sig):
+        try:
+            novo = load_active_bundle(self.bundle_dir, self.latency_budget_ms).warm_up()
+        except Exception as e:
+            # Mantém o bundle em uso; a mesma assinatura não é tentada de novo
+            with self._lock:
+                self._signature = sig
+                self._loading = None
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+            print(f"⚠️ Bundle novo rejeitado, mantendo {self._bundle.version}: {self.last_error}", flush=True)
+            return None
+        with self._lock:
+            anterior = self._bundle.version
+            self._bundle = novo
+            self._signature = sig
+            self._loading = None
+            self.reloads += 1
+        print(f"🔄 Bundle do modelo trocado: {anterior} -> {novo.version}", flush=True)
+        return novo
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self._bundle.version,
+                "reloads": self.reloads,
+                "failures": self.failures,
+                "last_error": self.last_error,
+                "loading": self._loading is not None,
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera, ativa e inspeciona bundles do modelo")
+    parser.add_argument("--bundle-dir", default=BUNDLE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="empacota os artefatos avulsos num bundle novo")
+    build.add_argument("--model", default=MODEL_PATH)
+    build.add_argument("--encoder", default=ENCODER_PATH)
+    build.add_argument("--features", default=FEATURES_PATH)
+    build.add_argument("--metrics", help="JSON com as métricas de treino")
+    build.add_argument("--no-activate", action="store_true", help="não troca a versão ativa")
+
+    act = sub.add_parser("activate", help="aponta CURRENT para uma versão existente")
+    act.add_argument("version")
+
+    sub.add_parser("show", help="mostra a versão ativa e as disponíveis")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        metrics = None
+        if args.metrics:
+            with open(args.metrics, encoding="utf-8") as f:
+                metrics = json.load(f)
+        model, encoder, feature_names = load_artifacts(args.model, args.encoder, args.features)
+        version = build_bundle(model, encoder, feature_names, metrics, args.bundle_dir, not args.no_activate)
+        print(f"✅ Bundle {version} gravado em {args.bundle_dir}" + ("" if args.no_activate else " (ativo)"))
+    elif args.command == "activate":
+        activate(args.version, args.bundle_dir)
+        print(f"✅ Bundle ativo: {args.version}")
+    else:
+        ativo = current_version(args.bundle_dir)
+        versoes = list_versions(args.bundle_dir)
+        if not versoes:
+            print(f"Nenhum bundle em {args.bundle_dir} (usando os artefatos avulsos)")
+        for v in versoes:
+            manifest = _read_manifest(os.path.join(args.bundle_dir, v))
+            marca = "*" if v == ativo else " "
+            variante = f"  variante {manifest['variant']} de {manifest['parent']}" if "parent" in manifest else ""
+            print(f"{marca} {v}{variante}  {manifest['model_class']}  {manifest['n_features']} features  "
+                  f"métricas={json.dumps(manifest['metrics'], ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Variantes compactas do modelo ativo e relatório de acurácia x tamanho x latência.
+
+A partir do bundle ativo (model_bundle.py) são derivadas:
+
+- trunc-<k>: os primeiros k estágios do ensemble treinado, sem retreino. As predições
+  são exatamente as do estágio k do modelo original (staged_predict);
+- depth<d>-es: retreino com árvores mais rasas e parada antecipada (n_iter_no_change) na
+  mesma divisão de treino de train_model.py;
+- full: o próprio modelo, medido nas mesmas condições, como referência.
+
+Cada variante é medida no teste de data/Obesity.csv (mesma divisão de train_model.py):
+acurácia, tamanho do bundle, tempo de carga e latência p50/p99 de uma linha e de um lote, no
+mesmo motor usado pelo app (gb_inference.py). As variantes são gravadas como bundles filhos
+do ativo, com as medidas no manifest, e CURRENT é regravado para os apps em execução
+reavaliarem a escolha. O app serve a variante mais precisa dentro de MODEL_LATENCY_BUDGET_MS.
+
+Uso:
+    python model_variants.py --truncate 25 50 --depths 3 4 --output variants.json
+    MODEL_LATENCY_BUDGET_MS=0.3 streamlit run app.py
+"""
+import argparse
+import copy
+import json
+import os
+import statistics
+import time
+
+import numpy as np
+
+from benchmarks.common import time_calls, summarize, machine_info, save_results
+from model_bundle import BUNDLE_DIR, BUNDLE_FILE, activate, build_bundle, current_version, load_bundle
+from train_model import RANDOM_STATE, encoded_matrix, split_indices
+
+
+# Primeiros k estágios do ensemble: mesmo modelo, menos árvores
+def truncate(model, n_stages: int):
+    out = copy.copy(model)
+    out.estimators_ = model.estimators_[:n_stages]
+    out.train_score_ = model.train_score_[:n_stages]
+    out.n_estimators_ = n_stages
+    out.n_estimators = n_stages
+    return out
+
+
+# Retreino com árvores de profundidade max_depth e parada antecipada
+def shallow(model, max_depth: int, X, y, max_stages: int = 500):
+    from sklearn.base import clone
+    est = clone(model).set_params(
+        max_depth=max_depth, n_estimators=max_stages,
+        n_iter_no_change=10, validation_fraction=0.1, random_state=RANDOM_STATE,
+    )
+    return est.fit(X, y)
+
+
+def measure(version: str, bundle_dir: str, X_test, y_test, repeat: int = 500, batch_repeat: int = 30) -> dict:
+    path = os.path.join(bundle_dir, version, BUNDLE_FILE)
+    cargas = []
+    for _ in range(5):
+        t0 = time.perf_counter()
+        bundle = load_bundle(version, bundle_dir)
+        cargas.append(time.perf_counter() - t0)
+    engine = bundle.engine
+
+    pred = engine.predict(X_test)
+    linhas = iter(np.tile(np.arange(len(X_test)), repeat // len(X_test) + 2))
+    single = summarize(time_calls(lambda: engine.predict_with_proba(X_test[next(linhas)][None, :]), repeat))
+    batch = summarize(time_calls(lambda: engine.predict_with_proba(X_test), batch_repeat), len(X_test))
+    return {
+        "accuracy": float((pred == y_test).mean()),
+        "n_stages": int(engine.n_stages),
+        "n_nodes": int(len(engine.feature)),
+        "max_depth": int(engine.max_depth),
+        "size_bytes": os.path.getsize(path),
+        "load_ms": statistics.median(cargas) * 1e3,
+        "p50_single_ms": single["p50_ms"],
+        "p99_single_ms": single["p99_ms"],
+        "p50_batch_ms": batch["p50_ms"],
+        "p99_batch_ms": batch["p99_ms"],
+        "batch_rows": int(len(X_test)),
+    }
+
+
+def build_variants(truncations=(25, 50), depths=(3, 4), bundle_dir: str = BUNDLE_DIR, repeat: int = 500) -> dict:
+    parent = current_version(bundle_dir)
+    if parent is None:
+        raise FileNotFoundError(
+            f"Nenhum bundle ativo em {bundle_dir}; gere um com train_model.py ou model_bundle.py build"
+        )
+    base = load_bundle(parent, bundle_dir)
+    x_path, y_path, feature_names, _, _ = encoded_matrix()
+    if feature_names != base.feature_names:
+        raise ValueError("As features do dataset não batem com as do bundle ativo")
+    X = np.load(x_path, mmap_mode="r")
+    y = np.load(y_path, mmap_mode="r")
+    train_idx, test_idx = split_indices(y)
+    X_test, y_test = np.asarray(X[test_idx]), np.asarray(y[test_idx])
+
+    modelos = {"full": base.model}
+    for k in sorted(truncations, reverse=True):
+        if k < base.engine.n_stages:
+            modelos[f"trunc-{k}"] = truncate(base.model, k)
+    for d in depths:
+        t0 = time.perf_counter()
+        modelos[f"depth{d}-es"] = shallow(base.model, d, X[train_idx], y[train_idx])
+        print(f"🔧 depth{d}-es treinada em {time.perf_counter() - t0:.1f}s")
+
+    variantes = {}
+    for nome, model in modelos.items():
+        version = build_bundle(
+            model, base.encoder, base.feature_names, None,
+            bundle_dir, activate_now=False, parent=parent, variant=nome,
+        )
+        medidas = measure(version, bundle_dir, X_test, y_test, repeat)
+        # Manifest final com as medidas; o hash cobre só o bundle.joblib
+        manifest_path = os.path.join(bundle_dir, version, "manifest.json")
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        manifest["metrics"] = {**manifest["metrics"], **medidas}
+        tmp = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, manifest_path)
+        variantes[nome] = {"version": version, **medidas}
+
+    # Regrava CURRENT (mesma versão) para os apps em execução reavaliarem o orçamento
+    activate(parent, bundle_dir)
+    return {"meta": machine_info(), "parent": parent, "variants": variantes}
+
+
+def print_report(report: dict):
+    print(f"{'variante':<12} {'acurácia':>8} {'estágios':>8} {'nós':>7} {'tamanho':>9} "
+          f"{'carga':>8} {'p50 1':>8} {'p99 1':>8} {'p99 lote':>9}")
+    for nome, v in report["variants"].items():
+        print(f"{nome:<12} {v['accuracy']:8.4f} {v['n_stages']:8d} {v['n_nodes']:7d} "
+              f"{v['size_bytes'] / 1024:7.0f}KB {v['load_ms']:6.1f}ms {v['p50_single_ms']:6.3f}ms "
+              f"{v['p99_single_ms']:6.3f}ms {v['p99_batch_ms']:7.2f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera e mede variantes compactas do modelo ativo")
+    parser.add_argument("--bundle-dir", default=BUNDLE_DIR)
+    parser.add_argument("--truncate", type=int, nargs="*", default=[25, 50], help="estágios mantidos")
+    parser.add_argument("--depths", type=int, nargs="*", default=[3, 4], help="profundidades do retreino")
+    parser.add_argument("--repeat", type=int, default=500, help="medições de latência por variante")
+    parser.add_argument("--output", help="grava o relatório em JSON")
+    args = parser.parse_args(argv)
+
+    report = build_variants(args.truncate, args.depths, args.bundle_dir, args.repeat)
+    print_report(report)
+    if args.output:
+        save_results(report, args.output)
+        print(f"📄 Relatório em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
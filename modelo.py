@@ -0,0 +1,101 @@
+import os
+import warnings
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+from instrumentation import timed
+
+# pandas é importado dentro das funções que o usam; aqui só para as anotações
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# O modelo foi treinado com um DataFrame; a ordem das colunas das matrizes NumPy
+# é garantida pelo FeatureEncoder, então o aviso de nomes ausentes é ruído.
+# Só vale dentro do bloco: o resto do processo continua vendo o aviso.
+@contextmanager
+def ignore_feature_names_warning():
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        yield
+
+
+# Caminhos padrão dos artefatos gerados em treino_modelo.ipynb
+MODEL_PATH = "models/gb_model.joblib"
+ENCODER_PATH = "models/label_encoder.joblib"
+FEATURES_PATH = "models/feature_names.joblib"
+DATA_PATH = "data/Obesity.csv"
+
+# Campos de entrada do paciente (mesmo formato de sidebar_inputs() em app.py)
+INPUT_COLS = [
+    'Gender', 'Age', 'Height', 'Weight', 'family_history', 'FAVC', 'FCVC', 'NCP',
+    'CAEC', 'CH2O', 'SMOKE', 'SCC', 'FAF', 'TUE', 'CALC', 'MTRANS'
+]
+
+BIN_MAP = {
+    'Gender': {'Female':0, 'Male':1},
+    'family_history': {'no':0, 'yes':1},
+    'FAVC': {'no':0, 'yes':1},
+    'SMOKE': {'no':0, 'yes':1},
+    'SCC': {'no':0, 'yes':1}
+}
+DUMMY_COLS = ['CAEC', 'CALC', 'MTRANS']
+
+CLASSES_PT = {
+    'Insufficient_Weight':'Peso Insuficiente',
+    'Normal_Weight':'Peso Normal',
+    'Overweight_Level_I':'Sobrepeso Nível I',
+    'Overweight_Level_II':'Sobrepeso Nível II',
+    'Obesity_Type_I':'Obesidade Tipo I',
+    'Obesity_Type_II':'Obesidade Tipo II',
+    'Obesity_Type_III':'Obesidade Tipo III'
+}
+
+
+# Carregamento dos artefatos sem depender do Streamlit
+def load_artifacts(
+    path_model=MODEL_PATH,
+    path_encoder=ENCODER_PATH,
+    path_features=FEATURES_PATH
+):
+    # joblib/scikit-learn só são importados na primeira carga (partida rápida dos apps)
+    import joblib
+    model = joblib.load(path_model)
+    label_encoder = joblib.load(path_encoder)
+    feature_names = joblib.load(path_features)
+    return model, label_encoder, feature_names
+
+# Assinatura (mtime, tamanho) dos artefatos; muda sempre que algum arquivo é regravado
+def artifact_signature(paths=(MODEL_PATH, ENCODER_PATH, FEATURES_PATH)) -> tuple:
+    sig = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+            sig.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append(None)
+    return tuple(sig)
+
+# Função para realizar o pre processamento
+# height_cm=True quando a altura vem em centímetros (formulário do app);
+# o CSV de origem já guarda a altura em metros.
+@timed("preprocess_data")
+def preprocess_data(raw_df: "pd.DataFrame", expected_cols: list, height_cm: bool = True) -> "pd.DataFrame":
+    import pandas as pd
+    df = raw_df.copy()
+    if height_cm:
+        df['Height'] = df['Height'] / 100
+    for col, m in BIN_MAP.items():
+        df[col] = df[col].map(m)
+    df = pd.get_dummies(df, columns=DUMMY_COLS)
+    for c in expected_cols:
+        if c not in df.columns:
+            df[c] = 0
+    return df[expected_cols]
+
+# Tradutores de colunas
+def decode_label(encoded, encoder):
+    return encoder.inverse_transform([encoded])[0]
+
+def translate_class(pt_label: str) -> str:
+    return CLASSES_PT.get(pt_label, pt_label)
@@ -0,0 +1,68 @@
+"""Índice da distribuição da população de referência para a comparação do paciente em app.py.
+
+Montado uma única vez na carga: IMC e cada feature numérica ficam como arrays ordenados, e o
+histograma de IMC é pré-calculado para a população inteira e para cada classe de obesidade.
+Depois disso, o gráfico sai dos bins guardados (custo fixo, independente do tamanho da
+população) e o percentil do paciente é uma busca binária (searchsorted).
+
+Height no dataset está em metros; o paciente informa em centímetros (sidebar_inputs()).
+"""
+import numpy as np
+import pandas as pd
+
+# Features numéricas comparadas com a população (além do IMC)
+PERCENTILE_FEATURES = ["Age", "Height", "Weight", "FCVC", "NCP", "CH2O", "FAF", "TUE"]
+
+
+def population_bmi(df: pd.DataFrame) -> np.ndarray:
+    height = df["Height"].to_numpy(dtype=np.float64)
+    return df["Weight"].to_numpy(dtype=np.float64) / height ** 2
+
+
+class PopulationIndex:
+    def __init__(self, df: pd.DataFrame, features=PERCENTILE_FEATURES, bins: int = 30, class_col: str = "Obesity"):
+        self.n = len(df)
+        bmi = population_bmi(df)
+
+        self.sorted = {"BMI": np.sort(bmi)}
+        for col in features:
+            self.sorted[col] = np.sort(df[col].to_numpy(dtype=np.float64))
+
+        # Mesmas bordas para todas as classes, para sobrepor os histogramas
+        self.counts, self.edges = np.histogram(bmi, bins=bins)
+        self.class_counts = {}
+        if class_col in df.columns:
+            classes = np.asarray(df[class_col], dtype=object)
+            for c in pd.unique(classes):
+                self.class_counts[c] = np.histogram(bmi[classes == c], bins=self.edges)[0]
+
+    # Percentil por posto médio: % abaixo + metade dos empates, em [0, 100]
+    def percentile(self, feature: str, value: float) -> float:
+        values = self.sorted[feature]
+        if len(values) == 0:
+            return float("nan")
+        below = np.searchsorted(values, value, side="left")
+        equal = np.searchsorted(values, value, side="right") - below
+        return float(100.0 * (below + 0.5 * equal) / len(values))
+
+    # Percentis do paciente (inputs no formato de sidebar_inputs(), altura em cm)
+    def patient_percentiles(self, inputs: dict, bmi: float, height_cm: bool = True) -> dict:
+        out = {"BMI": self.percentile("BMI", bmi)}
+        for col in self.sorted:
+            if col == "BMI":
+                continue
+            value = float(inputs[col])
+            if col == "Height" and height_cm:
+                value /= 100
+            out[col] = self.percentile(col, value)
+        return out
+
+    # Desenha o histograma de IMC a partir dos bins guardados (sem passar pela população)
+    def plot_bmi(self, ax, class_label=None, class_name=None, **hist_kwargs):
+        ax.hist(self.edges[:-1], bins=self.edges, weights=self.counts, **hist_kwargs)
+        if class_label in self.class_counts:
+            ax.hist(
+                self.edges[:-1], bins=self.edges, weights=self.class_counts[class_label],
+                histtype="step", linewidth=2, label=class_name or class_label,
+            )
+            ax.legend()
@@ -0,0 +1,114 @@
+"""Cache LRU de predições, indexado pelos 16 campos de entrada do paciente.
+
+Todas as entradas de sidebar_inputs() são discretas, então perfis repetidos são comuns.
+O cache é thread-safe para ser compartilhado entre sessões do Streamlit e é esvaziado
+automaticamente quando algum artefato do modelo muda em disco.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from modelo import INPUT_COLS, MODEL_PATH, ENCODER_PATH, FEATURES_PATH, artifact_signature
+
+
+# Chave normalizada: números viram float (70 e 70.0 são o mesmo paciente)
+def make_key(inputs: dict) -> tuple:
+    key = []
+    for col in INPUT_COLS:
+        v = inputs[col]
+        key.append(v.strip() if isinstance(v, str) else float(v))
+    return tuple(key)
+
+
+class PredictionCache:
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        artifact_paths=(MODEL_PATH, ENCODER_PATH, FEATURES_PATH),
+        check_interval: float = 2.0
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize deve ser >= 1")
+        self.maxsize = maxsize
+        self.artifact_paths = tuple(artifact_paths)
+        self.check_interval = check_interval
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._signature = artifact_signature(self.artifact_paths)
+        self._next_check = time.monotonic() + check_interval
+        # Incrementada a cada esvaziamento: um valor calculado antes dele não é guardado
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # Verifica os artefatos no máximo uma vez a cada check_interval segundos
+    def _check_artifacts(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        sig = artifact_signature(self.artifact_paths)
+        if sig != self._signature:
+            self._signature = sig
+            self._data.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    # (valor ou None, geração no momento da consulta)
+    def _lookup(self, inputs: dict) -> tuple:
+        key = make_key(inputs)
+        with self._lock:
+            self._check_artifacts()
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None, self._generation
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value, self._generation
+
+    def get(self, inputs: dict):
+        return self._lookup(inputs)[0]
+
+    # Com `generation`, o valor só é guardado se o cache não foi esvaziado desde a consulta
+    def put(self, inputs: dict, value, generation: int = None):
+        key = make_key(inputs)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return value
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    # compute(inputs) -> (classe, probabilidades, IMC); executado só em caso de miss
+    def get_or_compute(self, inputs: dict, compute):
+        value, generation = self._lookup(inputs)
+        if value is None:
+            num_pred, proba, bmi = compute(inputs)
+            proba = proba.copy()
+            proba.setflags(write=False)
+            value = self.put(inputs, (num_pred, proba, bmi), generation)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,123 @@
+"""Renderização dos gráficos do painel num pool de workers, fora da thread do script.
+
+O script do Streamlit só prepara os dados de cada gráfico (crosstab, recorte, contagens) e
+pede a figura por nome (uma função de figuras_painel.py); a montagem da Figure e o savefig
+até PNG rodam no pool. Os pedidos de uma página são submetidos assim que aparecem no
+layout e entregues na ordem em que terminam: cada imagem ocupa o seu st.empty() reservado,
+e o tempo da página tende ao do gráfico mais lento em vez da soma de todos.
+
+Modos (GRAFICOS_EXECUTOR em app_analitico.py):
+- thread (padrão com mais de uma CPU): ThreadPoolExecutor; sem cópia dos dados, paralelismo limitado pelo GIL
+  às partes do Agg e da compressão PNG que o liberam;
+- process: ProcessPoolExecutor (spawn); os argumentos vão por pickle, então compensa com
+  vários núcleos e dados pequenos (crosstabs, contagens do modo de bases grandes);
+- serial (padrão com uma CPU): renderiza na própria thread do script, como antes; os
+  gráficos continuam ocupando os lugares reservados, só que na ordem do layout.
+O benchmark benchmarks/bench_render.py compara os modos na máquina de destino: com uma só
+CPU, o pool só acrescenta troca de contexto (ou pickle) ao tempo serial.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from cache_graficos import hash_estado, renderizar_figura
+
+MODOS = ("thread", "process", "serial")
+
+
+def workers_padrao() -> int:
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def modo_padrao() -> str:
+    return "thread" if (os.cpu_count() or 1) > 1 else "serial"
+
+
+# Executada no worker: monta a figura pelo nome e devolve (bytes, segundos)
+def renderizar_tarefa(figura: str, args: tuple, opcoes: dict, formato: str = "png"):
+    import figuras_painel
+    inicio = time.perf_counter()
+    dados = renderizar_figura(getattr(figuras_painel, figura)(*args, **opcoes), formato)
+    return dados, time.perf_counter() - inicio
+
+
+# Importa matplotlib/seaborn uma vez por processo do pool
+def _aquecer():
+    import figuras_painel  # noqa: F401
+
+
+# Um gráfico que falhou chega com `erro` preenchido e `dados` None; os demais seguem normalmente
+class Pedido:
+    __slots__ = ("id_grafico", "chave", "dados", "futuro", "segundos", "erro")
+
+    def __init__(self, id_grafico, chave, dados=None, futuro=None, segundos=0.0, erro=None):
+        self.id_grafico = id_grafico
+        self.chave = chave
+        self.dados = dados
+        self.futuro = futuro
+        self.segundos = segundos
+        self.erro = erro
+
+
+class RenderizadorGraficos:
+    def __init__(self, cache, workers: int = None, modo: str = "thread"):
+        if modo not in MODOS:
+            raise ValueError(f"Modo não suportado: {modo!r} (aceitos: {list(MODOS)})")
+        self.cache = cache
+        self.modo = modo
+        self.workers = workers or workers_padrao()
+        if modo == "thread":
+            self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="graficos")
+        elif modo == "process":
+            self.executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_aquecer
+            )
+        else:
+            self.executor = None
+
+    # Acerto no cache volta pronto; num miss, preparar() roda aqui (dados do gráfico) e a figura vai ao pool
+    def pedir(self, id_grafico: str, estado, figura: str, preparar, **opcoes) -> Pedido:
+        chave = (id_grafico, hash_estado(estado))
+        dados = self.cache.obter(chave)
+        if dados is not None:
+            return Pedido(id_grafico, chave, dados=dados)
+        args = tuple(preparar())
+        if self.executor is None:
+            try:
+                dados, segundos = renderizar_tarefa(figura, args, opcoes, self.cache.formato)
+            except Exception as e:
+                return Pedido(id_grafico, chave, erro=e)
+            return Pedido(id_grafico, chave, dados=self.cache.guardar(chave, dados), segundos=segundos)
+        futuro = self.executor.submit(renderizar_tarefa, figura, args, opcoes, self.cache.formato)
+        # Guarda ao terminar, mesmo que ninguém espere: um rerun do Streamlit pode interromper
+        # concluidos() e a figura pronta serve à próxima execução
+        futuro.add_done_callback(lambda f: self._guardar(chave, f))
+        return Pedido(id_grafico, chave, futuro=futuro)
+
+    def _guardar(self, chave, futuro):
+        if not futuro.cancelled() and futuro.exception() is None:
+            self.cache.guardar(chave, futuro.result()[0])
+
+    # Gera os pedidos à medida que ficam prontos (os já prontos primeiro); o cache é preenchido em pedir()
+    def concluidos(self, pedidos):
+        pendentes = {}
+        for pedido in pedidos:
+            if pedido.futuro is None:
+                yield pedido
+            else:
+                pendentes[pedido.futuro] = pedido
+        while pendentes:
+            prontos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                pedido = pendentes.pop(futuro)
+                try:
+                    pedido.dados, pedido.segundos = futuro.result()
+                except Exception as e:
+                    pedido.erro = e
+                pedido.futuro = None
+                yield pedido
+
+    def encerrar(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,260 @@
+"""Serviço HTTP local de escoragem com micro-lotes dinâmicos (somente biblioteca padrão + modelo).
+
+Recebe o mesmo payload de 16 campos produzido por sidebar_inputs() em app.py (altura em cm)
+e devolve a classe, o rótulo em português e as probabilidades. Requisições concorrentes
+são agrupadas em pequenos lotes com prazo máximo de espera; cada lote é uma única
+chamada ao modelo.
+
+O modelo é o bundle ativo (model_bundle.py), o mesmo que app.py serve, com o encoder e a
+ordem das features do próprio bundle. Um bundle ativado depois da partida é carregado em
+segundo plano (LiveBundle) e passa a valer nas requisições seguintes.
+
+Uso:
+    python scoring_service.py --port 8000 --max-batch 64 --max-wait-ms 5
+    python scoring_service.py --bundle-dir models/bundles --latency-budget-ms 2
+
+Rotas:
+    POST /predict   um objeto JSON ou uma lista de objetos
+    GET  /health
+    GET  /stats
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from model_bundle import BUNDLE_DIR, LiveBundle
+from modelo import translate_class
+
+MAX_BODY = 1 << 20
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+            500: "Internal Server Error"}
+
+
+# Nomes das classes na ordem de engine.classes_ e rótulos em português, uma vez por bundle
+class _Classes:
+    def __init__(self, bundle):
+        self.engine_classes = bundle.engine.classes_
+        self.names = [str(c) for c in bundle.encoder.inverse_transform(self.engine_classes)]
+        self.labels_pt = [translate_class(c) for c in self.names]
+
+
+class MicroBatcher:
+    def __init__(self, max_batch: int = 64, max_wait_ms: float = 5.0):
+        self._classes = {}
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = asyncio.Queue()
+        # Um único worker: os lotes rodam em sequência, fora do event loop
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._task = None
+        self.batches = 0
+        self.rows = 0
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        self._executor.shutdown(wait=False)
+
+    # Enfileira uma linha já codificada pelo FeatureEncoder de `bundle` e aguarda o resultado
+    async def submit(self, bundle, x_row: np.ndarray) -> dict:
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((bundle, x_row, fut))
+        return await fut
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Numa troca de bundle, um lote pode misturar versões: uma chamada por versão
+            por_bundle = {}
+            for item in batch:
+                por_bundle.setdefault(id(item[0]), []).append(item)
+            for itens in por_bundle.values():
+                await self._predict(loop, itens)
+
+    async def _predict(self, loop, itens):
+        bundle = itens[0][0]
+        X = np.vstack([x for _, x, _ in itens])
+        try:
+            num_pred, proba = await loop.run_in_executor(self._executor, bundle.engine.predict_with_proba, X)
+        except Exception as e:
+            for _, _, fut in itens:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(itens)
+        classes = self._classes.get(bundle.version)
+        if classes is None:
+            classes = self._classes[bundle.version] = _Classes(bundle)
+        for i, (_, _, fut) in enumerate(itens):
+            if not fut.done():
+                fut.set_result(self._result(bundle, classes, int(num_pred[i]), proba[i]))
+
+    def _result(self, bundle, classes, num_pred: int, proba: np.ndarray) -> dict:
+        idx = int(np.flatnonzero(classes.engine_classes == num_pred)[0])
+        return {
+            "class": classes.names[idx],
+            "label": classes.labels_pt[idx],
+            "probabilities": {c: float(p) for c, p in zip(classes.names, proba)},
+            "model_version": bundle.version,
+        }
+
+
+class ScoringService:
+    # live: model_bundle.LiveBundle (get() devolve o bundle ativo)
+    def __init__(self, live, max_batch: int = 64, max_wait_ms: float = 5.0):
+        self.live = live
+        self.batcher = MicroBatcher(max_batch, max_wait_ms)
+        self.started = time.time()
+        self.requests = 0
+
+    async def predict(self, payload):
+        records = payload if isinstance(payload, list) else [payload]
+        # Um bundle por requisição: codificação e predição da mesma versão
+        bundle = self.live.get()
+        # Codifica cada paciente individualmente: um registro inválido não derruba o lote
+        rows = [bundle.feature_encoder.encode_one(r) for r in records]
+        results = await asyncio.gather(*(self.batcher.submit(bundle, x) for x in rows))
+        return results if isinstance(payload, list) else results[0]
+
+    def stats(self) -> dict:
+        b = self.batcher
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "batches": b.batches,
+            "rows": b.rows,
+            "mean_batch_size": b.rows / b.batches if b.batches else 0.0,
+            "max_batch": b.max_batch,
+            "max_wait_ms": b.max_wait * 1000,
+            "bundle": self.live.stats(),
+        }
+
+    async def handle(self, method: str, path: str, body: bytes):
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/stats":
+            return 200, self.stats()
+        if path != "/predict":
+            return 404, {"error": f"rota desconhecida: {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        self.requests += 1
+        try:
+            payload = json.loads(body)
+            return 200, await self.predict(payload)
+        except KeyError as e:
+            return 400, {"error": f"campo ausente: {e.args[0]}"}
+        except (ValueError, TypeError) as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            # Falha do motor ou do lote: responde em vez de derrubar a conexão
+            traceback.print_exc()
+            return 500, {"error": f"erro interno: {type(e).__name__}"}
+
+    # HTTP/1.1 mínimo com keep-alive
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = line.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                # Sem um Content-Length válido não dá para achar o fim do corpo: responde e fecha
+                if length < 0:
+                    status, result = 400, {"error": "Content-Length inválido"}
+                    keep_alive = False
+                elif length > MAX_BODY:
+                    status, result = 413, {"error": "payload muito grande"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, result = await self.handle(method, path.split("?")[0], body)
+                    keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                data = json.dumps(result, ensure_ascii=False).encode("utf-8")
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+# Com `sock` (socket já em escuta, herdado do supervisor), host e port só entram na mensagem
+async def serve(host: str, port: int, service: ScoringService, sock=None):
+    service.batcher.start()
+    if sock is not None:
+        server = await asyncio.start_server(service.serve_connection, sock=sock)
+    else:
+        server = await asyncio.start_server(service.serve_connection, host, port)
+    print(f"✅ Serviço de escoragem em http://{host}:{port} "
+          f"(bundle {service.live.get().version}, max_batch={service.batcher.max_batch}, "
+          f"max_wait={service.batcher.max_wait * 1000:.1f}ms)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.batcher.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP local de escoragem com micro-lotes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch", type=int, default=64, help="tamanho máximo de cada lote")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="espera máxima para completar um lote")
+    parser.add_argument("--bundle-dir", default=BUNDLE_DIR)
+    parser.add_argument("--latency-budget-ms", default=os.environ.get("MODEL_LATENCY_BUDGET_MS"),
+                        help="mesmo orçamento de app.py (MODEL_LATENCY_BUDGET_MS): variante compacta que cabe nele")
+    args = parser.parse_args(argv)
+
+    live = LiveBundle(args.bundle_dir, latency_budget_ms=args.latency_budget_ms)
+    service = ScoringService(live, args.max_batch, args.max_wait_ms)
+    try:
+        asyncio.run(serve(args.host, args.port, service))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
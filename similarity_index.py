@@ -0,0 +1,148 @@
+"""Índice de pacientes semelhantes: os k registros mais próximos da população de referência.
+
+O espaço é o das features do modelo (FeatureEncoder, mesmo resultado de preprocess_data),
+padronizado por coluna (média 0, desvio 1), com distância euclidiana. Montado uma vez na carga.
+
+Uma árvore única sobre as 26 colunas padronizadas degrada com a dimensão: os dummies e
+binários quase não separam os pontos e a busca visita boa parte das folhas (dezenas de ms por
+consulta com 1 milhão de linhas). Por isso o índice separa as duas partes da distância:
+
+- as linhas são agrupadas pela assinatura categórica (binárias + dummies), no máximo algumas
+  centenas de grupos; entre dois grupos, a parte categórica da distância é constante;
+- cada grupo grande tem um KDTree só nas 8 colunas contínuas, onde a árvore funciona bem;
+  grupos pequenos seguidos (até brute_rows linhas somadas) são varridos numa única passada
+  de força bruta vetorizada, em vez de uma chamada de árvore por grupo;
+- uma consulta percorre os grupos em ordem crescente de distância categórica e para quando
+  essa distância já passa da k-ésima melhor encontrada. O resultado é exato (igual à força
+  bruta no espaço completo), e quase sempre só o grupo do próprio paciente é consultado.
+
+Consultas em lote são agrupadas pela assinatura: cada grupo de consultas desce junto em cada
+árvore (ou bloco), numa chamada vetorizada. O índice não guarda estado de consulta e pode ser
+compartilhado entre threads.
+
+Height no dataset está em metros; o paciente informa em centímetros (sidebar_inputs()).
+"""
+import numpy as np
+import pandas as pd
+
+from feature_encoder import FeatureEncoder
+
+
+class SimilarityIndex:
+    def __init__(self, df: pd.DataFrame, feature_names=None, class_col: str = "Obesity",
+                 leaf_size: int = 40, brute_rows: int = 1024):
+        from sklearn.neighbors import KDTree
+
+        if feature_names is None:
+            from train_model import feature_order
+            feature_names = feature_order(df)
+        self.n = len(df)
+        self.encoder = FeatureEncoder(feature_names)
+        X = self.encoder.encode_batch(df, height_cm=False)
+        self.mean = X.mean(axis=0)
+        self.scale = X.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        Z = (X - self.mean) / self.scale
+
+        self.continuous = np.array([idx for _, idx in self.encoder.numeric])
+        self.categorical = np.setdiff1d(np.arange(self.encoder.n_features), self.continuous)
+        # Uma assinatura por combinação de categorias; linhas do mesmo grupo ficam contíguas
+        chaves, inverso = np.unique(self._keys(X), return_inverse=True)
+        self.order = np.argsort(inverso, kind="stable")
+        self.offsets = np.searchsorted(inverso[self.order], np.arange(len(chaves) + 1))
+        self.sizes = np.diff(self.offsets)
+        self.signatures = Z[self.order[self.offsets[:-1]]][:, self.categorical]
+        self.continuas = np.ascontiguousarray(Z[self.order][:, self.continuous])
+        # Grupos pequenos são varridos em bloco por força bruta; só os grandes ganham árvore
+        self.brute_rows = brute_rows
+        self.trees = {
+            b: KDTree(self.continuas[self.offsets[b]:self.offsets[b + 1]], leaf_size=leaf_size)
+            for b in np.flatnonzero(self.sizes > brute_rows)
+        }
+
+        self.class_labels, self.class_codes = [], None
+        if class_col in df.columns:
+            codigos, rotulos = pd.factorize(np.asarray(df[class_col], dtype=object), sort=True)
+            self.class_labels, self.class_codes = list(rotulos), codigos
+
+    # Assinatura categórica em bits (binárias e dummies valem 0/1 antes da padronização)
+    def _keys(self, X) -> np.ndarray:
+        bits = (X[:, self.categorical] > 0).astype(np.int64)
+        return bits @ (np.int64(1) << np.arange(len(self.categorical), dtype=np.int64))
+
+    # Registros (DataFrame ou lista de dicts) -> matriz bruta do FeatureEncoder
+    def encode(self, records, height_cm: bool = True) -> np.ndarray:
+        return self.encoder.encode_batch(records, height_cm=height_cm)
+
+    # k vizinhos exatos de cada linha de X (matriz do FeatureEncoder): (distâncias, posições no df)
+    def query(self, X, k: int = 10) -> tuple:
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        k = min(k, self.n)
+        Z = (X - self.mean) / self.scale
+        # k melhores de cada consulta até aqui: distâncias ao quadrado e posições
+        melhor = (np.full((len(Z), k), np.inf), np.full((len(Z), k), -1, dtype=np.int64))
+        chaves, grupos = np.unique(self._keys(X), return_inverse=True)
+        for g in range(len(chaves)):
+            linhas = np.flatnonzero(grupos == g)
+            continuas = Z[linhas][:, self.continuous]
+            # Mesma assinatura no grupo inteiro: uma ordem de visita dos grupos da referência
+            d2_cat = ((self.signatures - Z[linhas[0], self.categorical]) ** 2).sum(axis=1)
+            ordem = np.argsort(d2_cat, kind="stable")
+            p = 0
+            while p < len(ordem):
+                ativas = melhor[0][linhas, -1] > d2_cat[ordem[p]]
+                if not ativas.any():
+                    break
+                if self.sizes[ordem[p]] > self.brute_rows:
+                    self._buscar_arvore(melhor, ordem[p], linhas[ativas], continuas[ativas], d2_cat[ordem[p]])
+                    p += 1
+                    continue
+                # Grupos pequenos seguidos: uma passada de força bruta sobre todos eles
+                q = p + np.searchsorted(np.cumsum(self.sizes[ordem[p:]]), self.brute_rows, side="right")
+                grupos_bloco = ordem[p:max(q, p + 1)]
+                self._buscar_bloco(melhor, grupos_bloco, linhas[ativas], continuas[ativas], d2_cat[grupos_bloco])
+                p += len(grupos_bloco)
+        return np.sqrt(melhor[0]), melhor[1]
+
+    def _buscar_arvore(self, melhor, b, alvo, consultas, d2_cat):
+        dist, ind = self.trees[b].query(consultas, k=min(melhor[0].shape[1], self.sizes[b]))
+        _juntar(melhor, alvo, dist ** 2 + d2_cat, self.order[self.offsets[b] + ind])
+
+    def _buscar_bloco(self, melhor, grupos, alvo, consultas, d2_cat, max_celulas: int = 1 << 20):
+        tamanhos = self.sizes[grupos]
+        inicio_bloco = np.cumsum(tamanhos) - tamanhos
+        posicoes = np.arange(tamanhos.sum()) + np.repeat(self.offsets[grupos] - inicio_bloco, tamanhos)
+        pontos = self.continuas[posicoes]
+        extra = np.repeat(d2_cat, tamanhos)
+        passo = max(1, max_celulas // (len(pontos) * pontos.shape[1]))
+        for i in range(0, len(alvo), passo):
+            d2 = ((consultas[i:i + passo, None, :] - pontos[None]) ** 2).sum(axis=2) + extra
+            ind = np.argsort(d2, axis=1, kind="stable")[:, :melhor[0].shape[1]]
+            _juntar(melhor, alvo[i:i + passo], np.take_along_axis(d2, ind, axis=1), self.order[posicoes[ind]])
+
+    # Um paciente (dict no formato de sidebar_inputs): (distâncias, posições), k cada
+    def query_one(self, inputs: dict, k: int = 10, height_cm: bool = True) -> tuple:
+        dist, idx = self.query(self.encoder.encode_one(inputs, height_cm=height_cm), k)
+        return dist[0], idx[0]
+
+    # Lote (DataFrame ou lista de dicts): matrizes (n, k)
+    def query_batch(self, records, k: int = 10, height_cm: bool = False) -> tuple:
+        return self.query(self.encode(records, height_cm=height_cm), k)
+
+    # Fração de cada classe entre os vizinhos: (n, n_classes), na ordem de class_labels
+    def class_mix(self, idx) -> np.ndarray:
+        idx = np.atleast_2d(idx)
+        n_classes = len(self.class_labels)
+        codigos = self.class_codes[idx] + n_classes * np.arange(len(idx))[:, None]
+        contagens = np.bincount(codigos.ravel(), minlength=len(idx) * n_classes).reshape(len(idx), n_classes)
+        return contagens / idx.shape[1]
+
+
+# Funde candidatos novos com os k melhores atuais das consultas `alvo`
+def _juntar(melhor, alvo, d2, idx):
+    melhor_d2, melhor_idx = melhor
+    d2 = np.concatenate([melhor_d2[alvo], d2], axis=1)
+    idx = np.concatenate([melhor_idx[alvo], idx], axis=1)
+    top = np.argsort(d2, axis=1, kind="stable")[:, :melhor_d2.shape[1]]
+    melhor_d2[alvo] = np.take_along_axis(d2, top, axis=1)
+    melhor_idx[alvo] = np.take_along_axis(idx, top, axis=1)
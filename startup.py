@@ -0,0 +1,91 @@
+"""Partida rápida dos apps: cronômetro por fase e trabalho pesado em segundo plano.
+
+Os apps devem responder assim que o Streamlit desenha a barra lateral. Imports de
+plotagem/modelagem ficam dentro das funções que os usam, e a carga + aquecimento do modelo
+roda numa thread. StartupTimer registra quanto cada fase levou (e em qual thread), e
+imprime o resumo uma única vez por processo.
+
+Com o supervisor (supervisor.py), dados, índices e modelo são montados uma vez no processo pai
+antes do fork (preload); os loaders dos apps passam por preloaded() e os workers usam a cópia
+herdada em vez de carregar a sua.
+"""
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    def __init__(self, name: str):
+        self.name = name
+        self.t0 = time.perf_counter()
+        self.phases = []
+        self._thread = threading.current_thread().name
+        self._lock = threading.Lock()
+        self._marks = set()
+
+    @contextmanager
+    def phase(self, label: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            fim = time.perf_counter()
+            with self._lock:
+                self.phases.append((label, fim - inicio, threading.current_thread().name))
+
+    # Marca um instante desde o início (ex.: primeira resposta); só a primeira vez conta
+    def mark(self, label: str) -> bool:
+        with self._lock:
+            if label in self._marks:
+                return False
+            self._marks.add(label)
+            self.phases.append((label, time.perf_counter() - self.t0, "desde o início"))
+            return True
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {label: round(dt * 1e3, 1) for label, dt, _ in self.phases}
+
+    def report(self) -> str:
+        with self._lock:
+            partes = [
+                f"{label} {dt * 1e3:.0f}ms" + ("" if origem == self._thread else f" ({origem})")
+                for label, dt, origem in self.phases
+            ]
+        return f"⏱️ Partida de {self.name}: " + " | ".join(partes)
+
+    def log(self):
+        print(self.report(), flush=True)
+
+
+# Executa fn(*args) numa thread daemon; o resultado (ou a exceção) fica no Future
+def run_in_background(fn, *args, name: str = "segundo-plano") -> Future:
+    future = Future()
+
+    def alvo():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=alvo, name=name, daemon=True).start()
+    return future
+
+
+# Objetos montados pelo supervisor antes do fork, herdados pelos workers (cópia sob escrita)
+_PRELOADED = {}
+
+
+def preload(key, loader):
+    _PRELOADED[key] = loader()
+    return _PRELOADED[key]
+
+
+# Objeto pré-carregado com essa chave ou, fora do supervisor, loader() deste processo
+def preloaded(key, loader):
+    if key in _PRELOADED:
+        return _PRELOADED[key]
+    return loader()
@@ -0,0 +1,220 @@
+"""Supervisor com pré-carga: modelo e dados montados uma vez, servidos por vários workers (fork).
+
+Cada worker Streamlit ou de scoring_service.py carregaria a sua cópia do modelo, dos encoders,
+da base e dos índices. Aqui o processo pai monta tudo uma vez (preload, em startup.py), congela
+o coletor de lixo (gc.freeze) e faz fork dos workers. Os objetos são herdados por cópia sob
+escrita: os buffers NumPy (colunas, árvores, índices) só são lidos e as páginas continuam
+compartilhadas. O que cada worker ainda tem de próprio: contagens de referência dos objetos
+Python, caches por processo (predições, gráficos), o monitor de drift e um bundle novo
+carregado depois da partida (LiveBundle recarrega em cada worker). As colunas e o bundle vêm
+de arquivos mapeados (dataset_cache.py, model_bundle.py) e ficam no page cache, compartilhados
+com qualquer processo.
+
+Modos:
+- score: N workers de scoring_service.py na mesma porta. Com SO_REUSEPORT (Linux), cada worker
+  abre o seu socket e o kernel reparte as conexões; sem ele, todos aceitam do socket do pai.
+- app: N servidores Streamlit do script (app.py ou app_analitico.py), nas portas port..port+N-1.
+  As sessões do Streamlit são websockets com estado, então a repartição fica num proxy reverso
+  com afinidade de sessão (ex.: nginx com ip_hash) na frente das portas.
+
+O pai só supervisiona: reinicia um worker que morre e, no SIGTERM/SIGINT, repassa o SIGTERM aos
+workers e espera todos saírem. Com METRICS_PORT, o worker i publica /metrics em METRICS_PORT + i.
+O benchmark benchmarks/bench_workers.py mede vazão e memória (PSS) por número de workers.
+
+Uso:
+    python supervisor.py score --workers 4 --port 8000
+    python supervisor.py app app.py --workers 4 --port 8501
+    python supervisor.py app app_analitico.py --workers 2 --port 8601
+"""
+import argparse
+import gc
+import json
+import os
+import signal
+import socket
+import time
+import traceback
+
+from startup import preload
+
+# Espera antes de recriar um worker que morreu (evita laço de reinício rápido)
+RESTART_DELAY = 1.0
+
+
+class Supervisor:
+    def __init__(self, workers: int, target, name: str = "escoragem"):
+        self.workers = workers
+        self.target = target
+        self.name = name
+        self.children = {}
+        self.stopping = False
+        self.restarts = 0
+
+    # Filho: roda target(i) e sai sem voltar ao código do pai
+    def _spawn(self, i: int) -> int:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = i
+            return pid
+        code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            if os.environ.get("METRICS_PORT"):
+                os.environ["METRICS_PORT"] = str(int(os.environ["METRICS_PORT"]) + i)
+            self.target(i)
+        except KeyboardInterrupt:
+            pass
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _parar(self, signum, frame):
+        # Segundo sinal: encerra à força quem ainda não saiu
+        sinal = signal.SIGKILL if self.stopping else signal.SIGTERM
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, sinal)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        # Tudo que foi pré-carregado sai das gerações do coletor: os workers não o percorrem
+        # (nem tocam as páginas) nas coletas
+        gc.collect()
+        gc.freeze()
+        signal.signal(signal.SIGTERM, self._parar)
+        signal.signal(signal.SIGINT, self._parar)
+        for i in range(self.workers):
+            self._spawn(i)
+        print(f"✅ Supervisor {os.getpid()}: {self.workers} workers de {self.name} "
+              f"(pids {', '.join(map(str, self.children))})", flush=True)
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            i = self.children.pop(pid, None)
+            if i is None or self.stopping:
+                continue
+            print(f"⚠️ Worker {i} de {self.name} (pid {pid}) saiu com código {os.waitstatus_to_exitcode(status)}; "
+                  "reiniciando", flush=True)
+            time.sleep(RESTART_DELAY)
+            if not self.stopping:
+                self.restarts += 1
+                self._spawn(i)
+        print(f"👋 Supervisor {os.getpid()} encerrado ({self.restarts} reinício(s))", flush=True)
+
+
+# --- score: scoring_service.py com o modelo carregado no pai ---
+def scoring_target(args):
+    import asyncio
+    from model_bundle import LiveBundle
+    from scoring_service import ScoringService, serve
+
+    # Cada worker herda o bundle ativo e acompanha sozinho as trocas (LiveBundle por processo)
+    live = LiveBundle(args.bundle_dir, latency_budget_ms=args.latency_budget_ms)
+    service = ScoringService(live, args.max_batch, args.max_wait_ms)
+    reuse_port = hasattr(socket, "SO_REUSEPORT")
+    compartilhado = None if reuse_port else socket.create_server((args.host, args.port), backlog=1024)
+
+    def worker(i):
+        sock = compartilhado or socket.create_server((args.host, args.port), backlog=1024, reuse_port=True)
+        asyncio.run(serve(args.host, args.port, service, sock))
+
+    return worker
+
+
+# --- app: Streamlit, com dados, índices e modelo dos loaders do script pré-carregados ---
+def _preload_app():
+    from dataset_cache import load_dataset
+    from model_bundle import BUNDLE_DIR, LiveBundle
+    from modelo import DATA_PATH
+    from population_index import PopulationIndex
+    from similarity_index import SimilarityIndex
+    import attribution, feature_encoder, gb_inference  # noqa: F401 (usados pelo bundle)
+
+    # Mesmas chaves e padrões dos loaders de app.py
+    data = preload(("dataset", DATA_PATH), lambda: load_dataset(DATA_PATH))
+    preload(("population_index", DATA_PATH), lambda: PopulationIndex(data))
+    preload(("similarity_index", DATA_PATH), lambda: SimilarityIndex(data))
+    budget = os.environ.get("MODEL_LATENCY_BUDGET_MS")
+    preload(("live_bundle", BUNDLE_DIR, budget), lambda: LiveBundle(BUNDLE_DIR, latency_budget_ms=budget))
+    import matplotlib.pyplot  # noqa: F401
+
+
+def _preload_painel():
+    from cubo_dados import CuboDados
+    from dados_painel import montar_dados
+    from filtro_indexado import IndiceFiltros
+    from graficos_agregados import LIMITE_LINHAS, AgregadosGraficos
+
+    # Mesmas chaves e padrões dos loaders de app_analitico.py
+    with open("rotulos_traduzidos.json", encoding="utf-8") as f:
+        rotulos = json.load(f)
+    caminho = os.environ.get("PAINEL_DADOS", "data/Obesity.csv")
+    linhas = int(os.environ.get("PAINEL_LINHAS", 0))
+    dados = preload(("painel", caminho, linhas), lambda: montar_dados(caminho, rotulos, linhas))
+    indice = preload(("indice", dados), lambda: IndiceFiltros(dados.tabela))
+    preload(("cubo", dados), lambda: CuboDados(dados.tabela, indice))
+    if dados.n > int(os.environ.get("PAINEL_LIMITE_LINHAS", LIMITE_LINHAS)):
+        preload(("agregados", dados), lambda: AgregadosGraficos(dados))
+    import figuras_painel  # noqa: F401
+
+
+PRELOADERS = {"app.py": _preload_app, "app_analitico.py": _preload_painel}
+
+
+def app_target(args):
+    from streamlit.web import bootstrap
+
+    preloader = PRELOADERS.get(os.path.basename(args.script))
+    if preloader is None:
+        print(f"ℹ️ Sem pré-carga conhecida para {args.script}; só o Streamlit é compartilhado", flush=True)
+    else:
+        inicio = time.perf_counter()
+        preloader()
+        print(f"📦 Pré-carga de {args.script} em {time.perf_counter() - inicio:.1f}s", flush=True)
+
+    def worker(i):
+        flags = {"server.port": args.port + i, "server.headless": True}
+        bootstrap.load_config_options(flag_options=flags)
+        bootstrap.run(args.script, False, [], flags)
+
+    return worker
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Supervisor com pré-carga e workers por fork")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    score = sub.add_parser("score", help="workers de scoring_service.py na mesma porta")
+    score.add_argument("--host", default="127.0.0.1")
+    score.add_argument("--port", type=int, default=8000)
+    score.add_argument("--max-batch", type=int, default=64)
+    score.add_argument("--max-wait-ms", type=float, default=5.0)
+    from model_bundle import BUNDLE_DIR
+    score.add_argument("--bundle-dir", default=BUNDLE_DIR)
+    score.add_argument("--latency-budget-ms", default=os.environ.get("MODEL_LATENCY_BUDGET_MS"))
+
+    app = sub.add_parser("app", help="servidores Streamlit de um script, em portas consecutivas")
+    app.add_argument("script", help="app.py ou app_analitico.py")
+    app.add_argument("--port", type=int, default=8501, help="porta do primeiro worker")
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, "fork"):
+        parser.error("o supervisor depende de os.fork (Linux/macOS)")
+    if args.workers < 1:
+        parser.error("--workers deve ser positivo")
+    target = scoring_target(args) if args.command == "score" else app_target(args)
+    Supervisor(args.workers, target, "escoragem" if args.command == "score" else args.script).run()
+
+
+if __name__ == "__main__":
+    main()
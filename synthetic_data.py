@@ -0,0 +1,75 @@
+"""Geração de registros sintéticos no esquema de data/Obesity.csv.
+
+Reamostra linhas reais (mantendo a coerência entre colunas e a classe) e aplica um
+ruído pequeno nas colunas contínuas, limitado ao intervalo observado.
+
+Uso (CSV grande para testar o painel em escala, gravado em blocos):
+    python synthetic_data.py 5000000 -o data/obesity_5m.csv
+    PAINEL_DADOS=data/obesity_5m.csv streamlit run app_analitico.py
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from modelo import DATA_PATH, INPUT_COLS
+
+# Ruído relativo ao desvio padrão de cada coluna contínua
+JITTER_COLS = {
+    'Age': 0.05, 'Height': 0.05, 'Weight': 0.05,
+    'FCVC': 0.05, 'NCP': 0.05, 'CH2O': 0.05, 'FAF': 0.05, 'TUE': 0.05
+}
+
+
+def synthesize(n: int, source=DATA_PATH, seed: int = 0, jitter: bool = True) -> pd.DataFrame:
+    df = pd.read_csv(source) if isinstance(source, str) else source
+    rng = np.random.default_rng(seed)
+    out = df.iloc[rng.integers(0, len(df), n)].reset_index(drop=True)
+    if jitter:
+        for col, scale in JITTER_COLS.items():
+            values = out[col].to_numpy(dtype=np.float64)
+            noise = rng.normal(0.0, df[col].std() * scale, n)
+            out[col] = np.clip(values + noise, df[col].min(), df[col].max())
+    return out
+
+
+# Converte para o formato de sidebar_inputs() (altura em cm, sem a coluna alvo)
+def to_payloads(df: pd.DataFrame) -> list:
+    payload = df[INPUT_COLS].copy()
+    payload['Height'] = payload['Height'] * 100
+    return payload.to_dict('records')
+
+
+# Grava n linhas sintéticas em CSV, em blocos (memória limitada a um bloco); escrita atômica
+def write_csv(n: int, path: str, source=DATA_PATH, seed: int = 0, chunksize: int = 500_000) -> int:
+    df = pd.read_csv(source) if isinstance(source, str) else source
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        for i, inicio in enumerate(range(0, n, chunksize)):
+            bloco = synthesize(min(chunksize, n - inicio), df, seed=seed + i)
+            bloco.to_csv(tmp, mode="w" if i == 0 else "a", header=i == 0, index=False, float_format="%.6f")
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera registros sintéticos no esquema de data/Obesity.csv")
+    parser.add_argument("rows", type=int, help="número de linhas")
+    parser.add_argument("-o", "--output", required=True, help="CSV de saída")
+    parser.add_argument("--source", default=DATA_PATH)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunksize", type=int, default=500_000, help="linhas por bloco gravado")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    write_csv(args.rows, args.output, args.source, args.seed, args.chunksize)
+    print(f"✅ {args.rows:,} linhas em {args.output} ({time.perf_counter() - inicio:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
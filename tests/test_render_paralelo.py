@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+from cache_graficos import CacheGraficos
+from render_paralelo import MODOS, RenderizadorGraficos
+
+
+# Um gráfico que falha (barras de uma crosstab vazia) não impede a entrega dos outros
+@pytest.mark.parametrize("modo", MODOS)
+def test_grafico_com_erro_nao_bloqueia_os_demais(modo):
+    renderizador = RenderizadorGraficos(CacheGraficos(), 2, modo)
+    boa = pd.Series([3, 5, 2], index=list("abc"))
+    vazia = pd.DataFrame()
+    try:
+        pedidos = [
+            renderizador.pedir("g0", {"i": 0}, "barras", lambda: (boa,)),
+            renderizador.pedir("falha", {"i": 1}, "barras", lambda: (vazia,)),
+            renderizador.pedir("g2", {"i": 2}, "barras", lambda: (boa * 2,)),
+        ]
+        entregues = {p.id_grafico: p for p in renderizador.concluidos(pedidos)}
+    finally:
+        renderizador.encerrar()
+
+    assert set(entregues) == {"g0", "falha", "g2"}
+    assert entregues["falha"].dados is None and entregues["falha"].erro is not None
+    for id_grafico in ("g0", "g2"):
+        assert entregues[id_grafico].erro is None
+        assert entregues[id_grafico].dados.startswith(b"\x89PNG")
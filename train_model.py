@@ -0,0 +1,329 @@
+"""Pipeline de treino em linha de comando (substitui o treino manual de treino_modelo.ipynb).
+
+- Dados: lidos do cache colunar (dataset_cache.py) e codificados uma única vez pelo
+  FeatureEncoder, na mesma ordem de features do notebook. A matriz codificada fica em cache
+  (.npy dentro da versão do cache do dataset) e é aberta com mmap pelos workers, então
+  nenhuma dobra nem candidato recodifica ou copia os dados.
+- Busca: validação cruzada estratificada de uma grade de hiperparâmetros para
+  GradientBoostingClassifier e HistGradientBoostingClassifier. Cada (candidato, dobra) é uma
+  tarefa num ProcessPoolExecutor com todos os núcleos (1 thread BLAS/OpenMP por worker).
+- Mesma divisão do notebook: 20% de teste estratificado (random_state=42). O melhor de cada
+  família (pela acurácia média da validação cruzada) é retreinado no treino e avaliado no teste.
+- Saída: os três joblib avulsos (models/) e um bundle ativo (model_bundle.py), com as métricas
+  no manifest, mais um relatório JSON de tempos e acurácias.
+
+O modelo exportado é sempre o melhor GradientBoostingClassifier: o motor de inferência do app
+(gb_inference.py) percorre as árvores desse estimador. O histogram-based entra na comparação
+do relatório.
+
+Uso:
+    python train_model.py                      # grade completa, todos os núcleos
+    python train_model.py --quick --cv 3       # grade mínima, para validar o pipeline
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from modelo import DATA_PATH, MODEL_PATH, ENCODER_PATH, FEATURES_PATH, DUMMY_COLS
+
+# Ordem das colunas de treino_modelo.ipynb: numéricas/binárias e depois os dummies em ordem alfabética
+BASE_FEATURES = [
+    'Gender', 'Age', 'Height', 'Weight', 'family_history', 'FAVC',
+    'FCVC', 'NCP', 'SMOKE', 'CH2O', 'SCC', 'FAF', 'TUE'
+]
+TARGET_COL = 'Obesity'
+RANDOM_STATE = 42
+TEST_SIZE = 0.2
+
+SEARCH_SPACE = {
+    "gb": {
+        "n_estimators": [100, 200],
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [3, 4, 6],
+    },
+    "hist": {
+        "max_iter": [100, 300],
+        "learning_rate": [0.05, 0.1],
+        "max_leaf_nodes": [15, 31],
+    },
+}
+# Só a configuração do notebook e a padrão do histogram-based
+QUICK_SPACE = {
+    "gb": {"n_estimators": [100], "learning_rate": [0.1], "max_depth": [6]},
+    "hist": {"max_iter": [100], "learning_rate": [0.1], "max_leaf_nodes": [31]},
+}
+FAMILY_NAMES = {"gb": "GradientBoostingClassifier", "hist": "HistGradientBoostingClassifier"}
+
+
+def feature_order(df) -> list:
+    dummies = []
+    for col in DUMMY_COLS:
+        dummies += sorted(f"{col}_{v}" for v in np.unique(np.asarray(df[col], dtype=object)))
+    return BASE_FEATURES + dummies
+
+
+def make_estimator(family: str, params: dict):
+    if family == "gb":
+        from sklearn.ensemble import GradientBoostingClassifier
+        return GradientBoostingClassifier(random_state=RANDOM_STATE, **params)
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    # Sem early stopping: todos os candidatos treinam o mesmo número de iterações pedido
+    return HistGradientBoostingClassifier(random_state=RANDOM_STATE, early_stopping=False, **params)
+
+
+def candidates(space: dict) -> list:
+    out = []
+    for family, grid in space.items():
+        keys = list(grid)
+        for values in itertools.product(*(grid[k] for k in keys)):
+            out.append((family, dict(zip(keys, values))))
+    return out
+
+
+# Matriz codificada + rótulos, em cache ao lado das colunas do dataset
+def encoded_matrix(path: str = DATA_PATH) -> tuple:
+    from dataset_cache import ensure_dataset_cache, open_dataset
+    from feature_encoder import FeatureEncoder
+    from sklearn.preprocessing import LabelEncoder
+
+    versao = ensure_dataset_cache(path)
+    df = open_dataset(versao)
+    feature_names = feature_order(df)
+    x_path, y_path = encoded_paths(versao, feature_names)
+
+    label_encoder = LabelEncoder().fit(np.asarray(df[TARGET_COL], dtype=object))
+    cached = os.path.exists(y_path)
+    if not cached:
+        X = FeatureEncoder(feature_names).encode_batch(df, height_cm=False)
+        y = label_encoder.transform(np.asarray(df[TARGET_COL], dtype=object)).astype(np.int64)
+        save_encoded(x_path, y_path, X, y)
+    return x_path, y_path, feature_names, label_encoder, cached
+
+
+def encoded_paths(versao: str, feature_names: list) -> tuple:
+    chave = hashlib.blake2b(json.dumps(feature_names).encode(), digest_size=8).hexdigest()
+    destino = os.path.join(versao, f"encoded-{chave}")
+    return os.path.join(destino, "X.npy"), os.path.join(destino, "y.npy")
+
+
+def save_encoded(x_path: str, y_path: str, X, y):
+    os.makedirs(os.path.dirname(x_path), exist_ok=True)
+    # y por último: a presença dele marca o cache como completo
+    for arquivo, valores in ((x_path, X), (y_path, y)):
+        tmp = f"{arquivo}.{os.getpid()}.tmp.npy"
+        np.save(tmp, valores)
+        os.replace(tmp, arquivo)
+
+
+# Índices de treino e teste da divisão do notebook (também usados para avaliar variantes)
+def split_indices(y) -> tuple:
+    from sklearn.model_selection import train_test_split
+    idx = np.arange(len(y))
+    return train_test_split(idx, test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=y)
+
+
+# --- Workers do pool: a matriz é aberta uma vez por processo, via mmap ---
+_WORKER = {}
+
+
+def _init_worker(x_path: str, y_path: str, folds: list):
+    from threadpoolctl import threadpool_limits
+    # Um núcleo por worker; o paralelismo vem do pool
+    _WORKER["limits"] = threadpool_limits(1)
+    _WORKER["X"] = np.load(x_path, mmap_mode="r")
+    _WORKER["y"] = np.load(y_path, mmap_mode="r")
+    _WORKER["folds"] = folds
+
+
+def _fit_fold(task: tuple) -> dict:
+    family, params, fold = task
+    train_idx, valid_idx = _WORKER["folds"][fold]
+    X, y = _WORKER["X"], _WORKER["y"]
+    est = make_estimator(family, params)
+    t0 = time.perf_counter()
+    est.fit(X[train_idx], y[train_idx])
+    t1 = time.perf_counter()
+    accuracy = float((est.predict(X[valid_idx]) == y[valid_idx]).mean())
+    return {"family": family, "params": params, "fold": fold, "accuracy": accuracy, "fit_s": t1 - t0}
+
+
+def _fit_final(task: tuple):
+    family, params, train_idx = task
+    est = make_estimator(family, params)
+    t0 = time.perf_counter()
+    est.fit(_WORKER["X"][train_idx], _WORKER["y"][train_idx])
+    return family, est, time.perf_counter() - t0
+
+
+def _dump_atomic(obj, path: str):
+    import joblib
+    tmp = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(obj, tmp)
+    os.replace(tmp, path)
+
+
+def train(
+    data_path: str = DATA_PATH,
+    space: dict = SEARCH_SPACE,
+    cv: int = 5,
+    jobs: int = None,
+    models_dir: str = "models",
+    write_artifacts: bool = True,
+) -> dict:
+    from sklearn.metrics import accuracy_score, f1_score
+    from sklearn.model_selection import StratifiedKFold
+
+    jobs = jobs or os.cpu_count() or 1
+    t_inicio = time.perf_counter()
+    x_path, y_path, feature_names, label_encoder, cached = encoded_matrix(data_path)
+    X = np.load(x_path, mmap_mode="r")
+    y = np.load(y_path, mmap_mode="r")
+    t_dados = time.perf_counter()
+
+    train_idx, test_idx = split_indices(y)
+    skf = StratifiedKFold(n_splits=cv, shuffle=True, random_state=RANDOM_STATE)
+    folds = [(train_idx[a], train_idx[b]) for a, b in skf.split(train_idx, y[train_idx])]
+
+    cands = candidates(space)
+    tasks = [(family, params, fold) for family, params in cands for fold in range(cv)]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(x_path, y_path, folds)) as pool:
+        resultados = list(pool.map(_fit_fold, tasks, chunksize=1))
+        t_busca = time.perf_counter()
+
+        # Agrega por candidato e escolhe o melhor de cada família
+        por_candidato = []
+        for family, params in cands:
+            rs = [r for r in resultados if r["family"] == family and r["params"] == params]
+            acc = np.array([r["accuracy"] for r in rs])
+            por_candidato.append({
+                "family": family,
+                "params": params,
+                "cv_accuracy": float(acc.mean()),
+                "cv_std": float(acc.std()),
+                "fit_s_mean": float(np.mean([r["fit_s"] for r in rs])),
+            })
+        melhores = {}
+        for c in por_candidato:
+            if c["family"] not in melhores or c["cv_accuracy"] > melhores[c["family"]]["cv_accuracy"]:
+                melhores[c["family"]] = c
+
+        finais = list(pool.map(_fit_final, [(f, c["params"], train_idx) for f, c in melhores.items()]))
+    t_refit = time.perf_counter()
+
+    X_test, y_test = np.asarray(X[test_idx]), np.asarray(y[test_idx])
+    familias = {}
+    modelos = {}
+    for family, est, fit_s in finais:
+        t0 = time.perf_counter()
+        pred = est.predict(X_test)
+        pred_s = time.perf_counter() - t0
+        modelos[family] = est
+        familias[family] = {
+            **melhores[family],
+            "estimator": FAMILY_NAMES[family],
+            "test_accuracy": float(accuracy_score(y_test, pred)),
+            "test_f1_macro": float(f1_score(y_test, pred, average="macro")),
+            "refit_s": fit_s,
+            "predict_test_ms": pred_s * 1e3,
+        }
+
+    from dataset_cache import file_sha256
+    report = {
+        "data": {
+            "path": data_path,
+            "sha256": file_sha256(data_path),
+            "rows": int(len(y)),
+            "n_train": int(len(train_idx)),
+            "n_test": int(len(test_idx)),
+            "n_features": len(feature_names),
+            "encoded_cache_hit": cached,
+        },
+        "search": {"cv": cv, "jobs": jobs, "candidates": len(cands), "fits": len(tasks), "random_state": RANDOM_STATE},
+        "timing_s": {
+            "data_and_encoding": t_dados - t_inicio,
+            "search_wall": t_busca - t_dados,
+            "search_fit_sum": float(sum(r["fit_s"] for r in resultados)),
+            "refit_wall": t_refit - t_busca,
+            "total": time.perf_counter() - t_inicio,
+        },
+        "best": familias,
+        "candidates": sorted(por_candidato, key=lambda c: -c["cv_accuracy"]),
+        "exported": "gb",
+    }
+
+    if write_artifacts:
+        from model_bundle import build_bundle
+
+        gb = familias["gb"]
+        metrics = {
+            "accuracy": gb["test_accuracy"],
+            "f1_macro": gb["test_f1_macro"],
+            "cv_accuracy": gb["cv_accuracy"],
+            "cv_std": gb["cv_std"],
+            "params": gb["params"],
+            "n_train": report["data"]["n_train"],
+            "n_test": report["data"]["n_test"],
+            "data_sha256": report["data"]["sha256"],
+        }
+        os.makedirs(models_dir, exist_ok=True)
+        artefatos = {
+            MODEL_PATH: modelos["gb"], ENCODER_PATH: label_encoder, FEATURES_PATH: feature_names
+        }
+        for path, obj in artefatos.items():
+            _dump_atomic(obj, os.path.join(models_dir, os.path.basename(path)))
+        report["bundle"] = build_bundle(
+            modelos["gb"], label_encoder, feature_names, metrics, os.path.join(models_dir, "bundles")
+        )
+    return report
+
+
+def print_report(report: dict):
+    t = report["timing_s"]
+    print(f"⏱️ Dados {t['data_and_encoding']:.2f}s (cache da matriz: "
+          f"{'sim' if report['data']['encoded_cache_hit'] else 'não'}) | "
+          f"busca {t['search_wall']:.1f}s ({report['search']['fits']} ajustes, "
+          f"{t['search_fit_sum']:.1f}s somados, {report['search']['jobs']} workers) | "
+          f"retreino {t['refit_wall']:.1f}s | total {t['total']:.1f}s")
+    print(f"{'modelo':<32} {'CV':>14} {'teste':>7} {'F1':>7} {'ajuste':>8}  parâmetros")
+    for family, r in report["best"].items():
+        marca = "✅" if family == report["exported"] else "  "
+        print(f"{marca}{r['estimator']:<30} {r['cv_accuracy']:7.4f}±{r['cv_std']:.4f} "
+              f"{r['test_accuracy']:7.4f} {r['test_f1_macro']:7.4f} {r['refit_s']:7.2f}s  {r['params']}")
+    if "bundle" in report:
+        print(f"💾 Artefatos gravados; bundle ativo {report['bundle']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Treino com busca de hiperparâmetros em paralelo")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--cv", type=int, default=5, help="número de dobras da validação cruzada")
+    parser.add_argument("--jobs", type=int, default=None, help="processos do pool (padrão: todos os núcleos)")
+    parser.add_argument("--quick", action="store_true", help="grade mínima (configuração do notebook)")
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--report", default=None,
+                        help="relatório JSON (padrão: models/training_report.json; nenhum com --dry-run)")
+    parser.add_argument("--dry-run", action="store_true", help="só compara; não grava artefatos")
+    args = parser.parse_args(argv)
+    if args.report is None and not args.dry_run:
+        args.report = os.path.join("models", "training_report.json")
+
+    report = train(
+        args.data, QUICK_SPACE if args.quick else SEARCH_SPACE, args.cv, args.jobs,
+        args.models_dir, not args.dry_run,
+    )
+    print_report(report)
+    if args.report:
+        os.makedirs(os.path.dirname(args.report) or ".", exist_ok=True)
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"📄 Relatório em {args.report}")
+
+
+if __name__ == "__main__":
+    main()
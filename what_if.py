@@ -0,0 +1,75 @@
+"""Simulação what-if: varia um ou dois campos do perfil do paciente e escora a grade inteira.
+
+O perfil atual (sidebar_inputs() em app.py) é codificado uma vez; a grade é montada copiando
+essa linha e sobrescrevendo só as colunas dos campos variados, e é escorada numa única
+chamada predict_proba do motor (gb_inference.py). Campos numéricos percorrem o intervalo do
+widget da barra lateral; campos categóricos, todas as categorias do modelo.
+
+Uma varredura 1-D usa todos os valores inteiros do widget (até 281 linhas, peso). Numa 2-D,
+cada eixo é limitado a MAX_POINTS_2D pontos igualmente espaçados (60 x 60 = 3600 linhas,
+algumas dezenas de ms), para caber no tempo de uma interação.
+"""
+import numpy as np
+
+# Intervalos dos widgets numéricos de sidebar_inputs() (altura em cm)
+SWEEP_RANGES = {
+    "Age": (1, 120), "Height": (50, 250), "Weight": (20, 300),
+    "FCVC": (1, 3), "NCP": (1, 4), "CH2O": (1, 3), "FAF": (0, 7), "TUE": (0, 2),
+}
+MAX_POINTS_2D = 60
+
+
+# Valores de um eixo: inteiros do widget (amostrados se passar de max_points) ou as categorias
+def axis_values(feature: str, feature_encoder, max_points: int = None) -> list:
+    if feature in SWEEP_RANGES:
+        lo, hi = SWEEP_RANGES[feature]
+        if max_points is None or hi - lo + 1 <= max_points:
+            return list(range(lo, hi + 1))
+        return [int(v) for v in np.unique(np.round(np.linspace(lo, hi, max_points)))]
+    vocab = feature_encoder.vocabularies
+    if feature not in vocab:
+        raise ValueError(f"Campo não variável: {feature!r} (aceitos: {list(SWEEP_RANGES) + list(vocab)})")
+    return list(vocab[feature])
+
+
+# Sobrescreve, em X, as colunas de `feature` com os valores de cada linha
+def _set_column(X: np.ndarray, feature: str, values, feature_encoder, height_cm: bool):
+    values = np.asarray(values, dtype=object)
+    fe = feature_encoder
+    for name, idx in fe.numeric:
+        if name == feature:
+            col = values.astype(np.float64)
+            X[:, idx] = col / 100 if (height_cm and idx == fe.height_idx) else col
+            return
+    for name, idx, m in fe.binary:
+        if name == feature:
+            X[:, idx] = [m[v] for v in values]
+            return
+    vocab = fe.dummies[feature]
+    cols = list(vocab.values())
+    X[:, cols] = 0.0
+    X[np.arange(len(X)), [vocab[v] for v in values]] = 1.0
+
+
+# Grade (produto cartesiano, ordem 'ij') dos eixos sobre o perfil, já codificada
+def build_grid(feature_encoder, inputs: dict, features, axes, height_cm: bool = True) -> np.ndarray:
+    base = feature_encoder.encode_one(inputs, height_cm=height_cm)
+    shape = tuple(len(a) for a in axes)
+    X = np.repeat(base, int(np.prod(shape)), axis=0)
+    grids = np.meshgrid(*[np.asarray(a, dtype=object) for a in axes], indexing="ij")
+    for feature, grid in zip(features, grids):
+        _set_column(X, feature, grid.ravel(), feature_encoder, height_cm)
+    return X
+
+
+def sweep(feature_encoder, engine, inputs: dict, features, max_points: int = None) -> dict:
+    features = list(features)
+    if not 1 <= len(features) <= 2 or len(set(features)) != len(features):
+        raise ValueError("Escolha um ou dois campos distintos para variar")
+    if max_points is None and len(features) == 2:
+        max_points = MAX_POINTS_2D
+    axes = [axis_values(f, feature_encoder, max_points) for f in features]
+    X = build_grid(feature_encoder, inputs, features, axes)
+    # Uma única chamada ao modelo para a grade inteira
+    proba = engine.predict_proba(X).reshape(tuple(len(a) for a in axes) + (-1,))
+    return {"features": features, "axes": axes, "proba": proba, "rows": len(X)}